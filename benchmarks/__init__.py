@@ -0,0 +1 @@
+"""Benchmarks for the metrics package."""
@@ -0,0 +1,118 @@
+"""Compare per-item and vectorized binning of durations.
+
+Usage: python -m benchmarks.binning [size ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from metrics.consts import CALC_LIMIT, ONE_DAY, ONE_HOUR
+from metrics.services.binning import bin_durations, group_by_label, slots_of
+
+from .issue_memory import STATUSES
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+MAX_SECONDS = 60 * ONE_DAY
+CUMULATIVE_LIMIT = 1000
+SEED = 0
+
+
+def loop_time_metric(seconds: list[float]) -> list[float]:
+    """Bin durations one at a time, as the calculators used to."""
+    return [min(max(1, value // ONE_DAY), CALC_LIMIT) for value in seconds]
+
+
+def loop_queue_time(pairs: list[tuple[str, float]]) -> dict[str, list[float]]:
+    """Bin durations per status one at a time."""
+    tmp: dict[str, list[float]] = defaultdict(list)
+    for status, seconds in pairs:
+        tmp[status].append(min(max(1, seconds // ONE_DAY), CALC_LIMIT))
+    return dict(tmp)
+
+
+def loop_median_hours(pairs: list[tuple[str, float]]) -> dict[str, float]:
+    """Take the median hours per status one duration at a time."""
+    tmp: dict[str, list[float]] = defaultdict(list)
+    for status, seconds in pairs:
+        period = max(1, seconds // ONE_HOUR)
+        if period == 1 or period > CUMULATIVE_LIMIT:
+            continue
+        tmp[status].append(period)
+    return {status: float(np.median(periods)) for status, periods in tmp.items()}
+
+
+def vectorized_median_hours(statuses: np.ndarray, seconds: np.ndarray) -> dict:
+    """Take the median hours per status in bulk."""
+    slots = slots_of(seconds, ONE_HOUR)
+    kept = (slots != 1) & (slots <= CUMULATIVE_LIMIT)
+    groups = group_by_label(statuses[kept], slots[kept])
+    return {status: float(np.median(periods)) for status, periods in groups.items()}
+
+
+def _time(run: Callable[[], object]) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = run()
+    return time.perf_counter() - start, result
+
+
+def _compare(name: str, loop: Callable[[], object], bulk: Callable[[], object]) -> None:
+    loop_seconds, expected = _time(loop)
+    bulk_seconds, result = _time(bulk)
+    if result != expected:
+        msg = f"{name}: vectorized result differs from the loop"
+        raise AssertionError(msg)
+    print(  # noqa: T201
+        f"  {name:16} loop {loop_seconds * 1e3:9.1f} ms"
+        f"  numpy {bulk_seconds * 1e3:8.1f} ms"
+        f"  {loop_seconds / bulk_seconds:6.1f}x",
+    )
+
+
+def bench_size(rng: np.random.Generator, size: int) -> None:
+    """Bin ``size`` random durations both ways and report the timings."""
+    seconds = rng.integers(0, MAX_SECONDS, size, dtype=np.int64)
+    statuses = np.array(STATUSES, dtype=object)[rng.integers(len(STATUSES), size=size)]
+    float_seconds = seconds.astype(np.float64).tolist()
+    pairs = list(zip(statuses.tolist(), float_seconds, strict=True))
+    print(f"{size} durations")  # noqa: T201
+    _compare(
+        "time metric",
+        lambda: loop_time_metric(float_seconds),
+        lambda: bin_durations(seconds, ONE_DAY, CALC_LIMIT).tolist(),
+    )
+    _compare(
+        "queue time",
+        lambda: loop_queue_time(pairs),
+        lambda: {
+            status: periods.tolist()
+            for status, periods in group_by_label(
+                statuses,
+                bin_durations(seconds, ONE_DAY, CALC_LIMIT),
+            ).items()
+        },
+    )
+    _compare(
+        "median hours",
+        lambda: loop_median_hours(pairs),
+        lambda: vectorized_median_hours(statuses, seconds),
+    )
+
+
+def main(sizes: tuple[int, ...] = DEFAULT_SIZES) -> None:
+    """Run the comparison for every size."""
+    rng = np.random.default_rng(SEED)
+    for size in sizes:
+        bench_size(rng, size)
+
+
+if __name__ == "__main__":
+    main(tuple(map(int, sys.argv[1:])) or DEFAULT_SIZES)
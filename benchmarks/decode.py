@@ -0,0 +1,79 @@
+"""Compare generic and typed decoding of a Jira search response.
+
+Usage: python -m benchmarks.decode [issues per page]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+import tracemalloc
+from typing import TYPE_CHECKING
+
+from metrics.repository.decoding import can_decode, decode_search_response
+
+from .issue_memory import make_raw_issue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+DEFAULT_PAGE_SIZE = 100
+REPEAT = 20
+AUTHOR = {
+    "accountId": "5b10a2844c20165700ede21g",
+    "displayName": "Alice Example",
+    "emailAddress": "alice@example.com",
+    "active": True,
+    "timeZone": "Europe/Berlin",
+    "avatarUrls": {
+        size: f"https://avatar.example.com/{size}.png"
+        for size in ("16x16", "24x24", "32x32", "48x48")
+    },
+}
+
+
+def make_response(page_size: int) -> bytes:
+    """Build a search response body with realistic unused fields."""
+    issues = []
+    for n in range(page_size):
+        raw = make_raw_issue(n)
+        raw["id"] = str(10_000 + n)
+        raw["self"] = f"https://jira.example.com/rest/api/2/issue/{raw['id']}"
+        raw["fields"]["status"].update(
+            {"id": "10001", "description": "", "statusCategory": {"key": "done"}},
+        )
+        for history in raw["changelog"]["histories"]:
+            history.update({"id": "1", "author": AUTHOR})
+            for item in history["items"]:
+                item.update({"fieldtype": "jira", "from": "1", "to": "2"})
+        issues.append(raw)
+    return json.dumps({"total": page_size, "issues": issues}).encode()
+
+
+def _measure(decode: Callable[[bytes], object], body: bytes, count: int) -> None:
+    seconds = min(timeit.repeat(lambda: decode(body), number=1, repeat=REPEAT))
+    tracemalloc.start()
+    result = decode(body)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    name = getattr(decode, "__name__", "decode")
+    print(  # noqa: T201
+        f"{name:24} {seconds / count * 1e6:8.1f} us/issue"
+        f" {allocated / count:10.0f} bytes/issue",
+    )
+
+
+def main(page_size: int = DEFAULT_PAGE_SIZE) -> None:
+    """Decode one page both ways and report time and memory per issue."""
+    body = make_response(page_size)
+    _measure(json.loads, body, page_size)
+    if not can_decode(["created", "status"]):
+        print("msgspec is not installed, typed decoding unavailable")  # noqa: T201
+        return
+    _measure(decode_search_response, body, page_size)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAGE_SIZE)
@@ -0,0 +1,99 @@
+"""Compare recomputing metrics and applying a sync delta to them.
+
+Usage: python -m benchmarks.incremental [issue count] [changed issues]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+from metrics.consts import CALC_LIMIT, ONE_DAY, ONE_HOUR
+from metrics.repository.base import BaseIssuesRepository, IssueChanges
+from metrics.repository.converter import JiraDataConverter
+from metrics.services.engine import MetricsEngine
+from metrics.services.incremental import IncrementalMetricsEngine
+
+from .issue_memory import make_raw_issue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from metrics.entity import Issue
+
+DEFAULT_ISSUE_COUNT = 50_000
+DEFAULT_CHANGED = 100
+CUMULATIVE_LIMIT = 1000
+
+
+class DeltaRepository(BaseIssuesRepository):
+    """In-memory repository whose refresh re-converts the first issues."""
+
+    def __init__(self, issues: list[Issue], changed: int) -> None:
+        """Hold ``issues``; each refresh reports the first ``changed`` as updated."""
+        self.initial = issues
+        self.changed = changed
+        self.converter = JiraDataConverter()
+        self.synced = False
+        super().__init__()
+
+    def get_issues(self) -> list[Issue]:
+        """Return the initial issues."""
+        return self.initial
+
+    def refresh(self) -> None:
+        """Load the issues, then swap in fresh copies of the changed ones."""
+        if not self.synced:
+            self.synced = True
+            super().refresh()
+            return
+        updated = tuple(
+            self.converter.convert_data_to_issue(make_raw_issue(n))
+            for n in range(self.changed)
+        )
+        issues = dict(self.issues)
+        issues.update((issue.key, issue) for issue in updated)
+        self.issues = MappingProxyType(issues)
+        self.changes = IssueChanges(updated=updated)
+
+
+def all_metrics(engine: MetricsEngine) -> None:
+    """Compute every metric the CLI reports."""
+    engine.time_metric("cycle_time", ONE_DAY, CALC_LIMIT)
+    engine.time_metric("lead_time", ONE_DAY, CALC_LIMIT)
+    engine.queue_time(ONE_DAY, CALC_LIMIT)
+    engine.cumulative_queue_time(ONE_HOUR, CUMULATIVE_LIMIT)
+    engine.throughput()
+    engine.return_to_testing(["testing"], 1)
+
+
+def _measure(name: str, run: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    run()
+    print(f"{name:40} {(time.perf_counter() - start) * 1e3:10.1f} ms")  # noqa: T201
+
+
+def main(
+    issue_count: int = DEFAULT_ISSUE_COUNT,
+    changed: int = DEFAULT_CHANGED,
+) -> None:
+    """Time a full computation, then a refresh changing ``changed`` issues."""
+    converter = JiraDataConverter()
+    issues = [
+        converter.convert_data_to_issue(make_raw_issue(n)) for n in range(issue_count)
+    ]
+    print(f"{issue_count} issues, {changed} changed per refresh")  # noqa: T201
+    for engine_class in (MetricsEngine, IncrementalMetricsEngine):
+        engine = engine_class(DeltaRepository(issues, changed))
+        name = engine_class.__name__
+        _measure(f"{name} first run", lambda engine=engine: all_metrics(engine))
+        _measure(
+            f"{name} after refresh",
+            lambda engine=engine: (engine.refresh(), all_metrics(engine)),
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,78 @@
+"""Measure the memory held per converted Issue.
+
+Usage: python -m benchmarks.issue_memory [issue count]
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from datetime import UTC, datetime, timedelta
+from itertools import pairwise
+
+from metrics.repository.converter import JiraDataConverter
+
+DEFAULT_ISSUE_COUNT = 20_000
+STATUSES = ("To Do", "In Progress", "Code Review", "Testing", "Done")
+ASSIGNEES = ("alice", "bob", "carol", "dave")
+JIRA_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime(JIRA_TIMESTAMP_FORMAT)
+
+
+def make_raw_issue(n: int) -> dict:
+    """Build a raw issue that walks through every status once."""
+    created_at = datetime(2024, 1, 1, tzinfo=UTC) + timedelta(minutes=n)
+    histories = []
+    for step, (from_status, to_status) in enumerate(
+        pairwise(STATUSES),
+        start=1,
+    ):
+        at = _timestamp(created_at + timedelta(hours=step))
+        histories.append(
+            {
+                "created": at,
+                "items": [
+                    {
+                        "field": "status",
+                        "fromString": from_status,
+                        "toString": to_status,
+                    },
+                    {
+                        "field": "assignee",
+                        "fromString": ASSIGNEES[(n + step - 1) % len(ASSIGNEES)],
+                        "toString": ASSIGNEES[(n + step) % len(ASSIGNEES)],
+                    },
+                ],
+            },
+        )
+    return {
+        "key": f"ISSUE-{n}",
+        "fields": {
+            "created": _timestamp(created_at),
+            "status": {"name": STATUSES[-1]},
+        },
+        "changelog": {"histories": histories},
+    }
+
+
+def main(issue_count: int = DEFAULT_ISSUE_COUNT) -> None:
+    """Convert ``issue_count`` raw issues and report bytes per issue."""
+    raw_issues = [make_raw_issue(n) for n in range(issue_count)]
+    converter = JiraDataConverter()
+    gc.collect()
+    tracemalloc.start()
+    issues = [converter.convert_data_to_issue(item) for item in raw_issues]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"issues:           {len(issues)}")  # noqa: T201
+    print(f"bytes per issue:  {current / issue_count:.0f}")  # noqa: T201
+    print(f"peak per issue:   {peak / issue_count:.0f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ISSUE_COUNT)
@@ -0,0 +1,52 @@
+"""Compare opening the JSON sync store and a columnar snapshot.
+
+Usage: python -m benchmarks.snapshot [issue count]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.snapshot import SnapshotIssuesRepository, write_snapshot
+from metrics.repository.store import IssueStore
+
+from .issue_memory import make_raw_issue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+DEFAULT_ISSUE_COUNT = 20_000
+JQL = "project=BENCH"
+
+
+def _measure(name: str, run: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    run()
+    print(f"{name:32} {(time.perf_counter() - start) * 1e3:10.1f} ms")  # noqa: T201
+
+
+def main(issue_count: int = DEFAULT_ISSUE_COUNT) -> None:
+    """Write ``issue_count`` issues both ways and time reading them back."""
+    converter = JiraDataConverter()
+    issues = [
+        converter.convert_data_to_issue(make_raw_issue(n)) for n in range(issue_count)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        store = IssueStore(directory, "https://jira.example.com")
+        store.save(JQL, {issue.key: issue for issue in issues}, datetime.now(UTC))
+        write_snapshot(directory, issues)
+        _measure("json store: load", lambda: store.load(JQL))
+        repo = SnapshotIssuesRepository(directory)
+        _measure("snapshot: open", lambda: SnapshotIssuesRepository(directory))
+        _measure("snapshot: throughput", repo.finished_per_week)
+        _measure("snapshot: queue time periods", repo.status_period_counts)
+        _measure("snapshot: build all issues", repo.snapshot.issues)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ISSUE_COUNT)
@@ -6,14 +6,23 @@ import json
 import logging
 import os
 import sys
+from datetime import date
 from pathlib import Path
 from typing import Any
 
 import click
+from dependency_injector import providers
 from dependency_injector.wiring import Provide, inject
 
 from metrics.containers import Container
-from metrics.services import MetricsService, VisService  # noqa: TC001
+from metrics.repository.pagination import PAGINATION_MODES
+from metrics.repository.snapshot import write_snapshot
+from metrics.repository.store import STORE_FORMATS
+from metrics.services import (  # noqa: TC001
+    ForecastService,
+    MetricsService,
+    VisService,
+)
 
 try:
     import yaml
@@ -55,17 +64,82 @@ def merge_config(
     }
 
 
+CONFIG_ENV_VARS: dict[str, str] = {
+    "server": "JIRA_SERVER",
+    "token": "JIRA_TOKEN",
+    "jql": "JIRA_JQL",
+    "max_in_flight": "JIRA_MAX_IN_FLIGHT",
+    "sync_store": "METRICS_SYNC_STORE",
+    "cache_dir": "METRICS_CACHE_DIR",
+    "cache_ttl": "METRICS_CACHE_TTL",
+    "backend": "METRICS_BACKEND",
+    "pool_size": "METRICS_POOL_SIZE",
+    "pagination": "METRICS_PAGINATION",
+    "shard_size": "METRICS_SHARD_SIZE",
+    "workers": "METRICS_WORKERS",
+    "store_format": "METRICS_STORE_FORMAT",
+    "snapshot": "METRICS_SNAPSHOT",
+    "export_snapshot": "METRICS_EXPORT_SNAPSHOT",
+    "forecast_items": "METRICS_FORECAST_ITEMS",
+    "forecast_date": "METRICS_FORECAST_DATE",
+}
+
+BACKENDS: tuple[str, ...] = ("sync", "async")
+
+INT_OPTIONS: dict[str, str] = {
+    "max_in_flight": "Max in-flight requests",
+    "cache_ttl": "Cache TTL",
+    "pool_size": "Connection pool size",
+    "shard_size": "Shard size",
+    "workers": "Converter workers",
+    "forecast_items": "Forecast items",
+}
+
+CHOICE_OPTIONS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "backend": ("Backend", BACKENDS),
+    "pagination": ("Pagination", PAGINATION_MODES),
+    "store_format": ("Store format", STORE_FORMATS),
+}
+
+
 def get_env_config() -> dict[str, str | None]:
     """Read Jira configuration from environment variables."""
-    return {
-        "server": os.environ.get("JIRA_SERVER"),
-        "token": os.environ.get("JIRA_TOKEN"),
-        "jql": os.environ.get("JIRA_JQL"),
-    }
+    return {key: os.environ.get(env_var) for key, env_var in CONFIG_ENV_VARS.items()}
 
 
-def validate_config(cfg: dict[str, str | None]) -> list[str]:
+def validate_options(cfg: dict[str, str | None]) -> list[str]:
+    """Validate the optional integer and choice settings."""
+    errors = []
+    for key, label in INT_OPTIONS.items():
+        value = str(cfg.get(key) or "")
+        if value and (not value.isdigit() or int(value) < 1):
+            errors.append(f"{label} must be a positive integer.")
+    for key, (label, choices) in CHOICE_OPTIONS.items():
+        if cfg.get(key) and cfg[key] not in choices:
+            errors.append(f"{label} must be one of: {', '.join(choices)}.")
+    if cfg.get("forecast_date"):
+        try:
+            date.fromisoformat(str(cfg["forecast_date"]))
+        except ValueError:
+            errors.append("Forecast date must be a date such as 2025-06-30.")
+    return errors
+
+
+def validate_config(
+    cfg: dict[str, str | None],
+    *,
+    offline: bool = False,
+    columnar: bool = False,
+) -> list[str]:
     """Validate required Jira configuration fields."""
+    if cfg.get("snapshot"):
+        errors = validate_options(cfg)
+        if offline or columnar or cfg.get("sync_store"):
+            errors.append(
+                "A snapshot cannot be combined with --offline, --columnar"
+                " or --sync-store.",
+            )
+        return errors
     errors = []
     if not cfg.get("server"):
         errors.append(
@@ -78,7 +152,7 @@ def validate_config(cfg: dict[str, str | None]) -> list[str]:
         errors.append(
             "Jira server URL must start with http:// or https://.",
         )
-    if not cfg.get("token"):
+    if not cfg.get("token") and not offline:
         errors.append(
             "Jira token is missing. Set --jira-token, JIRA_TOKEN, or config file.",
         )
@@ -86,9 +160,34 @@ def validate_config(cfg: dict[str, str | None]) -> list[str]:
         errors.append(
             "Jira JQL is missing. Set --jira-jql, JIRA_JQL, or config file.",
         )
+    errors.extend(validate_options(cfg))
+    if offline and not cfg.get("cache_dir"):
+        errors.append(
+            "Offline mode needs a response cache."
+            " Set --cache-dir, METRICS_CACHE_DIR, or config file.",
+        )
+    if offline and cfg.get("sync_store"):
+        errors.append("Offline mode cannot be combined with --sync-store.")
+    if columnar and cfg.get("sync_store"):
+        errors.append("Columnar mode cannot be combined with --sync-store.")
     return errors
 
 
+def select_repository(
+    container: Container,
+    cfg: dict[str, str | None],
+    *,
+    columnar: bool = False,
+) -> None:
+    """Pick the repository for a snapshot, columnar tables or a SQLite store."""
+    if cfg.get("snapshot"):
+        container.repo.override(container.snapshot_repo)
+    elif columnar:
+        container.repo.override(container.columnar_repo)
+    elif cfg.get("sync_store") and cfg.get("store_format") == "sqlite":
+        container.repo.override(container.sqlite_repo)
+
+
 @click.command(
     help="""
     Analyze and visualize Jira issue metrics.
@@ -119,28 +218,139 @@ def validate_config(cfg: dict[str, str | None]) -> list[str]:
     envvar="JIRA_JQL",
     help="Jira JQL query for issues (e.g., 'project=MYPROJ').",
 )
-def cli(
+@click.option(
+    "--max-in-flight",
+    envvar="JIRA_MAX_IN_FLIGHT",
+    type=int,
+    help="Maximum number of concurrent Jira search requests (default: 8).",
+)
+@click.option(
+    "--sync-store",
+    envvar="METRICS_SYNC_STORE",
+    type=click.Path(file_okay=False),
+    help="Directory of the local issue store used for incremental sync.",
+)
+@click.option(
+    "--store-format",
+    envvar="METRICS_STORE_FORMAT",
+    type=click.Choice(STORE_FORMATS),
+    help="Format of the sync store: JSON files or one SQLite database (default: json).",
+)
+@click.option(
+    "--full-sync",
+    is_flag=True,
+    help="Re-download all issues and rebuild the local issue store.",
+)
+@click.option(
+    "--cache-dir",
+    envvar="METRICS_CACHE_DIR",
+    type=click.Path(file_okay=False),
+    help="Directory of the on-disk cache of raw Jira responses.",
+)
+@click.option(
+    "--cache-ttl",
+    envvar="METRICS_CACHE_TTL",
+    type=int,
+    help="Seconds a cached Jira response stays fresh (default: one day).",
+)
+@click.option(
+    "--offline",
+    "--from-cache",
+    is_flag=True,
+    help="Replay cached Jira responses without any network access.",
+)
+@click.option(
+    "--backend",
+    envvar="METRICS_BACKEND",
+    type=click.Choice(BACKENDS),
+    help="Jira fetch backend; 'async' needs aiohttp (default: sync).",
+)
+@click.option(
+    "--pool-size",
+    envvar="METRICS_POOL_SIZE",
+    type=int,
+    help="HTTP connection pool size of the async backend (default: 8).",
+)
+@click.option(
+    "--pagination",
+    envvar="METRICS_PAGINATION",
+    type=click.Choice(PAGINATION_MODES),
+    help="How search results are paged: 'token', 'keyset', 'offset' or"
+    " 'sharded' (default: auto, tokens when the server supports them).",
+)
+@click.option(
+    "--shard-size",
+    envvar="METRICS_SHARD_SIZE",
+    type=int,
+    help="Max issues per created-date shard when sharding, and per query"
+    " before auto pagination shards without tokens (default: 5000).",
+)
+@click.option(
+    "--workers",
+    envvar="METRICS_WORKERS",
+    type=int,
+    help="Processes converting raw issues in parallel (default: 1).",
+)
+@click.option(
+    "--snapshot",
+    envvar="METRICS_SNAPSHOT",
+    type=click.Path(file_okay=False),
+    help="Read issues from a columnar snapshot instead of Jira.",
+)
+@click.option(
+    "--export-snapshot",
+    envvar="METRICS_EXPORT_SNAPSHOT",
+    type=click.Path(file_okay=False),
+    help="Write the converted issues to a columnar snapshot directory.",
+)
+@click.option(
+    "--forecast-items",
+    envvar="METRICS_FORECAST_ITEMS",
+    type=int,
+    help="Forecast when this many more issues will be done.",
+)
+@click.option(
+    "--forecast-date",
+    envvar="METRICS_FORECAST_DATE",
+    help="Forecast how many issues will be done by this date (YYYY-MM-DD).",
+)
+@click.option(
+    "--columnar",
+    is_flag=True,
+    help="Convert issues to columnar issue and transition tables.",
+)
+def cli(  # noqa: PLR0913, PLR0917
     config: str | None,
     jira_server: str | None,
     jira_token: str | None,
     jira_jql: str | None,
+    max_in_flight: int | None,
+    sync_store: str | None,
+    cache_dir: str | None,
+    cache_ttl: int | None,
+    backend: str | None,
+    pool_size: int | None,
+    pagination: str | None,
+    shard_size: int | None,
+    workers: int | None,
+    store_format: str | None,
+    snapshot: str | None,
+    export_snapshot: str | None,
+    forecast_items: int | None,
+    forecast_date: str | None,
+    *,
+    full_sync: bool,
+    offline: bool,
+    columnar: bool,
 ) -> None:
     """Analyze and visualize Jira issue metrics."""
     logger = logging.getLogger(__name__)
-    file_cfg: dict[str, str | None] = {
-        "server": None,
-        "token": None,
-        "jql": None,
-    }
+    file_cfg: dict[str, str | None] = dict.fromkeys(CONFIG_ENV_VARS)
     if config:
         try:
             file_data = load_config_file(config)
             jira_section = file_data.get("jira", {})
-            file_cfg = {
-                "server": jira_section.get("server"),
-                "token": jira_section.get("token"),
-                "jql": jira_section.get("jql"),
-            }
+            file_cfg = {key: jira_section.get(key) for key in CONFIG_ENV_VARS}
         except (FileNotFoundError, ImportError, ValueError) as e:
             click.echo(f"Error loading config file: {e}", err=True)
             sys.exit(1)
@@ -149,9 +359,23 @@ def cli(
         "server": jira_server,
         "token": jira_token,
         "jql": jira_jql,
+        "max_in_flight": str(max_in_flight) if max_in_flight is not None else None,
+        "sync_store": sync_store,
+        "cache_dir": cache_dir,
+        "cache_ttl": str(cache_ttl) if cache_ttl is not None else None,
+        "backend": backend,
+        "pool_size": str(pool_size) if pool_size is not None else None,
+        "pagination": pagination,
+        "shard_size": str(shard_size) if shard_size is not None else None,
+        "workers": str(workers) if workers is not None else None,
+        "store_format": store_format,
+        "snapshot": snapshot,
+        "export_snapshot": export_snapshot,
+        "forecast_items": str(forecast_items) if forecast_items is not None else None,
+        "forecast_date": forecast_date,
     }
     cfg = merge_config(file_cfg, env_cfg, cli_cfg)
-    errors = validate_config(cfg)
+    errors = validate_config(cfg, offline=offline, columnar=columnar)
     if errors:
         for err in errors:
             click.echo(f"Error: {err}", err=True)
@@ -161,15 +385,29 @@ def cli(
         container.config.from_dict(
             {
                 "jira": {
-                    "server": cfg["server"],
-                    "token": cfg["token"],
-                    "jql": cfg["jql"],
+                    **cfg,
+                    **{
+                        key: int(cfg[key]) if cfg.get(key) else None
+                        for key in INT_OPTIONS
+                    },
+                    "backend": cfg.get("backend") or "sync",
+                    "pagination": cfg.get("pagination") or "auto",
+                    "store_format": cfg.get("store_format") or "json",
+                    "full_sync": full_sync,
+                    "offline": offline,
                 },
             },
         )
+        if offline:
+            container.jira.override(providers.Object(None))
+        select_repository(container, cfg, columnar=columnar)
         container.init_resources()
         container.wire(modules=[__name__])
+        if cfg.get("export_snapshot"):
+            write_snapshot(cfg["export_snapshot"], container.repo().iter_issues())
         calculate_metrics()
+        if cfg.get("forecast_items") or cfg.get("forecast_date"):
+            forecast_delivery()
     except Exception:
         logger.exception("Fatal error")
         sys.exit(1)
@@ -187,10 +425,19 @@ def calculate_metrics(
     throughput = metrics_service.get_throughput()
     cumulative_queue_time = metrics_service.get_cumulative_queue_time()
     return_to_testing = metrics_service.get_return_to_testing()
+    queue_time_percentiles = metrics_service.get_queue_time_percentiles()
+    cycle_time_trend = metrics_service.get_cycle_time_trend()
+    lead_time_trend = metrics_service.get_lead_time_trend()
+    throughput_trend = metrics_service.get_throughput_trend()
 
     output_dir = Path("output")
     output_dir.mkdir(exist_ok=True)
 
+    queue_time_percentiles.to_csv(
+        output_dir / "queue_time_percentiles.csv",
+        index=False,
+    )
+
     vis_service.vis_array_like(
         f"{output_dir}/lead_time.png",
         lead_time,
@@ -219,6 +466,21 @@ def calculate_metrics(
         f"{output_dir}/cumulative_queue_time.png",
         cumulative_queue_time,
     )
+    vis_service.vis_trend(
+        f"{output_dir}/cycle_time_trend.png",
+        cycle_time_trend,
+        y_label="days",
+    )
+    vis_service.vis_trend(
+        f"{output_dir}/lead_time_trend.png",
+        lead_time_trend,
+        y_label="days",
+    )
+    vis_service.vis_trend(
+        f"{output_dir}/throughput_trend.png",
+        throughput_trend,
+        y_label="issues per week",
+    )
     for status_name, values in queue_time.items():
         vis_service.vis_array_like(
             f"{output_dir}/queue_time_{status_name}.png",
@@ -228,5 +490,26 @@ def calculate_metrics(
         )
 
 
+@inject
+def forecast_delivery(
+    items: int | None = Provide[Container.config.jira.forecast_items],
+    by: str | None = Provide[Container.config.jira.forecast_date],
+    forecast_service: ForecastService = Provide[Container.forecast_service],
+) -> None:
+    """Forecast delivery from weekly throughput and save the forecasts as CSV."""
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+    if items:
+        forecast_service.when(items).to_csv(
+            output_dir / "forecast_when.csv",
+            index=False,
+        )
+    if by:
+        forecast_service.how_many(date.fromisoformat(by)).to_csv(
+            output_dir / "forecast_how_many.csv",
+            index=False,
+        )
+
+
 if __name__ == "__main__":
     cli()
@@ -1,9 +1,39 @@
 """Constants for metrics calculations."""
 
+from datetime import timedelta
 from typing import Final
 
 ONE_HOUR: Final[int] = 60 * 60
 ONE_DAY: Final[int] = ONE_HOUR * 24
 CALC_LIMIT: Final[int] = 30
 
+# Percentiles of time in status reported for SLAs.
+QUEUE_TIME_PERCENTILES: Final[tuple[float, ...]] = (50, 85, 95)
+
+# Trailing windows, in weeks, and percentiles of the trend metrics.
+TREND_WINDOWS: Final[tuple[int, ...]] = (4, 8, 12)
+TREND_PERCENTILES: Final[tuple[float, ...]] = (50, 85)
+
+# Monte Carlo delivery forecasts: runs, weeks of throughput history
+# resampled, confidence levels reported and the default random seed.
+FORECAST_SIMULATIONS: Final[int] = 100_000
+FORECAST_HISTORY_WEEKS: Final[int] = 26
+FORECAST_PERCENTILES: Final[tuple[float, ...]] = (50, 85, 95)
+FORECAST_SEED: Final[int] = 0
+
 DONE_STATUSES: Final[list[str]] = ["done", "completed", "cancelled", "closed"]
+
+MAX_IN_FLIGHT: Final[int] = 8
+POOL_SIZE: Final[int] = 8
+FETCH_MAX_RETRIES: Final[int] = 5
+FETCH_BASE_DELAY: Final[float] = 1.0
+FETCH_MAX_DELAY: Final[float] = 60.0
+FETCH_TARGET_LATENCY: Final[float] = 10.0
+# Longest Retry-After delay honored, so a bogus header cannot stall a fetch.
+FETCH_MAX_RETRY_AFTER: Final[float] = 120.0
+
+# Safety margin re-fetched on every incremental sync to cover clock skew.
+SYNC_OVERLAP: Final[timedelta] = timedelta(minutes=5)
+
+# Largest number of issues fetched from one created-date shard.
+SHARD_SIZE: Final[int] = 5000
@@ -6,18 +6,31 @@ import logging.config
 
 from dependency_injector import containers, providers
 
+from metrics.repository.aio import AsyncJiraAPIRepository
+from metrics.repository.cache import open_response_cache
+from metrics.repository.columnar import ColumnarIssuesRepository
 from metrics.repository.converter import JiraDataConverter
 from metrics.repository.jira import JiraAPIRepository, JiraIssuesRepository
+from metrics.repository.scheduler import FetchScheduler
+from metrics.repository.snapshot import SnapshotIssuesRepository
+from metrics.repository.sqlite_store import SQLiteIssuesRepository, open_sqlite_store
+from metrics.repository.store import open_issue_store
 from metrics.services.calculator import (
     CumulativeQueueTimeCalculator,
     CycleTimeCalculator,
     LeadTimeCalculator,
     QueueTimeCalculator,
+    QueueTimePercentilesCalculator,
     ReturnToTestingCalculator,
+    RollingCycleTimeCalculator,
+    RollingLeadTimeCalculator,
+    RollingThroughputCalculator,
     ThroughputCalculator,
+    required_fields,
 )
+from metrics.services.incremental import open_metrics_engine
 
-from .services import MetricsService, VisService
+from .services import ForecastService, MetricsService, VisService
 from .utils import get_jira_client
 
 
@@ -29,7 +42,11 @@ class Container(containers.DeclarativeContainer):
         fname="metrics/logging.ini",
     )
 
-    config = providers.Configuration()
+    config = providers.Configuration(
+        default={
+            "jira": {"backend": "sync", "pagination": "auto", "store_format": "json"},
+        },
+    )
 
     jira = providers.Factory(
         get_jira_client,
@@ -37,36 +54,164 @@ class Container(containers.DeclarativeContainer):
         config.jira.token,
     )
 
-    jira_api_repo = providers.Factory(
-        JiraAPIRepository,
-        jira,
-        config.jira.jql,
+    fetch_scheduler = providers.Factory(
+        FetchScheduler,
+        max_in_flight=config.jira.max_in_flight,
+    )
+
+    response_cache = providers.Factory(
+        open_response_cache,
+        config.jira.cache_dir,
+        config.jira.server,
+        config.jira.cache_ttl,
+        offline=config.jira.offline.as_(bool),
+    )
+
+    search_fields = providers.Callable(
+        required_fields,
+        JiraDataConverter,
+        CycleTimeCalculator,
+        LeadTimeCalculator,
+        QueueTimeCalculator,
+        ThroughputCalculator,
+        CumulativeQueueTimeCalculator,
+        ReturnToTestingCalculator,
+    )
+
+    jira_api_repo = providers.Selector(
+        config.jira.backend,
+        sync=providers.Factory(
+            JiraAPIRepository,
+            jira,
+            config.jira.jql,
+            scheduler=fetch_scheduler,
+            cache=response_cache,
+            fields=search_fields,
+            pagination=config.jira.pagination,
+            shard_size=config.jira.shard_size,
+        ),
+        **{
+            "async": providers.Factory(
+                AsyncJiraAPIRepository,
+                config.jira.server,
+                config.jira.token,
+                config.jira.jql,
+                pool_size=config.jira.pool_size,
+                cache=response_cache,
+                fields=search_fields,
+            ),
+        },
     )
     jira_data_converter = providers.Factory(JiraDataConverter)
+    issue_store = providers.Selector(
+        config.jira.store_format,
+        json=providers.Factory(
+            open_issue_store,
+            config.jira.sync_store,
+            config.jira.server,
+        ),
+        sqlite=providers.Factory(
+            open_sqlite_store,
+            config.jira.sync_store,
+            config.jira.server,
+        ),
+    )
 
-    repo = providers.Factory(
+    # A singleton so every calculator shares one fetched snapshot per run.
+    repo = providers.Singleton(
         JiraIssuesRepository,
         api_repo=jira_api_repo,
         converter=jira_data_converter,
+        store=issue_store,
+        full_sync=config.jira.full_sync.as_(bool),
+        workers=config.jira.workers,
+    )
+
+    # Replaces ``repo`` when issues are kept as columnar tables.
+    columnar_repo = providers.Singleton(
+        ColumnarIssuesRepository,
+        api_repo=jira_api_repo,
+        converter=jira_data_converter,
+    )
+
+    # Replaces ``repo`` when the sync store is a SQLite database, which
+    # metrics then query instead of loading every issue.
+    sqlite_repo = providers.Singleton(
+        SQLiteIssuesRepository,
+        issue_store,
+        config.jira.jql,
+        api_repo=jira_api_repo,
+        converter=jira_data_converter,
+        full_sync=config.jira.full_sync.as_(bool),
+        workers=config.jira.workers,
+    )
+
+    # Replaces ``repo`` when issues are read from a columnar snapshot.
+    snapshot_repo = providers.Singleton(
+        SnapshotIssuesRepository,
+        config.jira.snapshot,
     )
 
-    cycle_time_calculator = providers.Factory(CycleTimeCalculator, repo)
-    lead_time_calculator = providers.Factory(LeadTimeCalculator, repo)
+    # Shared by all calculators, so a run walks the issues only once. With a
+    # sync store, the engine keeps its aggregates next to it and only
+    # applies what each sync changed.
+    metrics_engine = providers.Singleton(
+        open_metrics_engine,
+        repo,
+        config.jira.sync_store,
+        config.jira.server,
+        config.jira.jql,
+    )
+
+    cycle_time_calculator = providers.Factory(
+        CycleTimeCalculator,
+        repo,
+        engine=metrics_engine,
+    )
+    lead_time_calculator = providers.Factory(
+        LeadTimeCalculator,
+        repo,
+        engine=metrics_engine,
+    )
     queue_time_calculator = providers.Factory(
         QueueTimeCalculator,
         repo,
+        engine=metrics_engine,
     )
     throughput_calculator = providers.Factory(
         ThroughputCalculator,
         repo,
+        engine=metrics_engine,
     )
     cumulative_queue_time_calculator = providers.Factory(
         CumulativeQueueTimeCalculator,
         repo,
+        engine=metrics_engine,
     )
     return_to_testing_calculator = providers.Factory(
         ReturnToTestingCalculator,
         repo,
+        engine=metrics_engine,
+    )
+    queue_time_percentiles_calculator = providers.Factory(
+        QueueTimePercentilesCalculator,
+        repo,
+        engine=metrics_engine,
+    )
+    rolling_cycle_time_calculator = providers.Factory(
+        RollingCycleTimeCalculator,
+        repo,
+        engine=metrics_engine,
+    )
+    rolling_lead_time_calculator = providers.Factory(
+        RollingLeadTimeCalculator,
+        repo,
+        engine=metrics_engine,
+    )
+    rolling_throughput_calculator = providers.Factory(
+        RollingThroughputCalculator,
+        repo,
+        engine=metrics_engine,
     )
 
     metrics_service = providers.Factory(
@@ -77,8 +222,17 @@ class Container(containers.DeclarativeContainer):
         throughput_calculator=throughput_calculator,
         cumulative_queue_time_calculator=cumulative_queue_time_calculator,
         return_to_testing_calculator=return_to_testing_calculator,
+        queue_time_percentiles_calculator=queue_time_percentiles_calculator,
+        rolling_cycle_time_calculator=rolling_cycle_time_calculator,
+        rolling_lead_time_calculator=rolling_lead_time_calculator,
+        rolling_throughput_calculator=rolling_throughput_calculator,
     )
 
     vis_service = providers.Factory(
         VisService,
     )
+
+    forecast_service = providers.Factory(
+        ForecastService,
+        rolling_throughput_calculator=rolling_throughput_calculator,
+    )
@@ -1,5 +1,15 @@
 """Issue entity models."""
 
 from .issues import Issue
+from .periods import Periods
+from .tables import IssueTableBuilder, IssueTables
+from .transitions import Transition, TransitionLog
 
-__all__ = ["Issue"]
+__all__ = [
+    "Issue",
+    "IssueTableBuilder",
+    "IssueTables",
+    "Periods",
+    "Transition",
+    "TransitionLog",
+]
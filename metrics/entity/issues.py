@@ -2,16 +2,29 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, fields
 from typing import TYPE_CHECKING
 
+from .periods import Periods, intern_name
+
 if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
     from datetime import datetime, timedelta
 
+    from .transitions import TransitionLog
+
 
-@dataclass
+@dataclass(slots=True)
 class Issue:
-    """A Jira issue with status history and timing metadata."""
+    """A Jira issue with status history and timing metadata.
+
+    Issues are slotted and store their data compactly: status and
+    assignee names are interned, the status history becomes a tuple and
+    the per-status and per-assignee periods become :class:`Periods`.
+    ``transitions`` keeps the individual changes with their timestamps,
+    for metrics that need to know when something happened.
+    """
 
     key: str
     status: str
@@ -20,10 +33,34 @@ class Issue:
     first_status_change_at: datetime | None = None
     last_finish_status_at: datetime | None = None
 
-    status_history: list[str] | None = None
+    status_history: Sequence[str] | None = None
+
+    doers_x_periods: Mapping[str | None, timedelta] | None = None
+    statuses_x_periods: Mapping[str | None, timedelta] | None = None
+
+    transitions: TransitionLog | None = None
+
+    def __post_init__(self) -> None:
+        """Convert the fields to their compact form."""
+        self.status = sys.intern(self.status)
+        if self.status_history is not None:
+            self.status_history = tuple(map(intern_name, self.status_history))
+        self.doers_x_periods = Periods.of(self.doers_x_periods)
+        self.statuses_x_periods = Periods.of(self.statuses_x_periods)
 
-    doers_x_periods: dict[str, timedelta] | None = None
-    statuses_x_periods: dict[str, timedelta] | None = None
+    def __getstate__(self) -> dict[str, object]:
+        """Return the fields, for pickling."""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        """Restore a pickled issue, interning its names again.
+
+        Issues converted in worker processes come back pickled, and
+        unpickled strings are new copies rather than the interned ones.
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.__post_init__()
 
     @property
     def was_done(self) -> bool:
@@ -44,3 +81,15 @@ class Issue:
         if self.first_status_change_at and self.last_finish_status_at:
             return self.last_finish_status_at - self.first_status_change_at
         return None
+
+    def status_at(self, when: datetime) -> str | None:
+        """Return the status the issue had at ``when``.
+
+        Returns None before the issue was created, or when it has no
+        transition log to look the status up in.
+        """
+        if when < self.created_at or self.transitions is None:
+            return None
+        if not self.transitions.changed("status"):
+            return self.status
+        return self.transitions.value_at("status", when)
@@ -0,0 +1,96 @@
+"""Compact read-only mapping of names to time periods."""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import timedelta
+
+_ONE_SECOND = timedelta(seconds=1)
+
+
+def whole_seconds(period: timedelta) -> int:
+    """Return a period in whole seconds, rounded down as metrics bin it."""
+    return period // _ONE_SECOND
+
+
+def intern_name(name: str | None) -> str | None:
+    """Intern a status or assignee name, so equal names share one string."""
+    return None if name is None else sys.intern(name)
+
+
+class Periods(Mapping[str | None, timedelta]):
+    """Time spent per status or assignee, stored as whole seconds.
+
+    Names are interned and kept in a tuple, and the periods in an
+    ``array`` of 64-bit integers, instead of a dict of ``timedelta``
+    objects. Periods are rounded down to whole seconds, which keeps the
+    timeslot every metric bins them into. Assignee periods may
+    have a ``None`` name for time spent unassigned.
+    """
+
+    __slots__ = ("_names", "_seconds")
+
+    def __init__(self, periods: Mapping[str | None, timedelta]) -> None:
+        """Copy ``periods`` into compact storage."""
+        self._names = tuple(intern_name(name) for name in periods)
+        self._seconds = array(
+            "q",
+            map(whole_seconds, periods.values()),
+        )
+
+    @classmethod
+    def of(
+        cls,
+        periods: Mapping[str | None, timedelta] | None,
+    ) -> Periods | None:
+        """Return ``periods`` in compact form, keeping None as is."""
+        if periods is None or isinstance(periods, Periods):
+            return periods
+        return cls(periods)
+
+    @classmethod
+    def from_seconds(
+        cls,
+        names: Iterable[str | None],
+        seconds: Iterable[int],
+    ) -> Periods:
+        """Build periods from already interned names and whole seconds."""
+        periods = cls.__new__(cls)
+        periods._names = tuple(names)  # noqa: SLF001
+        periods._seconds = array("q", seconds)  # noqa: SLF001
+        return periods
+
+    def __getstate__(self) -> tuple[tuple[str | None, ...], array]:
+        """Return the names and seconds, for pickling."""
+        return self._names, self._seconds
+
+    def __setstate__(self, state: tuple[tuple[str | None, ...], array]) -> None:
+        """Restore pickled periods, interning their names again."""
+        names, self._seconds = state
+        self._names = tuple(intern_name(name) for name in names)
+
+    def __getitem__(self, name: str | None) -> timedelta:
+        """Return the period of ``name``."""
+        try:
+            index = self._names.index(name)
+        except ValueError:
+            raise KeyError(name) from None
+        return timedelta(seconds=self._seconds[index])
+
+    def __iter__(self) -> Iterator[str | None]:
+        """Iterate over the names."""
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        """Return the number of names."""
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        """Return a dict-like representation."""
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def seconds(self) -> array:
+        """Return the periods in whole seconds, in name order."""
+        return self._seconds
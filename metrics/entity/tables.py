@@ -0,0 +1,316 @@
+"""Columnar issue and transition tables."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, timedelta, timezone
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from .issues import Issue
+from .transitions import TransitionLog
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+    from datetime import datetime
+
+ISSUE_COLUMNS = (
+    "key",
+    "status",
+    "created_at",
+    "first_status_change_at",
+    "last_finish_status_at",
+)
+TRANSITION_COLUMNS = ("key", "field", "from_value", "to_value", "at", "duration")
+
+# Issue columns holding times, each with an ``<column>_offset`` column.
+TIME_COLUMNS = ISSUE_COLUMNS[2:]
+
+# Changelog fields recorded as transitions.
+STATUS_FIELD = "status"
+ASSIGNEE_FIELD = "assignee"
+
+# Issues built at a time when iterating over the tables.
+ISSUE_CHUNK_SIZE = 1024
+
+
+def _timestamps(values: list[datetime | None]) -> pd.Series:
+    return pd.to_datetime(pd.Series(values, dtype=object), utc=True)
+
+
+def _offsets(values: list[datetime | None]) -> pd.Series:
+    """Return the UTC offset of each time in seconds, 0 for a missing one."""
+    return pd.Series(
+        [
+            int((value.utcoffset() or timedelta()).total_seconds()) if value else 0
+            for value in values
+        ],
+        dtype=np.int32,
+    )
+
+
+@lru_cache
+def _zone(offset: int) -> timezone:
+    return UTC if offset == 0 else timezone(timedelta(seconds=offset))
+
+
+def _py_datetime(value: pd.Timestamp, offset: int) -> datetime | None:
+    if pd.isna(value):
+        return None
+    return value.to_pydatetime().astimezone(_zone(offset))
+
+
+@dataclass(frozen=True)
+class IssueTables:
+    """Issues and their changelog transitions as two pandas tables.
+
+    ``issues`` has one row per issue: key, current status, creation,
+    first status change and last finish time. ``transitions`` has one
+    row per status or assignee change: the issue key, the changed field,
+    the previous and new value, when it happened and how long the
+    previous value had been set. Statuses, assignees, keys and fields
+    are categorical, so :attr:`pandas.Series.cat.codes` gives small
+    integer ids that vectorized calculators can work on. Timestamps are
+    UTC; the offset each issue time was recorded with is kept in seconds
+    in an ``<column>_offset`` column, so Issues built from the tables
+    keep their time zone.
+
+    Keys are unique and their codes are the rows of the issues, and the
+    transitions are grouped by issue in the same order, so Issues are
+    built from the tables on demand rather than kept alongside them.
+    """
+
+    issues: pd.DataFrame
+    transitions: pd.DataFrame
+
+    def __len__(self) -> int:
+        """Return the number of issues."""
+        return len(self.issues)
+
+    def status_transitions(self) -> pd.DataFrame:
+        """Return only the status transitions."""
+        return self.transitions[self.transitions["field"] == STATUS_FIELD]
+
+    def local_times(self, column: str) -> pd.Series:
+        """Return the times of an issue column as naive local wall-clock times."""
+        offsets = pd.to_timedelta(self.issues[f"{column}_offset"], unit="s")
+        return self.issues[column].dt.tz_localize(None) + offsets
+
+    def position(self, key: str) -> int | None:
+        """Return the row of the issue with ``key``, or None."""
+        try:
+            return int(self.issues["key"].cat.categories.get_loc(key))
+        except KeyError:
+            return None
+
+    def positions_between(
+        self,
+        column: str,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[int]:
+        """Return rows of issues with ``column`` in ``[start, end)``.
+
+        Rows are ordered by the time in ``column``, ties by row.
+        """
+        times = self.issues[column]
+        mask = times.notna()
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times < end
+        positions = np.flatnonzero(mask.to_numpy())
+        order = np.argsort(times.to_numpy()[positions], kind="stable")
+        return positions[order].tolist()
+
+    def to_issues(self) -> list[Issue]:
+        """Build an Issue for every row of the issue table, in order."""
+        return list(self.iter_issues())
+
+    def iter_issues(self, chunk_size: int = ISSUE_CHUNK_SIZE) -> Iterator[Issue]:
+        """Build the Issues one chunk of rows at a time, without keeping them."""
+        for start in range(0, len(self), chunk_size):
+            yield from self.issues_at(range(start, min(start + chunk_size, len(self))))
+
+    def issue(self, key: str) -> Issue | None:
+        """Build the Issue with ``key``, or None if it is not in the table."""
+        position = self.position(key)
+        return None if position is None else self.issues_at([position])[0]
+
+    def issues_at(self, positions: Sequence[int]) -> list[Issue]:
+        """Build the Issues of the given rows, in the order given."""
+        rows = np.asarray(positions, dtype=np.int64)
+        offsets = self._transition_offsets
+        starts = offsets[rows]
+        lengths = offsets[rows + 1] - starts
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        # The transition rows of every issue asked for, issue by issue.
+        transition_rows = np.repeat(starts - bounds[:-1], lengths) + np.arange(
+            bounds[-1],
+        )
+        changes = list(self.transitions.iloc[transition_rows].itertuples(index=False))
+        bounds = bounds.tolist()
+        return [
+            self._issue(row, changes[bounds[i] : bounds[i + 1]])
+            for i, row in enumerate(self.issues.iloc[rows].itertuples(index=False))
+        ]
+
+    @cached_property
+    def _transition_offsets(self) -> np.ndarray:
+        """Return where each issue's transitions start, plus where the last end."""
+        codes = self.transitions["key"].cat.codes.to_numpy()
+        return np.searchsorted(codes, np.arange(len(self) + 1))
+
+    @staticmethod
+    def _issue(row: Any, changes: list[Any]) -> Issue:  # noqa: ANN401
+        status_history = ["created"]
+        doers: defaultdict[str, timedelta] = defaultdict(timedelta)
+        statuses: defaultdict[str, timedelta] = defaultdict(timedelta)
+        log = []
+        for change in changes:
+            from_value = None if pd.isna(change.from_value) else change.from_value
+            to_value = None if pd.isna(change.to_value) else change.to_value
+            duration = change.duration.to_pytimedelta()
+            if change.field == STATUS_FIELD:
+                status_history.append(to_value)
+                statuses[from_value] += duration
+            else:
+                doers[from_value] += duration
+            log.append((change.at.to_pydatetime(), change.field, from_value, to_value))
+        return Issue(
+            key=row.key,
+            status=row.status,
+            created_at=_py_datetime(row.created_at, row.created_at_offset),
+            first_status_change_at=_py_datetime(
+                row.first_status_change_at,
+                row.first_status_change_at_offset,
+            ),
+            last_finish_status_at=_py_datetime(
+                row.last_finish_status_at,
+                row.last_finish_status_at_offset,
+            ),
+            status_history=status_history,
+            doers_x_periods=doers,
+            statuses_x_periods=statuses,
+            transitions=TransitionLog(log),
+        )
+
+
+@dataclass
+class IssueTableBuilder:
+    """Collects issue and transition rows and builds :class:`IssueTables`.
+
+    An issue added again under the same key replaces the earlier one,
+    with its transitions, but keeps its place, as in a dict.
+    """
+
+    issue_rows: dict[str, list[Any]] = field(
+        default_factory=lambda: {column: [] for column in ISSUE_COLUMNS},
+    )
+    transition_rows: dict[str, list[Any]] = field(
+        default_factory=lambda: {column: [] for column in TRANSITION_COLUMNS},
+    )
+    # The last row added per key, and the issue row of each transition.
+    _latest: dict[str, int] = field(default_factory=dict, repr=False)
+    _transition_issues: list[int] = field(default_factory=list, repr=False)
+
+    def add_issue(
+        self,
+        key: str,
+        status: str,
+        created_at: datetime,
+        first_status_change_at: datetime | None,
+        last_finish_status_at: datetime | None,
+    ) -> None:
+        """Append a row to the issue table."""
+        self._latest[key] = len(self.issue_rows["key"])
+        for column, value in zip(
+            ISSUE_COLUMNS,
+            (key, status, created_at, first_status_change_at, last_finish_status_at),
+            strict=True,
+        ):
+            self.issue_rows[column].append(value)
+
+    def add_transition(  # noqa: PLR0913, PLR0917
+        self,
+        key: str,
+        changed_field: str,
+        from_value: str | None,
+        to_value: str | None,
+        at: datetime,
+        duration: timedelta,
+    ) -> None:
+        """Append a row to the transitions of the issue last added as ``key``."""
+        self._transition_issues.append(self._latest[key])
+        for column, value in zip(
+            TRANSITION_COLUMNS,
+            (key, changed_field, from_value, to_value, at, duration),
+            strict=True,
+        ):
+            self.transition_rows[column].append(value)
+
+    def build(self) -> IssueTables:
+        """Build the tables from the rows collected so far."""
+        rows = np.fromiter(self._latest.values(), dtype=np.int64)
+        rank = np.full(len(self.issue_rows["key"]), -1)
+        rank[rows] = np.arange(len(rows))
+        # Transitions of the kept issues, grouped in the order of the issues.
+        transition_rank = rank[np.asarray(self._transition_issues, dtype=np.int64)]
+        kept = np.flatnonzero(transition_rank >= 0)
+        kept = kept[np.argsort(transition_rank[kept], kind="stable")]
+        issue_rows = _select(self.issue_rows, rows)
+        transition_rows = _select(self.transition_rows, kept)
+        keys = pd.CategoricalDtype(issue_rows["key"])
+        # One set of categories for both columns, so codes are comparable.
+        values = pd.CategoricalDtype(
+            sorted(
+                {
+                    value
+                    for value in (
+                        *transition_rows["from_value"],
+                        *transition_rows["to_value"],
+                        *issue_rows["status"],
+                    )
+                    if value is not None
+                },
+            ),
+        )
+        issues = pd.DataFrame(
+            {
+                "key": pd.Series(issue_rows["key"], dtype=keys),
+                "status": pd.Series(issue_rows["status"], dtype=values),
+                **{column: _timestamps(issue_rows[column]) for column in TIME_COLUMNS},
+                **{
+                    f"{column}_offset": _offsets(issue_rows[column])
+                    for column in TIME_COLUMNS
+                },
+            },
+        )
+        transitions = pd.DataFrame(
+            {
+                "key": pd.Series(transition_rows["key"], dtype=keys),
+                "field": pd.Series(
+                    transition_rows["field"],
+                    dtype=pd.CategoricalDtype([STATUS_FIELD, ASSIGNEE_FIELD]),
+                ),
+                "from_value": pd.Series(transition_rows["from_value"], dtype=values),
+                "to_value": pd.Series(transition_rows["to_value"], dtype=values),
+                "at": _timestamps(transition_rows["at"]),
+                "duration": pd.to_timedelta(
+                    pd.Series(transition_rows["duration"], dtype=object),
+                ),
+            },
+        )
+        return IssueTables(issues, transitions)
+
+
+def _select(columns: dict[str, list[Any]], rows: np.ndarray) -> dict[str, list[Any]]:
+    """Return the given rows of every column, in the order given."""
+    return {
+        column: [values[row] for row in rows.tolist()]
+        for column, values in columns.items()
+    }
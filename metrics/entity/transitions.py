@@ -0,0 +1,196 @@
+"""Compact, time-ordered log of an issue's status and assignee changes."""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, NamedTuple
+
+from .periods import intern_name
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+# Changelog fields kept in the log, in the order of their codes.
+TRANSITION_FIELDS: tuple[str, ...] = ("status", "assignee")
+
+_FIELD_CODES = {name: code for code, name in enumerate(TRANSITION_FIELDS)}
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Return an aware datetime as integer epoch milliseconds."""
+    return round(value.timestamp() * 1000)
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Return epoch milliseconds as a UTC datetime."""
+    return datetime.fromtimestamp(value / 1000, UTC)
+
+
+class Transition(NamedTuple):
+    """One status or assignee change of an issue."""
+
+    at: datetime
+    field: str
+    from_value: str | None
+    to_value: str | None
+
+
+class TransitionLog:
+    """Status and assignee changes of one issue, ordered by time.
+
+    Times are kept as epoch milliseconds in an ``array`` and fields as
+    one-byte codes, with interned names, so the log stays small while
+    time ranges are found by binary search. Changes made at the same
+    time keep their changelog order.
+    """
+
+    __slots__ = ("_fields", "_from_values", "_times", "_to_values")
+
+    def __init__(
+        self,
+        transitions: Iterable[tuple[datetime, str, str | None, str | None]] = (),
+    ) -> None:
+        """Build the log from ``(at, field, from, to)`` tuples.
+
+        The tuples must be ordered by time.
+        """
+        rows = list(transitions)
+        self._times = array("q", (to_epoch_ms(row[0]) for row in rows))
+        self._fields = bytes(_FIELD_CODES[row[1]] for row in rows)
+        self._from_values = tuple(intern_name(row[2]) for row in rows)
+        self._to_values = tuple(intern_name(row[3]) for row in rows)
+
+    def __getstate__(self) -> tuple:
+        """Return the columns, for pickling."""
+        return self._times, self._fields, self._from_values, self._to_values
+
+    def __setstate__(self, state: tuple) -> None:
+        """Restore a pickled log, interning its names again."""
+        self._times, self._fields, from_values, to_values = state
+        self._from_values = tuple(intern_name(value) for value in from_values)
+        self._to_values = tuple(intern_name(value) for value in to_values)
+
+    def __len__(self) -> int:
+        """Return the number of transitions."""
+        return len(self._times)
+
+    def __iter__(self) -> Iterator[Transition]:
+        """Iterate over the transitions in time order."""
+        return map(self._transition, range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare logs by their transitions."""
+        if not isinstance(other, TransitionLog):
+            return NotImplemented
+        return (
+            self._times == other._times
+            and self._fields == other._fields
+            and self._from_values == other._from_values
+            and self._to_values == other._to_values
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Return a representation listing the transitions."""
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        field: str | None = None,
+    ) -> list[Transition]:
+        """Return the transitions from ``start`` up to, not including, ``end``.
+
+        Args:
+        ----
+            start: The start of the range; unbounded when None.
+            end: The end of the range; unbounded when None.
+            field: Only return changes of this field, e.g. "status".
+
+        Returns:
+        -------
+            The matching transitions, in time order.
+
+        """
+        lo = 0 if start is None else bisect_left(self._times, to_epoch_ms(start))
+        hi = len(self) if end is None else bisect_left(self._times, to_epoch_ms(end))
+        code = None if field is None else _FIELD_CODES[field]
+        return [
+            self._transition(index)
+            for index in range(lo, hi)
+            if code is None or self._fields[index] == code
+        ]
+
+    def value_at(self, field: str, when: datetime) -> str | None:
+        """Return the value ``field`` had at ``when``, as far as the log knows.
+
+        Before the first change of the field this is the value that
+        change replaced. Returns None when the field never changed, or
+        when its value at ``when`` was empty.
+        """
+        code = _FIELD_CODES[field]
+        index = bisect_right(self._times, to_epoch_ms(when))
+        for past in range(index - 1, -1, -1):
+            if self._fields[past] == code:
+                return self._to_values[past]
+        for future in range(index, len(self)):
+            if self._fields[future] == code:
+                return self._from_values[future]
+        return None
+
+    def changed(self, field: str) -> bool:
+        """Check whether the log has any change of ``field``."""
+        return _FIELD_CODES[field] in self._fields
+
+    def to_rows(self) -> list[list]:
+        """Return ``[epoch_ms, field, from, to]`` rows for serialization."""
+        return [
+            [time, TRANSITION_FIELDS[code], from_value, to_value]
+            for time, code, from_value, to_value in zip(
+                self._times,
+                self._fields,
+                self._from_values,
+                self._to_values,
+                strict=True,
+            )
+        ]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list]) -> TransitionLog:
+        """Build a log from rows produced by :meth:`to_rows`."""
+        return cls(
+            (from_epoch_ms(time), field, from_value, to_value)
+            for time, field, from_value, to_value in rows
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        times: Iterable[int],
+        fields: Iterable[int],
+        from_values: Iterable[str | None],
+        to_values: Iterable[str | None],
+    ) -> TransitionLog:
+        """Build a log from columns in its own storage format.
+
+        Times are epoch milliseconds, fields are indexes into
+        :data:`TRANSITION_FIELDS` and names must already be interned.
+        """
+        log = cls.__new__(cls)
+        log._times = array("q", times)  # noqa: SLF001
+        log._fields = bytes(fields)
+        log._from_values = tuple(from_values)  # noqa: SLF001
+        log._to_values = tuple(to_values)  # noqa: SLF001
+        return log
+
+    def _transition(self, index: int) -> Transition:
+        return Transition(
+            from_epoch_ms(self._times[index]),
+            TRANSITION_FIELDS[self._fields[index]],
+            self._from_values[index],
+            self._to_values[index],
+        )
@@ -0,0 +1,505 @@
+"""Asyncio-based Jira search backend with pooled HTTP connections."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, NamedTuple, NoReturn, Self, TypeVar
+
+from jira.exceptions import JIRAError
+
+from metrics.consts import (
+    FETCH_BASE_DELAY,
+    FETCH_MAX_DELAY,
+    FETCH_MAX_RETRIES,
+    POOL_SIZE,
+)
+
+from .changelog import (
+    CHANGELOG_PAGE_SIZE,
+    UNSUPPORTED_STATUSES,
+    bulk_request_body,
+    collect_bulk_response,
+    is_truncated,
+    set_histories,
+)
+from .decoding import can_decode, decode_search_response
+from .jira import JiraAPIRepository
+from .jsonstream import JSONArrayStream
+from .scheduler import THROTTLE_STATUSES, backoff_delay, parse_retry_after
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterator, Sequence
+
+    from .cache import RawResponseCache
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = "/rest/api/2/search"
+ISSUE_PATH = "/rest/api/2/issue/{key}"
+CHANGELOG_PATH = "/rest/api/2/issue/{key}/changelog"
+BULK_CHANGELOG_PATH = "/rest/api/3/changelog/bulkfetch"
+CHUNK_SIZE = 64 * 1024
+
+_DONE = object()
+
+T = TypeVar("T")
+
+
+class _Failure(NamedTuple):
+    """An error raised by the fetch thread, handed over to the consumer."""
+
+    error: Exception
+
+    def reraise(self) -> NoReturn:
+        """Raise the error in the consumer's thread.
+
+        Raises
+        ------
+            RuntimeError: Always, chained to the original error.
+
+        """
+        logger.error("Failed to fetch issues from Jira")
+        msg = f"Failed to fetch issues from Jira: {self.error}"
+        raise RuntimeError(msg) from self.error
+
+
+class JiraSearchError(JIRAError):
+    """Error response from the Jira REST API."""
+
+    def __init__(
+        self,
+        text: str,
+        status_code: int,
+        url: str,
+        retry_after: float | None = None,
+    ) -> None:
+        """Initialize with the response details and Retry-After delay."""
+        super().__init__(text, status_code=status_code, url=url)
+        self.retry_after = retry_after
+
+
+class AsyncJiraSearchClient:
+    """Minimal asyncio client for the Jira search and changelog endpoints.
+
+    One ``aiohttp`` session with a keep-alive connection pool of
+    ``pool_size`` connections is shared by all requests. Responses are
+    requested gzip-compressed and search results are decoded
+    incrementally as the body arrives, or with the typed decoder of
+    :mod:`~metrics.repository.decoding` when it applies. Throttling responses (HTTP
+    429/503), connection errors and server errors are retried with
+    jittered exponential backoff, and a Retry-After delay pauses every
+    request on the client.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        server: str,
+        token: str,
+        pool_size: int | None = None,
+        *,
+        max_retries: int = FETCH_MAX_RETRIES,
+        base_delay: float = FETCH_BASE_DELAY,
+        max_delay: float = FETCH_MAX_DELAY,
+    ) -> None:
+        """Initialize the client.
+
+        Raises
+        ------
+            ImportError: If aiohttp is not installed.
+
+        """
+        if aiohttp is None:
+            msg = (
+                "aiohttp is required for the async backend."
+                " Install with 'pip install metrics[async]'."
+            )
+            raise ImportError(msg)
+        self.server = server.rstrip("/")
+        self.url = self.server + SEARCH_PATH
+        self.token = token
+        self.pool_size = pool_size or POOL_SIZE
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._session: aiohttp.ClientSession | None = None
+        self._paused_until = 0.0
+        self.use_bulk = True
+        self.use_paged = True
+
+    async def __aenter__(self) -> Self:
+        """Open the pooled HTTP session."""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip",
+            },
+        )
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Close the session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def search_total(self, jql: str) -> int:
+        """Return the number of issues matching ``jql``."""
+        header = await self._search({"jql": jql, "maxResults": 0}, [])
+        return header["total"]
+
+    async def search_page(
+        self,
+        jql: str,
+        start_at: int,
+        max_results: int,
+        fields: Sequence[str] | None = None,
+    ) -> list[dict]:
+        """Return one page of raw issues with their changelogs."""
+        items: list[dict] = []
+        params = {
+            "jql": jql,
+            "startAt": start_at,
+            "maxResults": max_results,
+            "fields": ",".join(fields) if fields else "*all",
+            "expand": "changelog",
+        }
+        logger.debug(
+            "Getting issues slices from %d to %d...",
+            start_at,
+            start_at + max_results,
+        )
+        await self._search(params, items, typed=can_decode(fields))
+        return items
+
+    async def complete_changelogs(self, page: list[dict]) -> list[dict]:
+        """Complete the truncated changelogs of a page of raw issues in place.
+
+        Mirrors :class:`~metrics.repository.changelog.ChangelogCompleter`:
+        the bulk changelog endpoint is tried first, then the per-issue
+        changelog endpoint and finally the issue endpoint, remembering
+        which ones the server lacks.
+        """
+        truncated = [item for item in page if is_truncated(item)]
+        if not truncated:
+            return page
+        logger.debug("Completing %d truncated changelogs...", len(truncated))
+        if self.use_bulk:
+            self.use_bulk = await _attempt(self._complete_bulk(truncated))
+            if self.use_bulk:
+                return page
+        if self.use_paged:
+            self.use_paged = await _attempt(self._complete_paged(truncated))
+            if self.use_paged:
+                return page
+        issues = await asyncio.gather(
+            *(
+                self._request_json(
+                    "GET",
+                    ISSUE_PATH.format(key=item["key"]),
+                    params={
+                        "fields": "created",
+                        "expand": "changelog",
+                    },
+                )
+                for item in truncated
+            ),
+        )
+        for item, issue in zip(truncated, issues, strict=True):
+            set_histories(item, issue["changelog"]["histories"])
+        return page
+
+    async def _complete_bulk(self, truncated: list[dict]) -> None:
+        by_id = {str(item.get("id", item["key"])): item for item in truncated}
+        keys = [item["key"] for item in truncated]
+        histories: dict[str, list[dict]] = {}
+        token = None
+        while True:
+            response = await self._request_json(
+                "POST",
+                BULK_CHANGELOG_PATH,
+                json=bulk_request_body(keys, token),
+            )
+            token = collect_bulk_response(response, histories)
+            if not token:
+                break
+        for issue_id, issue_histories in histories.items():
+            if issue_id in by_id:
+                set_histories(by_id[issue_id], issue_histories)
+
+    async def _complete_paged(self, truncated: list[dict]) -> None:
+        async def fetch_all(item: dict) -> list[dict]:
+            path = CHANGELOG_PATH.format(key=item["key"])
+            pages = await asyncio.gather(
+                *(
+                    self._request_json(
+                        "GET",
+                        path,
+                        params={"startAt": start_at, "maxResults": CHANGELOG_PAGE_SIZE},
+                    )
+                    for start_at in range(
+                        0,
+                        item["changelog"]["total"],
+                        CHANGELOG_PAGE_SIZE,
+                    )
+                ),
+            )
+            return [history for page in pages for history in page.get("values", [])]
+
+        results = await asyncio.gather(*(fetch_all(item) for item in truncated))
+        for item, histories in zip(truncated, results, strict=True):
+            set_histories(item, histories)
+
+    async def _search(
+        self,
+        params: dict[str, Any],
+        items: list[dict],
+        *,
+        typed: bool = False,
+    ) -> dict[str, Any]:
+        """Run a search request with retries, collecting issues into items.
+
+        Returns the other top-level values of the response.
+        """
+
+        def attempt() -> Awaitable[dict[str, Any]]:
+            items.clear()
+            return self._search_once(params, items, typed=typed)
+
+        return await self._retrying(attempt)
+
+    async def _request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json: dict[str, Any] | None = None,
+    ) -> dict:
+        """Send a request with retries and return its decoded JSON body."""
+
+        async def attempt() -> dict:
+            assert self._session is not None
+            async with self._session.request(
+                method,
+                self.server + path,
+                params=params,
+                json=json,
+            ) as resp:
+                await _raise_for_status(resp)
+                return await resp.json(content_type=None)
+
+        return await self._retrying(attempt)
+
+    async def _retrying(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Await ``attempt()`` until it succeeds or retries are exhausted."""
+        retries = 0
+        while True:
+            await self._wait_if_paused()
+            try:
+                return await attempt()
+            except (aiohttp.ClientError, TimeoutError, JiraSearchError) as err:
+                status = getattr(err, "status_code", None)
+                retry_after = getattr(err, "retry_after", None)
+                client_error = (
+                    status is not None
+                    and status not in THROTTLE_STATUSES
+                    and status < HTTPStatus.INTERNAL_SERVER_ERROR
+                )
+                if client_error or retries >= self.max_retries:
+                    raise
+                delay = backoff_delay(
+                    retries,
+                    retry_after,
+                    base_delay=self.base_delay,
+                    max_delay=self.max_delay,
+                )
+                if retry_after:
+                    self._paused_until = max(
+                        self._paused_until,
+                        time.monotonic() + retry_after,
+                    )
+                logger.warning(
+                    "Request failed (%s), retrying in %.1fs (attempt %d of %d)",
+                    err,
+                    delay,
+                    retries + 1,
+                    self.max_retries,
+                )
+                await asyncio.sleep(delay)
+                retries += 1
+
+    async def _search_once(
+        self,
+        params: dict[str, Any],
+        items: list[dict],
+        *,
+        typed: bool,
+    ) -> dict[str, Any]:
+        assert self._session is not None
+        async with self._session.get(self.url, params=params) as resp:
+            await _raise_for_status(resp)
+            if typed:
+                # Typed decoding of the whole body skips unused fields,
+                # which is cheaper than decoding every field as it arrives.
+                response = decode_search_response(await resp.read())
+                items.extend(response.pop("issues", []))
+                return response
+            stream = JSONArrayStream("issues")
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                items.extend(stream.feed(chunk))
+            stream.close()
+            return stream.header
+
+    async def _wait_if_paused(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncJiraAPIRepository(JiraAPIRepository):
+    """Jira API repository that fetches pages with an asyncio client.
+
+    The event loop runs in a background thread and hands finished pages
+    to the caller through a bounded queue, so it plugs into the same
+    streaming interface as :class:`JiraAPIRepository` and conversion
+    overlaps with network I/O.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        server: str,
+        token: str,
+        jql: str,
+        pool_size: int | None = None,
+        *,
+        cache: RawResponseCache | None = None,
+        fields: Sequence[str] | None = None,
+        per_page: int = 50,
+    ) -> None:
+        """Initialize with Jira credentials, JQL, pool size and cache."""
+        super().__init__(None, jql, cache=cache, fields=fields)
+        self.server = server
+        self.token = token
+        self.pool_size = pool_size or POOL_SIZE
+        self.per_page = per_page
+
+    def iter_pages(self, jql: str) -> Iterator[list[dict]]:
+        """Yield pages of raw issues fetched by the asyncio client.
+
+        Raises
+        ------
+            RuntimeError: If the Jira API call fails.
+
+        """
+        pages: queue.Queue[Any] = queue.Queue(maxsize=self.pool_size)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._run,
+            args=(jql, pages, stop),
+            name="jira-async-fetch",
+            daemon=True,
+        )
+        thread.start()
+        try:
+            while (item := pages.get()) is not _DONE:
+                if isinstance(item, _Failure):
+                    item.reraise()
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def _run(self, jql: str, pages: queue.Queue[Any], stop: threading.Event) -> None:
+        try:
+            asyncio.run(self._produce(jql, pages, stop))
+        except Exception as err:  # noqa: BLE001
+            _put(pages, _Failure(err), stop)
+        else:
+            _put(pages, _DONE, stop)
+
+    async def _produce(
+        self,
+        jql: str,
+        pages: queue.Queue[Any],
+        stop: threading.Event,
+    ) -> None:
+        async with AsyncJiraSearchClient(
+            self.server,
+            self.token,
+            self.pool_size,
+        ) as client:
+            total = await client.search_total(jql)
+            logger.debug("Total %d issues...", total)
+            pending: deque[asyncio.Task[list[dict]]] = deque()
+            try:
+                for offset in range(0, max(total, 1), self.per_page):
+                    pending.append(
+                        asyncio.create_task(self._fetch_page(client, jql, offset)),
+                    )
+                    if len(pending) >= self.pool_size * 2:
+                        page = await pending.popleft()
+                        if not await asyncio.to_thread(_put, pages, page, stop):
+                            return
+                while pending:
+                    page = await pending.popleft()
+                    if not await asyncio.to_thread(_put, pages, page, stop):
+                        return
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    async def _fetch_page(
+        self,
+        client: AsyncJiraSearchClient,
+        jql: str,
+        offset: int,
+    ) -> list[dict]:
+        page = await client.search_page(jql, offset, self.per_page, self.fields)
+        return await client.complete_changelogs(page)
+
+
+async def _raise_for_status(resp: aiohttp.ClientResponse) -> None:
+    """Raise a JiraSearchError for an HTTP error response."""
+    if resp.status >= HTTPStatus.BAD_REQUEST:
+        raise JiraSearchError(
+            await resp.text(),
+            status_code=resp.status,
+            url=str(resp.url),
+            retry_after=parse_retry_after(resp.headers.get("Retry-After")),
+        )
+
+
+async def _attempt(completion: Awaitable[None]) -> bool:
+    """Await a changelog completion; False if its endpoint is unavailable."""
+    try:
+        await completion
+    except JiraSearchError as err:
+        if err.status_code not in UNSUPPORTED_STATUSES:
+            raise
+        logger.debug("Changelog endpoint unavailable: %s", err.url)
+        return False
+    return True
+
+
+def _put(pages: queue.Queue[Any], item: object, stop: threading.Event) -> bool:
+    """Put an item on the queue unless the consumer went away."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+        except queue.Full:
+            continue
+        return True
+    return False
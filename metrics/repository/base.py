@@ -2,20 +2,67 @@
 
 from __future__ import annotations
 
+from collections import Counter
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import TYPE_CHECKING
 
+from metrics.entity.periods import whole_seconds
+
+from .index import IssueIndex
+
 if TYPE_CHECKING:
-    from metrics.entity import Issue
+    from collections.abc import Iterable, Iterator, Mapping
+    from datetime import datetime
+
+    from metrics.entity import Issue, Transition
+
+
+@dataclass(frozen=True)
+class IssueChanges:
+    """Issues a refresh added, changed or removed, relative to the last one.
+
+    ``since`` is when the snapshot the changes were made to was synced.
+    """
+
+    updated: tuple[Issue, ...] = ()
+    removed: tuple[str, ...] = ()
+    since: datetime | None = None
 
 
 class BaseIssuesRepository:
-    """In-memory repository that fetches and caches issues."""
+    """In-memory repository that fetches and caches issues.
 
-    issues: dict[str, Issue]
+    Issues are fetched once on construction and kept as a read-only
+    snapshot, so one repository instance can be shared by every
+    calculator in a run. Call :meth:`refresh` to replace the snapshot
+    with fresh data in long-running processes. Each snapshot comes with
+    an :class:`~metrics.repository.index.IssueIndex` behind the query
+    methods, such as :meth:`finished_between`.
+    """
+
+    issues: Mapping[str, Issue]
+    index: IssueIndex
+    # Whether the storage answers finished_per_week() and
+    # status_period_counts() itself, without building any issue.
+    pushdown: bool = False
+    # When the snapshot was synced, for repositories that sync.
+    synced_at: datetime | None = None
+    # What the last refresh changed, for repositories that know it; None
+    # when the snapshot was replaced wholesale.
+    changes: IssueChanges | None = None
 
     def __init__(self) -> None:
         """Fetch all issues and index them by key."""
-        self.issues = {issue.key: issue for issue in self.get_issues()}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-fetch all issues and atomically swap in the new snapshot."""
+        issues = MappingProxyType(
+            {issue.key: issue for issue in self.get_issues()},
+        )
+        index = IssueIndex(issues.values())
+        self.issues, self.index = issues, index
 
     def get(self, key: str) -> Issue | None:
         """Return an issue by key, or None if not found."""
@@ -25,16 +72,149 @@ class BaseIssuesRepository:
         """Return all cached issues."""
         return list(self.issues.values())
 
+    def iter_issues(self) -> Iterator[Issue]:
+        """Iterate over all issues, in order, without building a list."""
+        return iter(self.issues.values())
+
+    def created_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues created from ``start`` up to, not including, ``end``."""
+        return self.index.created_between(start, end)
+
+    def finished_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues finished from ``start`` up to, not including, ``end``."""
+        return self.index.finished_between(start, end)
+
+    def in_status(self, status: str) -> list[Issue]:
+        """Return issues currently in ``status``."""
+        return self.index.in_status(status)
+
+    def assigned_to(self, assignee: str) -> list[Issue]:
+        """Return issues that were assigned to ``assignee`` at any time."""
+        return self.index.assigned_to(assignee)
+
+    def finished_per_week(self) -> dict[str, int]:
+        """Count finished issues per completion week, such as ``"2024W05"``."""
+        return {week: len(issues) for week, issues in self.index.by_week.items()}
+
+    def status_period_counts(self) -> list[tuple[str | None, int, int]]:
+        """Count the issues' status periods per status and whole seconds.
+
+        Returns ``(status, seconds, count)`` for every distinct time
+        spent in a status, in the order the first period of each appears.
+        """
+        counts = Counter(
+            (status, whole_seconds(period))
+            for issue in self.iter_issues()
+            for status, period in (issue.statuses_x_periods or {}).items()
+        )
+        return [(status, seconds, count) for (status, seconds), count in counts.items()]
+
+    def transitions_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        field: str | None = None,
+    ) -> Iterator[tuple[Issue, Transition]]:
+        """Yield the changes made from ``start`` up to, not including, ``end``.
+
+        Reads the issues' transition logs, so no data is refetched.
+        Changes are yielded issue by issue, each issue's in time order.
+
+        Args:
+        ----
+            start: The start of the range; unbounded when None.
+            end: The end of the range; unbounded when None.
+            field: Only yield changes of this field, e.g. "status".
+
+        Yields:
+        ------
+            Pairs of an issue and one of its transitions.
+
+        """
+        for issue in self.issues.values():
+            if issue.transitions is None:
+                continue
+            for transition in issue.transitions.between(start, end, field):
+                yield issue, transition
+
     def convert_data_to_issue(self, data_item: dict) -> Issue:
         """Convert a raw data dict into an Issue entity."""
         raise NotImplementedError
 
-    def get_raw_data(self) -> list[dict]:
-        """Fetch raw issue data from the underlying source."""
+    def get_raw_data(self) -> Iterable[dict]:
+        """Fetch raw issue data from the underlying source.
+
+        Implementations may return a lazy iterable; items are converted
+        as they arrive and dropped right after conversion.
+        """
         raise NotImplementedError
 
+    def convert_all(self, raw_data: Iterable[dict]) -> Iterable[Issue]:
+        """Convert raw data items to Issues lazily, in order."""
+        return map(self.convert_data_to_issue, raw_data)
+
     def get_issues(self) -> list[Issue]:
         """Fetch raw data and convert each item to an Issue."""
-        return [
-            self.convert_data_to_issue(data_item) for data_item in self.get_raw_data()
-        ]
+        return list(self.convert_all(self.get_raw_data()))
+
+
+class LazyIssuesRepository(BaseIssuesRepository):
+    """Repository that loads its snapshot only when issues are needed.
+
+    Subclasses answer what they can straight from their storage and
+    override the query methods accordingly; the full snapshot and its
+    index are built the first time :attr:`issues` or :attr:`index` is
+    read, and dropped again by :meth:`refresh`. Until then,
+    :meth:`iter_issues` streams the issues from the storage instead.
+    """
+
+    _loaded: tuple[Mapping[str, Issue], IssueIndex] | None = None
+
+    def refresh(self) -> None:
+        """Drop the loaded snapshot, so the next read sees the storage again."""
+        self._loaded = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the snapshot's issues are loaded into memory."""
+        return self._loaded is not None
+
+    def iter_issues(self) -> Iterator[Issue]:
+        """Iterate over all issues, streamed unless the snapshot is loaded."""
+        if self._loaded is not None:
+            return iter(self._loaded[0].values())
+        return self.stream_issues()
+
+    def stream_issues(self) -> Iterator[Issue]:
+        """Build the issues one after another, without keeping them.
+
+        Subclasses that can read their storage in parts override this;
+        by default, the issues are fetched in full and not kept.
+        """
+        return iter(self.get_issues())
+
+    @property
+    def issues(self) -> Mapping[str, Issue]:  # type: ignore[override]
+        """The snapshot's issues by key, loaded on first use."""
+        return self._load()[0]
+
+    @property
+    def index(self) -> IssueIndex:  # type: ignore[override]
+        """The snapshot's index, built on first use."""
+        return self._load()[1]
+
+    def _load(self) -> tuple[Mapping[str, Issue], IssueIndex]:
+        if self._loaded is None:
+            issues = MappingProxyType(
+                {issue.key: issue for issue in self.get_issues()},
+            )
+            self._loaded = (issues, IssueIndex(issues.values()))
+        return self._loaded
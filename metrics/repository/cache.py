@@ -0,0 +1,212 @@
+"""On-disk cache of raw Jira search responses."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from metrics.consts import ONE_DAY
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+
+
+class RawResponseCache:
+    """Content-addressed cache of raw search result pages.
+
+    Every page is stored as gzip-compressed JSON Lines, one issue per
+    line, under a name derived from the server, the JQL, the requested
+    field projection and the page number. A small manifest per query
+    records when the fetch started and finished and how many pages it
+    had; it is removed before the first page of a fetch is written and
+    only written again once every page is on disk, so an interrupted
+    fetch, even one over an earlier copy, is never replayed.
+
+    Only complete results of the base JQL are cached. The incremental
+    ``updated >= ...`` restriction of a sync changes on every run, so
+    syncs replay the base query's pages instead when they are at least
+    as recent as the issue store.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        server: str,
+        ttl: float = ONE_DAY,
+        *,
+        offline: bool = False,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+        ----
+            directory: Directory holding the cached pages.
+            server: Jira server URL, part of every cache key.
+            ttl: Seconds a cached query stays fresh.
+            offline: Replay cached responses only, regardless of age.
+
+        """
+        self.directory = Path(directory)
+        self.server = server
+        self.ttl = ttl
+        self.offline = offline
+
+    def _digest(self, *parts: object) -> str:
+        joined = "\n".join(str(part) for part in (self.server, *parts))
+        return hashlib.sha256(joined.encode()).hexdigest()
+
+    @staticmethod
+    def _projection(fields: Sequence[str] | None) -> str:
+        return ",".join(sorted(fields)) if fields else "*all"
+
+    def manifest_path(self, jql: str, fields: Sequence[str] | None = None) -> Path:
+        """Return the path of the manifest for a JQL query."""
+        digest = self._digest(jql, self._projection(fields))
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def page_path(
+        self,
+        jql: str,
+        page: int,
+        fields: Sequence[str] | None = None,
+    ) -> Path:
+        """Return the path of one cached result page."""
+        digest = self._digest(jql, self._projection(fields), page)
+        return self.directory / digest[:2] / f"{digest}.jsonl.gz"
+
+    def _load_manifest(
+        self,
+        jql: str,
+        fields: Sequence[str] | None = None,
+    ) -> dict | None:
+        try:
+            with self.manifest_path(jql, fields).open() as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def started_at(
+        self,
+        jql: str,
+        fields: Sequence[str] | None = None,
+    ) -> float | None:
+        """Return when the cached copy of a query started being fetched.
+
+        Returns
+        -------
+            A POSIX timestamp, or None if no complete, unexpired copy of
+            the query is cached. Offline caches never expire.
+
+        """
+        manifest = self._load_manifest(jql, fields)
+        if manifest is None:
+            return None
+        if not self.offline and time.time() - manifest["fetched_at"] >= self.ttl:
+            return None
+        return manifest["started_at"]
+
+    def is_fresh(self, jql: str, fields: Sequence[str] | None = None) -> bool:
+        """Check whether a complete, unexpired copy of a query is cached."""
+        return self.started_at(jql, fields) is not None
+
+    def read(
+        self,
+        jql: str,
+        fields: Sequence[str] | None = None,
+    ) -> Iterator[dict]:
+        """Stream the cached issues of a query, one decoded issue at a time.
+
+        Raises
+        ------
+            RuntimeError: If the query is not cached.
+
+        """
+        manifest = self._load_manifest(jql, fields)
+        if manifest is None:
+            msg = f"No cached Jira response for JQL: {jql}"
+            raise RuntimeError(msg)
+        logger.debug("Replaying %d cached pages...", manifest["pages"])
+        for page in range(manifest["pages"]):
+            with gzip.open(self.page_path(jql, page, fields), "rt") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def write(
+        self,
+        jql: str,
+        pages: Iterable[list[dict]],
+        fields: Sequence[str] | None = None,
+    ) -> Iterator[list[dict]]:
+        """Cache pages as they pass through, yielding each one unchanged.
+
+        The previous manifest is removed before the first page replaces
+        one of its pages, and the new one is only written once the
+        iterable is exhausted.
+        """
+        started_at = time.time()
+        self.manifest_path(jql, fields).unlink(missing_ok=True)
+        count = 0
+        for page in pages:
+            self._atomic_write(
+                self.page_path(jql, count, fields),
+                b"".join(json.dumps(item).encode() + b"\n" for item in page),
+                compress=True,
+            )
+            count += 1
+            yield page
+        manifest = {
+            "version": CACHE_FORMAT_VERSION,
+            "server": self.server,
+            "jql": jql,
+            "fields": self._projection(fields),
+            "pages": count,
+            "started_at": started_at,
+            "fetched_at": time.time(),
+        }
+        self._atomic_write(
+            self.manifest_path(jql, fields),
+            json.dumps(manifest).encode(),
+        )
+
+    def _atomic_write(self, path: Path, data: bytes, *, compress: bool = False) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data) if compress else data)
+            Path(tmp_name).replace(path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def open_response_cache(
+    directory: str | None,
+    server: str,
+    ttl: float | None = None,
+    *,
+    offline: bool = False,
+) -> RawResponseCache | None:
+    """Return a RawResponseCache for ``directory``, or None if disabled."""
+    if not directory:
+        return None
+    return RawResponseCache(
+        directory,
+        server,
+        ONE_DAY if ttl is None else ttl,
+        offline=offline,
+    )
@@ -0,0 +1,223 @@
+"""Completion of changelogs truncated by the Jira search endpoint."""
+
+from __future__ import annotations
+
+import logging
+from datetime import UTC, datetime
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+
+from jira.exceptions import JIRAError
+
+from .scheduler import FetchScheduler
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from jira import JIRA
+
+logger = logging.getLogger(__name__)
+
+# Search results embed at most this many histories per issue, and the
+# changelog endpoints return at most this many per request.
+CHANGELOG_PAGE_SIZE = 100
+BULK_BATCH_SIZE = 1000
+
+# Only these changelog fields are read by the converter.
+CHANGELOG_FIELDS = ("status", "assignee")
+
+BULK_BASE_URL = "{server}/rest/api/3/{path}"
+
+UNSUPPORTED_STATUSES: frozenset[int] = frozenset(
+    {HTTPStatus.NOT_FOUND, HTTPStatus.METHOD_NOT_ALLOWED},
+)
+
+
+def is_truncated(data_item: dict) -> bool:
+    """Check whether a raw issue's embedded changelog is incomplete."""
+    changelog = data_item.get("changelog") or {}
+    return changelog.get("total", 0) > len(changelog.get("histories", []))
+
+
+def set_histories(data_item: dict, histories: list[dict]) -> None:
+    """Replace a raw issue's changelog with a complete list of histories."""
+    data_item["changelog"] = {
+        "startAt": 0,
+        "maxResults": len(histories),
+        "total": len(histories),
+        "histories": histories,
+    }
+
+
+def _normalize_history(history: dict) -> dict:
+    """Convert bulk-endpoint epoch-millisecond timestamps to Jira's format."""
+    created = history.get("created")
+    if isinstance(created, int | float):
+        ts = datetime.fromtimestamp(created / 1000, tz=UTC)
+        history["created"] = ts.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "+0000"
+    return history
+
+
+def bulk_request_body(keys: list[str], next_page_token: str | None = None) -> dict:
+    """Build a request body for the bulk changelog endpoint."""
+    body: dict[str, Any] = {
+        "issueIdsOrKeys": keys,
+        "fieldIds": list(CHANGELOG_FIELDS),
+        "maxResults": BULK_BATCH_SIZE,
+    }
+    if next_page_token:
+        body["nextPageToken"] = next_page_token
+    return body
+
+
+def collect_bulk_response(
+    response: dict,
+    histories: dict[str, list[dict]],
+) -> str | None:
+    """Add histories from a bulk changelog response, keyed by issue id.
+
+    Returns
+    -------
+        The token of the next response page, or None on the last page.
+
+    """
+    for changelog in response.get("issueChangeLogs", []):
+        histories.setdefault(str(changelog["issueId"]), []).extend(
+            _normalize_history(history)
+            for history in changelog.get("changeHistories", [])
+        )
+    return response.get("nextPageToken")
+
+
+class ChangelogCompleter:
+    """Re-fetches complete changelogs for issues truncated in search results.
+
+    The bulk changelog endpoint of Jira Cloud is tried first, fetching
+    every truncated issue of a page in a single paginated request. When
+    the server does not offer it, the per-issue changelog endpoint is
+    paged concurrently under the fetch scheduler, and when that is
+    missing too (Jira Server/Data Center) the issue endpoint is asked
+    for its full changelog.
+    """
+
+    def __init__(
+        self,
+        jira: JIRA,
+        scheduler: FetchScheduler | None = None,
+        *,
+        use_bulk: bool = True,
+    ) -> None:
+        """Initialize with a JIRA client and the scheduler for page fetches."""
+        self.jira = jira
+        self.scheduler = scheduler or FetchScheduler()
+        self.use_bulk = use_bulk
+        self.use_paged = True
+
+    def complete(self, page: list[dict]) -> list[dict]:
+        """Complete the truncated changelogs of a page of raw issues in place.
+
+        Returns
+        -------
+            The same page, for use with ``map``.
+
+        Raises
+        ------
+            RuntimeError: If the Jira API call fails.
+
+        """
+        truncated = [item for item in page if is_truncated(item)]
+        if not truncated:
+            return page
+        logger.debug("Completing %d truncated changelogs...", len(truncated))
+        try:
+            self._complete(truncated)
+        except Exception as err:
+            logger.exception("Failed to fetch changelogs from Jira")
+            msg = f"Failed to fetch changelogs from Jira: {err}"
+            raise RuntimeError(msg) from err
+        return page
+
+    def _complete(self, truncated: list[dict]) -> None:
+        if self.use_bulk:
+            self.use_bulk = self._attempt(self._complete_bulk, truncated)
+            if self.use_bulk:
+                return
+        if self.use_paged:
+            self.use_paged = self._attempt(self._complete_paged, truncated)
+            if self.use_paged:
+                return
+        self._complete_by_issue(truncated)
+
+    @staticmethod
+    def _attempt(strategy: Callable[[list[dict]], None], truncated: list[dict]) -> bool:
+        """Run a completion strategy; False if its endpoint is unavailable."""
+        try:
+            strategy(truncated)
+        except JIRAError as err:
+            if err.status_code not in UNSUPPORTED_STATUSES:
+                raise
+            logger.debug("Changelog endpoint unavailable: %s", err.url)
+            return False
+        return True
+
+    def _complete_bulk(self, truncated: list[dict]) -> None:
+        by_id = {str(item.get("id", item["key"])): item for item in truncated}
+        for start in range(0, len(truncated), BULK_BATCH_SIZE):
+            keys = [item["key"] for item in truncated[start : start + BULK_BATCH_SIZE]]
+            histories: dict[str, list[dict]] = {}
+            token = None
+            while True:
+                response = self.scheduler.call(
+                    self.jira._get_json,  # noqa: SLF001
+                    "changelog/bulkfetch",
+                    bulk_request_body(keys, token),
+                    BULK_BASE_URL,
+                    True,  # noqa: FBT003
+                )
+                token = collect_bulk_response(response, histories)
+                if not token:
+                    break
+            for issue_id, issue_histories in histories.items():
+                if issue_id in by_id:
+                    set_histories(by_id[issue_id], issue_histories)
+
+    def _complete_paged(self, truncated: list[dict]) -> None:
+        # Every page of every issue goes into one flat batch, so the
+        # scheduler bounds the total number of requests in flight.
+        requests = [
+            (item["key"], start_at)
+            for item in truncated
+            for start_at in range(0, item["changelog"]["total"], CHANGELOG_PAGE_SIZE)
+        ]
+        histories: dict[str, list[dict]] = {item["key"]: [] for item in truncated}
+        keys, offsets = zip(*requests, strict=True)
+        for key, values in zip(
+            keys,
+            self.scheduler.map(self._fetch_changelog_page, keys, offsets),
+            strict=True,
+        ):
+            histories[key].extend(values)
+        for item in truncated:
+            set_histories(item, histories[item["key"]])
+
+    def _complete_by_issue(self, truncated: list[dict]) -> None:
+        keys = [item["key"] for item in truncated]
+        for item, issue in zip(
+            truncated,
+            self.scheduler.map(self._fetch_issue, keys),
+            strict=True,
+        ):
+            set_histories(item, issue["changelog"]["histories"])
+
+    def _fetch_changelog_page(self, key: str, start_at: int) -> list[dict]:
+        response = self.jira._get_json(  # noqa: SLF001
+            f"issue/{key}/changelog",
+            {"startAt": start_at, "maxResults": CHANGELOG_PAGE_SIZE},
+        )
+        return response.get("values", [])
+
+    def _fetch_issue(self, key: str) -> dict:
+        return self.jira._get_json(  # noqa: SLF001
+            f"issue/{key}",
+            {"fields": "created", "expand": "changelog"},
+        )
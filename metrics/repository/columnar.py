@@ -0,0 +1,134 @@
+"""Repository over columnar issue tables converted from Jira."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from .base import LazyIssuesRepository
+from .index import WEEK_FORMAT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from datetime import datetime
+
+    from metrics.entity import Issue, IssueTables
+
+    from .converter import JiraDataConverter
+    from .jira import JiraAPIRepository
+
+
+class ColumnarIssuesRepository(LazyIssuesRepository):
+    """Repository that keeps the issues fetched from Jira as tables.
+
+    Raw issues are converted straight to
+    :class:`~metrics.entity.IssueTables`, kept in :attr:`tables`, and
+    nothing else is kept. Lookups by key, time ranges and the
+    aggregations used by calculators run on the tables, and Issues are
+    built from their rows when asked for, streamed rather than kept
+    unless all of them are listed.
+    """
+
+    pushdown = True
+    tables: IssueTables
+
+    def __init__(
+        self,
+        api_repo: JiraAPIRepository,
+        converter: JiraDataConverter,
+    ) -> None:
+        """Initialize with an API repository and data converter."""
+        self.api_repo = api_repo
+        self.converter = converter
+        super().__init__()
+
+    def refresh(self) -> None:
+        """Re-fetch the issues and convert them to new tables."""
+        self.tables = self.converter.convert_to_tables(self.api_repo.get_raw_data())
+        super().refresh()
+
+    def get_issues(self) -> list[Issue]:
+        """Build every issue from the tables."""
+        return self.tables.to_issues()
+
+    def stream_issues(self) -> Iterator[Issue]:
+        """Build the issues from the tables, a chunk of rows at a time."""
+        return self.tables.iter_issues()
+
+    def get(self, key: str) -> Issue | None:
+        """Return an issue by key, or None if not found."""
+        if self._loaded is not None:
+            return super().get(key)
+        return self.tables.issue(key)
+
+    def created_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues created from ``start`` up to, not including, ``end``."""
+        return self._between("created_at", start, end)
+
+    def finished_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues finished from ``start`` up to, not including, ``end``."""
+        return self._between("last_finish_status_at", start, end)
+
+    def finished_per_week(self) -> dict[str, int]:
+        """Count finished issues per completion week, from the issue table.
+
+        Weeks are taken in the time zone each completion time was
+        recorded in, as they are for Issues.
+        """
+        finished = self.tables.local_times("last_finish_status_at").dropna()
+        days = finished.dt.normalize().value_counts(sort=False)
+        weeks: defaultdict[str, int] = defaultdict(int)
+        for day, count in days.items():
+            weeks[day.strftime(WEEK_FORMAT)] += int(count)
+        return dict(weeks)
+
+    def status_period_counts(self) -> list[tuple[str | None, int, int]]:
+        """Count status periods per status and whole seconds, from the transitions.
+
+        Returns ``(status, seconds, count)`` rows, in the order the
+        first period of each appears.
+        """
+        transitions = self.tables.status_transitions()
+        per_issue = (
+            transitions["duration"]
+            .groupby(
+                [transitions["key"].cat.codes, transitions["from_value"]],
+                sort=False,
+                dropna=False,
+                observed=True,
+            )
+            .sum()
+        )
+        periods = pd.DataFrame(
+            {
+                "status": per_issue.index.get_level_values(1).astype(object),
+                "seconds": (per_issue // pd.Timedelta(seconds=1)).to_numpy(),
+            },
+        )
+        counts = periods.groupby(
+            ["status", "seconds"],
+            sort=False,
+            dropna=False,
+        ).size()
+        return [
+            (None if pd.isna(status) else status, int(seconds), int(count))
+            for (status, seconds), count in counts.items()
+        ]
+
+    def _between(
+        self,
+        column: str,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[Issue]:
+        return self.tables.issues_at(self.tables.positions_between(column, start, end))
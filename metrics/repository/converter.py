@@ -4,20 +4,30 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any
-
-from dateutil.parser import parse
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, ClassVar
 
 from metrics.consts import DONE_STATUSES
-from metrics.entity import Issue
+from metrics.entity import Issue, IssueTableBuilder, TransitionLog
+
+from .timestamps import parse_timestamp
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from metrics.entity import IssueTables
 
 
 class JiraDataConverter:
     """Converts raw Jira API dicts into Issue entities."""
 
+    # Issue fields read from search results; the changelog is expanded
+    # separately and is not part of the field projection.
+    required_fields: ClassVar[frozenset[str]] = frozenset({"created", "status"})
+
     def convert_data_to_issue(self, data_item: dict) -> Issue:
         """Convert a raw Jira data dict into an Issue entity."""
-        issue_created_at = parse(data_item["fields"]["created"])
+        issue_created_at = parse_timestamp(data_item["fields"]["created"])
         changelog = data_item["changelog"]
         changelog_data = self._parse_changelog_item(
             issue_created_at,
@@ -32,8 +42,38 @@ class JiraDataConverter:
             first_status_change_at=changelog_data["first_status_changed_at"],
             last_finish_status_at=changelog_data["last_finish_status_at"],
             status_history=changelog_data["status_history"],
+            transitions=TransitionLog(
+                (at, field, from_value, to_value)
+                for field, from_value, to_value, at, _ in changelog_data["transitions"]
+            ),
         )
 
+    def convert_to_tables(self, raw_data: Iterable[dict]) -> IssueTables:
+        """Convert raw Jira data dicts into columnar issue tables.
+
+        The tables hold the same data as the Issues built by
+        :meth:`convert_data_to_issue`, which
+        :meth:`~metrics.entity.IssueTables.to_issues` rebuilds.
+        """
+        builder = IssueTableBuilder()
+        for data_item in raw_data:
+            key = data_item["key"]
+            issue_created_at = parse_timestamp(data_item["fields"]["created"])
+            changelog_data = self._parse_changelog_item(
+                issue_created_at,
+                data_item["changelog"],
+            )
+            builder.add_issue(
+                key,
+                data_item["fields"]["status"]["name"],
+                issue_created_at,
+                changelog_data["first_status_changed_at"],
+                changelog_data["last_finish_status_at"],
+            )
+            for transition in changelog_data["transitions"]:
+                builder.add_transition(key, *transition)
+        return builder.build()
+
     def _parse_changelog_item(
         self,
         issue_created_at: datetime,
@@ -48,12 +88,19 @@ class JiraDataConverter:
             "first_assignee_changed_at": None,
             "last_assignee_changed_at": issue_created_at,
             "last_finish_status_at": None,
+            # (field, from, to, timestamp, duration) rows, in time order.
+            "transitions": [],
         }
-        for history_item in sorted(
-            changelog["histories"],
-            key=lambda x: x["created"],
-        ):
-            history_ts = parse(history_item["created"])
+        # Parse every timestamp once and order by time rather than by the
+        # raw string, which misorders entries with different offsets.
+        histories = sorted(
+            (
+                (parse_timestamp(history_item["created"]), history_item)
+                for history_item in changelog["histories"]
+            ),
+            key=itemgetter(0),
+        )
+        for history_ts, history_item in histories:
             for item in history_item["items"]:
                 if item["field"] == "assignee":
                     self._parse_assignee_changes(
@@ -75,8 +122,16 @@ class JiraDataConverter:
         history_ts: datetime,
         data: dict[str, Any],
     ) -> None:
-        data["doers_x_periods"][item["fromString"]] += (
-            history_ts - data["last_assignee_changed_at"]
+        duration = history_ts - data["last_assignee_changed_at"]
+        data["doers_x_periods"][item["fromString"]] += duration
+        data["transitions"].append(
+            (
+                "assignee",
+                item["fromString"],
+                item["toString"],
+                history_ts,
+                duration,
+            ),
         )
         data["last_assignee_changed_at"] = history_ts
         if data["first_assignee_changed_at"] is None:
@@ -94,8 +149,10 @@ class JiraDataConverter:
         data: dict[str, Any],
     ) -> None:
         data["status_history"].append(item["toString"])
-        data["statuses_x_periods"][item["fromString"]] += (
-            history_ts - data["last_status_changed_at"]
+        duration = history_ts - data["last_status_changed_at"]
+        data["statuses_x_periods"][item["fromString"]] += duration
+        data["transitions"].append(
+            ("status", item["fromString"], item["toString"], history_ts, duration),
         )
         data["last_status_changed_at"] = history_ts
         if data["first_status_changed_at"] is None:
@@ -0,0 +1,160 @@
+"""Typed decoding of Jira search responses.
+
+With the optional ``msgspec`` package installed, search response bodies
+are decoded straight from bytes against the typed shape below, which
+covers only what the converter and the changelog completion read.
+Every other field, such as history authors, avatar URLs, rendered
+fields and unused changelog item attributes, is skipped by the decoder
+instead of being built into Python objects. The result has the same
+dict shape as a generic JSON decode of the same body, minus the
+skipped keys.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from jira import JIRA
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Issue fields kept by the typed shape; see JiraDataConverter.required_fields.
+DECODED_FIELDS = frozenset({"created", "status"})
+
+
+class RawStatus(TypedDict):
+    """The status field of a raw issue."""
+
+    name: str
+
+
+class RawFields(TypedDict):
+    """The issue fields the converter reads."""
+
+    created: str
+    status: RawStatus
+
+
+class RawChangeItem(TypedDict):
+    """One field change of a changelog history."""
+
+    field: str
+    fromString: NotRequired[str | None]
+    toString: NotRequired[str | None]
+
+
+class RawHistory(TypedDict):
+    """One changelog history: the changes made at one point in time."""
+
+    created: str
+    items: list[RawChangeItem]
+
+
+class RawChangelog(TypedDict, total=False):
+    """The changelog embedded in a raw issue."""
+
+    startAt: int
+    maxResults: int
+    total: int
+    histories: list[RawHistory]
+
+
+class RawIssue(TypedDict):
+    """A raw issue of a search response."""
+
+    id: NotRequired[str]
+    key: str
+    fields: RawFields
+    changelog: NotRequired[RawChangelog]
+
+
+class SearchResponse(TypedDict, total=False):
+    """A page of the offset or token-paginated search endpoints."""
+
+    startAt: int
+    maxResults: int
+    total: int
+    isLast: bool
+    nextPageToken: str | None
+    issues: list[RawIssue]
+
+
+_decoder = msgspec.json.Decoder(SearchResponse) if msgspec else None
+
+
+def can_decode(fields: Sequence[str] | None) -> bool:
+    """Check whether search results with ``fields`` can be decoded typed.
+
+    The typed shape drops every field outside :data:`DECODED_FIELDS`, so
+    it is only used when msgspec is installed and no other field was
+    requested.
+    """
+    return _decoder is not None and fields is not None and set(fields) <= DECODED_FIELDS
+
+
+def decode_search_response(body: bytes) -> dict[str, Any]:
+    """Decode a search response body, typed when msgspec is installed.
+
+    Args:
+    ----
+        body: The raw response body.
+
+    Returns:
+    -------
+        The decoded response.
+
+    Raises:
+    ------
+        ValueError: If the body is not a valid search response.
+
+    """
+    if _decoder is None:
+        return json.loads(body)
+    try:
+        return _decoder.decode(body)
+    except msgspec.DecodeError as err:
+        logger.exception("Failed to decode Jira search response")
+        msg = f"Unexpected Jira search response: {err}"
+        raise ValueError(msg) from err
+
+
+def get_search_json(
+    j: JIRA,
+    path: str,
+    params: dict[str, Any],
+    base: str,
+    fields: Sequence[str] | None = None,
+) -> dict[str, Any]:
+    """Fetch a search response, decoding it typed when ``fields`` allow.
+
+    Mirrors ``JIRA._get_json`` for GET requests, but decodes the body
+    bytes with :func:`decode_search_response` instead of building the
+    full JSON document.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        path: The REST path, relative to ``base``.
+        params: The query parameters.
+        base: The base URL template, as for ``JIRA._get_json``.
+        fields: The requested issue fields.
+
+    Returns:
+    -------
+        The decoded response.
+
+    """
+    if not can_decode(fields):
+        return j._get_json(path, params, base)  # noqa: SLF001
+    response = j._session.get(j._get_url(path, base), params=params)  # noqa: SLF001
+    return decode_search_response(response.content)
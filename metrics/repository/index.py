@@ -0,0 +1,122 @@
+"""Secondary indexes over a snapshot of issues."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from metrics.entity.transitions import to_epoch_ms
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+    from datetime import datetime
+
+    from metrics.entity import Issue
+
+# strftime format of completion weeks, as used by the throughput metric.
+WEEK_FORMAT = "%YW%V"
+
+
+class _SortedTimes:
+    """Issues sorted by one timestamp, searchable by time range."""
+
+    def __init__(self, issues: list[Issue], times: list[datetime]) -> None:
+        epoch_ms = np.fromiter(
+            map(to_epoch_ms, times), dtype=np.int64, count=len(times)
+        )
+        order = np.argsort(epoch_ms, kind="stable")
+        self.times = epoch_ms[order]
+        self.issues = [issues[i] for i in order]
+
+    def between(self, start: datetime | None, end: datetime | None) -> list[Issue]:
+        lo = 0 if start is None else np.searchsorted(self.times, to_epoch_ms(start))
+        hi = (
+            len(self.times)
+            if end is None
+            else np.searchsorted(self.times, to_epoch_ms(end))
+        )
+        return self.issues[lo:hi]
+
+
+class IssueIndex:
+    """Secondary indexes of issues, built once per snapshot.
+
+    Issues are grouped by current status, completion week and every
+    assignee they had, and sorted by creation and completion time, so
+    slicing a snapshot costs O(log n + k) for k results instead of a
+    scan of all n issues.
+    """
+
+    def __init__(self, issues: Iterable[Issue]) -> None:
+        """Build the indexes of ``issues``."""
+        by_status: defaultdict[str, list[Issue]] = defaultdict(list)
+        by_week: defaultdict[str, list[Issue]] = defaultdict(list)
+        by_assignee: defaultdict[str, list[Issue]] = defaultdict(list)
+        all_issues = []
+        finished = []
+        for issue in issues:
+            all_issues.append(issue)
+            by_status[issue.status].append(issue)
+            if issue.last_finish_status_at is not None:
+                finished.append(issue)
+                by_week[issue.last_finish_status_at.strftime(WEEK_FORMAT)].append(
+                    issue,
+                )
+            for assignee in _assignees(issue):
+                by_assignee[assignee].append(issue)
+        self.by_status: Mapping[str, list[Issue]] = MappingProxyType(dict(by_status))
+        self.by_week: Mapping[str, list[Issue]] = MappingProxyType(dict(by_week))
+        self.by_assignee: Mapping[str, list[Issue]] = MappingProxyType(
+            dict(by_assignee),
+        )
+        self._created = _SortedTimes(
+            all_issues,
+            [issue.created_at for issue in all_issues],
+        )
+        self._finished = _SortedTimes(
+            finished,
+            [issue.last_finish_status_at for issue in finished],
+        )
+
+    def created_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues created from ``start`` up to, not including, ``end``."""
+        return self._created.between(start, end)
+
+    def finished_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues finished from ``start`` up to, not including, ``end``."""
+        return self._finished.between(start, end)
+
+    def finished_in_week(self, week: str) -> list[Issue]:
+        """Return issues finished in an ISO week such as ``"2024W05"``."""
+        return list(self.by_week.get(week, ()))
+
+    def in_status(self, status: str) -> list[Issue]:
+        """Return issues currently in ``status``."""
+        return list(self.by_status.get(status, ()))
+
+    def assigned_to(self, assignee: str) -> list[Issue]:
+        """Return issues that were assigned to ``assignee`` at any time."""
+        return list(self.by_assignee.get(assignee, ()))
+
+
+def _assignees(issue: Issue) -> set[str]:
+    """Return everyone an issue was assigned to, according to its changelog."""
+    assignees = {name for name in issue.doers_x_periods or () if name is not None}
+    if issue.transitions is not None:
+        assignees.update(
+            transition.to_value
+            for transition in issue.transitions.between(field="assignee")
+            if transition.to_value is not None
+        )
+    return assignees
@@ -2,49 +2,238 @@
 
 from __future__ import annotations
 
+import logging
+import math
+from datetime import UTC, datetime
+from itertools import chain
 from typing import TYPE_CHECKING
 
-from .base import BaseIssuesRepository
-from .utils import get_issues
+from metrics.consts import SHARD_SIZE, SYNC_OVERLAP
+
+from .base import BaseIssuesRepository, IssueChanges
+from .changelog import ChangelogCompleter
+from .jql import and_clause
+from .pagination import dedupe_pages, iter_cursor_pages, prefetch
+from .parallel import convert_issues
+from .sharding import iter_sharded_pages
+from .utils import iter_issue_pages
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
     from jira import JIRA
 
     from metrics.entity import Issue
 
+    from .cache import RawResponseCache
     from .converter import JiraDataConverter
+    from .scheduler import FetchScheduler
+    from .store import IssueStore
+
+logger = logging.getLogger(__name__)
 
 
 class JiraAPIRepository:
     """Thin wrapper around the Jira API for fetching raw issue data."""
 
-    def __init__(self, jira: JIRA, jql: str) -> None:
-        """Initialize with a JIRA client and JQL query."""
+    def __init__(  # noqa: PLR0913
+        self,
+        jira: JIRA | None,
+        jql: str,
+        scheduler: FetchScheduler | None = None,
+        cache: RawResponseCache | None = None,
+        fields: Sequence[str] | None = None,
+        *,
+        pagination: str = "offset",
+        shard_size: int | None = None,
+    ) -> None:
+        """Initialize with a JIRA client, JQL query, scheduler and cache.
+
+        The client may be None when the cache runs in offline mode.
+        ``fields`` projects search results onto just the issue fields
+        the converter and calculators read; all fields are fetched when
+        it is omitted. ``pagination`` is one of
+        :data:`~metrics.repository.pagination.PAGINATION_MODES`;
+        ``shard_size`` caps the issues per shard in ``"sharded"`` mode,
+        and in ``"auto"`` mode when the server lacks token pagination.
+        """
         self.jira = jira
         self.jql = jql
+        self.scheduler = scheduler
+        self.cache = cache
+        self.fields = fields
+        self.pagination = pagination
+        self.shard_size = shard_size or SHARD_SIZE
+
+    def get_raw_data(self, updated_since: datetime | None = None) -> Iterator[dict]:
+        """Stream raw issue dicts from the Jira API as pages arrive.
+
+        Pages are fetched in the background under the scheduler's
+        in-flight limit while the caller consumes earlier ones, so only
+        a bounded number of raw pages is held in memory at a time.
+
+        The response cache is keyed on the base JQL. A fresh cached copy
+        is replayed in full, also for an incremental fetch if it was
+        fetched after ``updated_since``; only full fetches are cached.
 
-    def get_raw_data(self) -> list[dict]:
-        """Fetch raw issue dicts from the Jira API."""
-        return get_issues(self.jira, self.jql)
+        Args:
+        ----
+            updated_since: Only fetch issues updated at or after this
+                time. The whole JQL result is fetched when omitted.
+
+        Raises:
+        ------
+            RuntimeError: If the cache is offline and holds no copy of
+                the query.
+
+        """
+        started_at = (
+            None if self.cache is None else self.cache.started_at(self.jql, self.fields)
+        )
+        if started_at is not None:
+            if updated_since is None or started_at >= updated_since.timestamp():
+                yield from self.cache.read(self.jql, self.fields)
+                return
+            if self.cache.offline:
+                logger.debug("Cached response is older than the issue store")
+                return
+        if self.cache is not None and self.cache.offline:
+            msg = f"Offline mode: no cached Jira response for JQL: {self.jql}"
+            raise RuntimeError(msg)
+        if updated_since is None:
+            pages = dedupe_pages(self.iter_pages(self.jql))
+            if self.cache is not None:
+                pages = self.cache.write(self.jql, pages, self.fields)
+        else:
+            # A relative offset avoids depending on the Jira user's timezone.
+            age = datetime.now(UTC) - updated_since + SYNC_OVERLAP
+            minutes = math.ceil(age.total_seconds() / 60)
+            jql = and_clause(self.jql, f'updated >= "-{minutes}m"')
+            pages = dedupe_pages(self.iter_pages(jql))
+        yield from chain.from_iterable(pages)
+
+    def iter_pages(self, jql: str) -> Iterator[list[dict]]:
+        """Yield pages of raw issues matching ``jql`` from the Jira API.
+
+        Search results embed at most 100 changelog histories per issue;
+        longer changelogs are completed before a page is yielded. Cursor
+        pagination is sequential, so the next page is prefetched while
+        the caller consumes the current one.
+        """
+        completer = ChangelogCompleter(self.jira, self.scheduler)
+        if self.pagination == "offset":
+            pages = iter_issue_pages(
+                self.jira,
+                jql,
+                self.scheduler,
+                fields=self.fields,
+            )
+            return map(completer.complete, pages)
+        if self.pagination == "sharded":
+            pages = iter_sharded_pages(
+                self.jira,
+                jql,
+                self.scheduler,
+                fields=self.fields,
+                shard_size=self.shard_size,
+            )
+            return map(completer.complete, pages)
+        pages = iter_cursor_pages(
+            self.jira,
+            jql,
+            self.scheduler,
+            fields=self.fields,
+            mode=self.pagination,
+            shard_size=self.shard_size,
+        )
+        return prefetch(map(completer.complete, pages))
 
 
 class JiraIssuesRepository(BaseIssuesRepository):
-    """Repository that fetches issues from Jira and converts them."""
+    """Repository that fetches issues from Jira and converts them.
+
+    With an :class:`~metrics.repository.store.IssueStore`, only issues
+    updated since the previous sync are fetched and merged into the
+    stored snapshot. Issues deleted in Jira or no longer matching the
+    JQL stay in the store until a full sync rebuilds it. With more than
+    one worker, large inputs are converted in a process pool. After an
+    incremental refresh, :attr:`changes` lists the issues it fetched;
+    after a full sync over a stored snapshot, the issues that differ
+    and the keys no longer there.
+    """
 
     def __init__(
         self,
         api_repo: JiraAPIRepository,
         converter: JiraDataConverter,
+        store: IssueStore | None = None,
+        *,
+        full_sync: bool = False,
+        workers: int | None = None,
     ) -> None:
-        """Initialize with an API repository and data converter."""
+        """Initialize with an API repository, data converter and store."""
         self.api_repo = api_repo
         self.converter = converter
+        self.store = store
+        self.full_sync = full_sync
+        self.workers = workers
         super().__init__()
 
-    def get_raw_data(self) -> list[dict]:
+    def get_raw_data(self, updated_since: datetime | None = None) -> Iterator[dict]:
         """Delegate raw data fetching to the API repository."""
-        return self.api_repo.get_raw_data()
+        return self.api_repo.get_raw_data(updated_since=updated_since)
 
     def convert_data_to_issue(self, data_item: dict) -> Issue:
         """Convert a raw Jira dict to an Issue via the converter."""
         return self.converter.convert_data_to_issue(data_item)
+
+    def convert_all(self, raw_data: Iterable[dict]) -> Iterable[Issue]:
+        """Convert raw data items, in worker processes if configured."""
+        if self.workers and self.workers > 1:
+            return convert_issues(self.converter, raw_data, self.workers)
+        return super().convert_all(raw_data)
+
+    def get_issues(self) -> list[Issue]:
+        """Fetch issues, syncing incrementally when a store is configured."""
+        if self.store is None:
+            return super().get_issues()
+        jql = self.api_repo.jql
+        sync_started_at = datetime.now(UTC)
+        snapshot = self.store.load(jql)
+        self.changes = None
+        if snapshot is None or self.full_sync:
+            logger.debug("No usable issue store, running a full sync...")
+            issues = {issue.key: issue for issue in super().get_issues()}
+            if snapshot is not None:
+                self.changes = _diff(snapshot.issues, issues, snapshot.synced_at)
+        else:
+            logger.debug(
+                "Syncing issues updated since %s...",
+                snapshot.synced_at.isoformat(),
+            )
+            issues = snapshot.issues
+            raw_data = self.get_raw_data(updated_since=snapshot.synced_at)
+            updated = tuple(self.convert_all(raw_data))
+            for issue in updated:
+                issues[issue.key] = issue
+            self.changes = IssueChanges(updated=updated, since=snapshot.synced_at)
+        self.store.save(jql, issues, sync_started_at)
+        self.synced_at = sync_started_at
+        # Later refreshes only need the delta since this sync.
+        self.full_sync = False
+        return list(issues.values())
+
+
+def _diff(
+    previous: Mapping[str, Issue],
+    issues: Mapping[str, Issue],
+    since: datetime,
+) -> IssueChanges:
+    """Return what changed from the ``previous`` snapshot to ``issues``."""
+    return IssueChanges(
+        updated=tuple(
+            issue for key, issue in issues.items() if previous.get(key) != issue
+        ),
+        removed=tuple(key for key in previous if key not in issues),
+        since=since,
+    )
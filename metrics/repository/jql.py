@@ -0,0 +1,66 @@
+"""Helpers for composing JQL queries."""
+
+from __future__ import annotations
+
+import re
+
+_ORDER_BY_RE = re.compile(r"\s+order\s+by\s+(?P<order>.+?)\s*$", re.IGNORECASE)
+
+
+def split_order_by(jql: str) -> tuple[str, str | None]:
+    """Split a JQL query into its filter and ORDER BY clause.
+
+    Args:
+    ----
+        jql: The JQL query, optionally ending with ``ORDER BY ...``.
+
+    Returns:
+    -------
+        A ``(filter, order_by)`` tuple, where ``order_by`` is the text
+        after ``ORDER BY`` or None if the query has no ordering.
+
+    """
+    jql = jql.strip()
+    if jql.lower().startswith("order by "):
+        return "", jql[len("order by ") :].strip()
+    match = _ORDER_BY_RE.search(jql)
+    if match is None:
+        return jql, None
+    return jql[: match.start()].strip(), match.group("order")
+
+
+def and_clause(jql: str, clause: str, order_by: str | None = None) -> str:
+    """Restrict a JQL query with an extra clause, keeping its ordering.
+
+    Args:
+    ----
+        jql: The user's JQL query.
+        clause: The JQL condition to AND with the query's filter.
+        order_by: Ordering to use instead of the query's own, if given.
+
+    Returns:
+    -------
+        The combined JQL query.
+
+    """
+    jql_filter, jql_order = split_order_by(jql)
+    combined = f"({jql_filter}) AND {clause}" if jql_filter else clause
+    order_by = order_by or jql_order
+    return f"{combined} ORDER BY {order_by}" if order_by else combined
+
+
+def with_order_by(jql: str, order_by: str) -> str:
+    """Replace the ordering of a JQL query.
+
+    Args:
+    ----
+        jql: The user's JQL query.
+        order_by: The ordering to use, such as ``"created ASC"``.
+
+    Returns:
+    -------
+        The query's filter ordered by ``order_by``.
+
+    """
+    jql_filter, _ = split_order_by(jql)
+    return f"{jql_filter} ORDER BY {order_by}" if jql_filter else f"ORDER BY {order_by}"
@@ -0,0 +1,177 @@
+"""Incremental decoding of JSON search responses."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# A string, complete or cut off by the end of the buffer, or a bracket.
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*("|\\?\Z)|[{}\[\]]', re.DOTALL)
+
+
+class JSONArrayStream:
+    """Decodes the items of one top-level array while the body arrives.
+
+    Jira search responses are objects such as ``{"total": 10, ...,
+    "issues": [{...}, {...}]}``. Feeding the body chunk by chunk yields
+    every element of the ``key`` array as soon as it is complete, so a
+    large page never has to be held as a single string. Other top-level
+    values are collected into :attr:`header`.
+
+    Objects, arrays and strings are only decoded once they are complete.
+    Their brackets are counted as chunks arrive, resuming where the last
+    chunk ran out, so a value spanning many chunks is scanned once.
+    """
+
+    def __init__(self, key: str = "issues") -> None:
+        """Initialize a stream extracting the items of array ``key``."""
+        self.key = key
+        self.header: dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._current_key: str | None = None
+        self._scan_start = -1
+        self._scan_pos = 0
+        self._depth = 0
+
+    def feed(self, data: bytes) -> list[Any]:
+        """Consume a chunk of the body and return the items it completed."""
+        self._buf += self._utf8.decode(data)
+        items: list[Any] = []
+        while self._step(items):
+            pass
+        if self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos :]
+            self._scan_start -= self._pos
+            self._scan_pos -= self._pos
+            self._pos = 0
+        return items
+
+    def close(self) -> None:
+        """Check that the whole body was consumed.
+
+        Raises
+        ------
+            ValueError: If the body ended in the middle of the document.
+
+        """
+        self._buf += self._utf8.decode(b"", final=True)
+        if self._state != "done":
+            msg = "Truncated JSON response"
+            raise ValueError(msg)
+
+    def _skip(self) -> str | None:
+        """Skip whitespace and return the next character, if buffered."""
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        return self._buf[self._pos] if self._pos < len(self._buf) else None
+
+    def _value_end(self) -> int | None:
+        """Return where the container or string at the cursor ends, if buffered."""
+        if self._scan_start != self._pos:
+            self._scan_start = self._scan_pos = self._pos
+            self._depth = 0
+        for match in _TOKEN.finditer(self._buf, self._scan_pos):
+            quote = match.group(1)
+            if quote is None:
+                self._depth += 1 if match.group() in "{[" else -1
+            elif not quote.endswith('"'):
+                # A string cut off by the end of the buffer: rescan it later.
+                self._scan_pos = match.start()
+                return None
+            if self._depth == 0:
+                return match.end()
+        self._scan_pos = len(self._buf)
+        return None
+
+    def _decode(self, *, need_terminator: bool) -> tuple[bool, Any]:
+        """Decode the value at the cursor if it is fully buffered.
+
+        A scalar at the end of the buffer might be cut short (``12`` of
+        ``1234``), so it is only accepted once a following character is
+        visible when ``need_terminator`` is set.
+        """
+        if self._buf[self._pos] in '{["':
+            if self._value_end() is None:
+                return False, None
+            value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+            return True, value
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        next_token = _WHITESPACE.match(self._buf, end).end()
+        if need_terminator and next_token >= len(self._buf):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _step(self, items: list[Any]) -> bool:  # noqa: C901, PLR0911, PLR0912
+        """Advance the state machine by one token; False when data runs out."""
+        char = self._skip()
+        if char is None or self._state == "done":
+            return False
+        if self._state == "start":
+            if char != "{":
+                msg = "Expected a JSON object"
+                raise ValueError(msg)
+            self._pos += 1
+            self._state = "key"
+        elif self._state == "key":
+            if char == "}":
+                self._pos += 1
+                self._state = "done"
+                return False
+            if char == ",":
+                self._pos += 1
+                return True
+            complete, key = self._decode(need_terminator=False)
+            if not complete:
+                return False
+            self._current_key = key
+            self._state = "colon"
+        elif self._state == "colon":
+            if char != ":":
+                msg = f"Expected ':' after key {self._current_key!r}"
+                raise ValueError(msg)
+            self._pos += 1
+            self._state = "value"
+        elif self._state == "value":
+            if self._current_key == self.key and char == "[":
+                self._pos += 1
+                self._state = "items"
+                return True
+            complete, value = self._decode(need_terminator=True)
+            if not complete:
+                return False
+            self.header[self._current_key] = value
+            self._state = "key"
+        elif self._state == "items":
+            if char == "]":
+                self._pos += 1
+                self._state = "key"
+                return True
+            if char == ",":
+                self._pos += 1
+                return True
+            complete, item = self._decode(need_terminator=True)
+            if not complete:
+                return False
+            items.append(item)
+        return True
+
+
+def decode_array_items(chunks: Iterable[bytes], key: str = "issues") -> list[Any]:
+    """Decode the items of array ``key`` from a sequence of body chunks."""
+    stream = JSONArrayStream(key)
+    items = [item for chunk in chunks for item in stream.feed(chunk)]
+    stream.close()
+    return items
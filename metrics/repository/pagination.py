@@ -0,0 +1,251 @@
+"""Cursor-based pagination of Jira search results."""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from typing import TYPE_CHECKING, TypeVar
+
+from jira.exceptions import JIRAError
+
+from metrics.consts import SHARD_SIZE
+
+from .changelog import UNSUPPORTED_STATUSES
+from .decoding import get_search_json
+from .jql import split_order_by
+from .scheduler import FetchScheduler
+from .sharding import iter_sharded_pages
+from .utils import get_issues_slice, get_issues_total
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from jira import JIRA
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# "offset" is the classic startAt paging and "sharded" pages by offset
+# within created-date shards; the others follow a cursor.
+PAGINATION_MODES: tuple[str, ...] = ("auto", "token", "keyset", "offset", "sharded")
+
+SEARCH_JQL_BASE_URL = "{server}/rest/api/3/{path}"
+
+_END = object()
+
+
+def keyset_jql(jql: str, after: int | None = None) -> str:
+    """Order a JQL query by issue id and restrict it to ids after ``after``.
+
+    The query's own ORDER BY clause is replaced, since keyset paging
+    needs a stable, unique sort order. Issue ids are numbered across the
+    whole instance, unlike keys: ``key > "A-9"`` only matches issues in
+    project A, so paging by key would lose issues of queries spanning
+    several projects.
+    """
+    jql_filter, _ = split_order_by(jql)
+    clauses = [f"({jql_filter})"] if jql_filter else []
+    if after is not None:
+        clauses.append(f"id > {after}")
+    where = " AND ".join(clauses)
+    return f"{where} ORDER BY id ASC" if where else "ORDER BY id ASC"
+
+
+def dedupe_pages(pages: Iterable[list[dict]]) -> Iterator[list[dict]]:
+    """Drop issues already seen on an earlier page, keyed by issue key.
+
+    Issues created or reordered while a query is paged can shift onto
+    the next page and show up twice.
+    """
+    seen: set[str] = set()
+    for page in pages:
+        fresh = []
+        for item in page:
+            if item["key"] not in seen:
+                seen.add(item["key"])
+                fresh.append(item)
+        if fresh:
+            yield fresh
+
+
+def prefetch(iterable: Iterable[T], depth: int = 1) -> Iterator[T]:
+    """Produce up to ``depth`` items ahead in a background thread.
+
+    Cursor pagination is sequential, so this lets the next page be
+    fetched while the caller converts the current one.
+    """
+    iterator = iter(iterable)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending: deque[Future[object]] = deque(
+            pool.submit(next, iterator, _END) for _ in range(depth)
+        )
+        try:
+            while (item := pending.popleft().result()) is not _END:
+                pending.append(pool.submit(next, iterator, _END))
+                yield item
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def get_issues_by_token(
+    j: JIRA,
+    jql: str,
+    next_page_token: str | None = None,
+    limit: int = 50,
+    fields: Sequence[str] | None = None,
+) -> tuple[list[dict], str | None]:
+    """Get one page of issues from the token-paginated search endpoint.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        jql: The JQL query to filter the issues.
+        next_page_token: The token returned with the previous page.
+        limit: The maximum number of issues to retrieve.
+        fields: The issue fields to return. All fields when omitted.
+
+    Returns:
+    -------
+        The page of raw issues and the token of the next page, or None
+        on the last page.
+
+    """
+    params = {
+        "jql": jql,
+        "maxResults": limit,
+        "fields": ",".join(fields) if fields else "*all",
+        "expand": "changelog",
+    }
+    if next_page_token:
+        params["nextPageToken"] = next_page_token
+    response = get_search_json(j, "search/jql", params, SEARCH_JQL_BASE_URL, fields)
+    token = None if response.get("isLast") else response.get("nextPageToken")
+    return response.get("issues", []), token
+
+
+def _token_pages(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler,
+    per_page: int,
+    fields: Sequence[str] | None,
+) -> Iterator[list[dict]]:
+    token = None
+    while True:
+        page, token = scheduler.call(
+            get_issues_by_token,
+            j,
+            jql,
+            token,
+            per_page,
+            fields,
+        )
+        if page:
+            yield page
+        if not token or not page:
+            return
+
+
+def _keyset_pages(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler,
+    per_page: int,
+    fields: Sequence[str] | None,
+) -> Iterator[list[dict]]:
+    last_id = None
+    while True:
+        page = scheduler.call(
+            get_issues_slice,
+            j,
+            keyset_jql(jql, last_id),
+            0,
+            per_page,
+            fields,
+        )
+        if page:
+            yield page
+        if len(page) < per_page:
+            return
+        last_id = int(page[-1]["id"])
+
+
+def iter_cursor_pages(  # noqa: PLR0913
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler | None = None,
+    per_page: int = 50,
+    fields: Sequence[str] | None = None,
+    *,
+    mode: str = "auto",
+    shard_size: int = SHARD_SIZE,
+) -> Iterator[list[dict]]:
+    """Yield pages of raw issues, following a cursor instead of offsets.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        jql: The JQL query to filter the issues.
+        scheduler: Scheduler retrying page fetches. A default one is
+            created when omitted.
+        per_page: The number of issues requested per page.
+        fields: The issue fields to return. All fields when omitted.
+        mode: ``"token"`` follows the ``nextPageToken`` of the newer
+            search endpoint (Jira Cloud), ``"keyset"`` pages with
+            ``id > last ORDER BY id`` and ``"auto"`` uses tokens when
+            the server supports them. Otherwise, ``"auto"`` pages by
+            keyset, or fetches created-date shards in parallel if the
+            query matches more than ``shard_size`` issues.
+        shard_size: The largest number of issues paged by keyset in
+            ``"auto"`` mode, and the size of its shards.
+
+    Yields:
+    ------
+        Lists of dictionaries representing the retrieved issues.
+
+    Raises:
+    ------
+        RuntimeError: If the Jira API call fails.
+
+    """
+    scheduler = scheduler or FetchScheduler()
+    try:
+        if mode == "keyset":
+            yield from _keyset_pages(j, jql, scheduler, per_page, fields)
+            return
+        pages = _token_pages(j, jql, scheduler, per_page, fields)
+        if mode == "auto":
+            try:
+                first = next(pages, None)
+            except JIRAError as err:
+                if err.status_code not in UNSUPPORTED_STATUSES:
+                    raise
+                total = scheduler.call(get_issues_total, j, jql)
+                if total > shard_size:
+                    pages = None
+                else:
+                    logger.debug("Token pagination unavailable, using keysets")
+                    pages = _keyset_pages(j, jql, scheduler, per_page, fields)
+            else:
+                pages = chain([first] if first else [], pages)
+        if pages is not None:
+            yield from pages
+            return
+    except Exception as err:
+        logger.exception("Failed to fetch issues from Jira")
+        msg = f"Failed to fetch issues from Jira: {err}"
+        raise RuntimeError(msg) from err
+    logger.debug("Token pagination unavailable, sharding %d issues", total)
+    yield from iter_sharded_pages(
+        j,
+        jql,
+        scheduler,
+        per_page,
+        fields,
+        shard_size=shard_size,
+        total=total,
+    )
@@ -0,0 +1,141 @@
+"""Parallel conversion of raw Jira issues in worker processes."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from typing import TYPE_CHECKING, NamedTuple, NoReturn
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from metrics.entity import Issue
+
+    from .converter import JiraDataConverter
+
+logger = logging.getLogger(__name__)
+
+# Raw issues sent to a worker per task; large enough to amortize pickling.
+CONVERT_CHUNK_SIZE = 256
+
+# Below this many raw issues, starting a pool costs more than it saves.
+PARALLEL_THRESHOLD = 2000
+
+# Fetch threads and HTTP pools are running while issues are converted, so
+# forked workers could inherit a lock held by one of them. Workers are
+# started from a clean server process instead (or spawned on Windows).
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class ConversionFailure(NamedTuple):
+    """A conversion error, returned by workers in place of the issue."""
+
+    key: str
+    error: str
+
+    def reraise(self) -> NoReturn:
+        """Raise the failure in the parent process.
+
+        Raises
+        ------
+            RuntimeError: Always, naming the issue that failed.
+
+        """
+        logger.error("Failed to convert issue %s", self.key)
+        msg = f"Failed to convert issue {self.key}: {self.error}"
+        raise RuntimeError(msg)
+
+
+def convert_chunk(
+    converter: JiraDataConverter,
+    chunk: list[dict],
+) -> list[Issue | ConversionFailure]:
+    """Convert a chunk of raw issues, capturing failures per issue key."""
+    results: list[Issue | ConversionFailure] = []
+    for data_item in chunk:
+        try:
+            results.append(converter.convert_data_to_issue(data_item))
+        except Exception as err:  # noqa: BLE001
+            key = data_item.get("key", "<unknown>")
+            results.append(ConversionFailure(key, f"{type(err).__name__}: {err}"))
+    return results
+
+
+def _chunks(items: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def _unwrap(results: Iterable[Issue | ConversionFailure]) -> Iterator[Issue]:
+    for result in results:
+        if isinstance(result, ConversionFailure):
+            result.reraise()
+        yield result
+
+
+def convert_issues(
+    converter: JiraDataConverter,
+    raw_data: Iterable[dict],
+    workers: int | None = None,
+    *,
+    chunk_size: int = CONVERT_CHUNK_SIZE,
+    threshold: int = PARALLEL_THRESHOLD,
+) -> Iterator[Issue]:
+    """Convert raw issues, across a process pool when it pays off.
+
+    Raw issues are sent to the workers in chunks, at most two chunks per
+    worker at a time, so a streamed input is never held in full. Inputs
+    shorter than ``threshold`` are converted in-process.
+
+    Args:
+    ----
+        converter: A picklable converter.
+        raw_data: The raw issue dicts, possibly a lazy iterable.
+        workers: Number of worker processes; in-process when below 2.
+        chunk_size: Number of raw issues per worker task.
+        threshold: Minimum input size for using the pool.
+
+    Yields:
+    ------
+        The converted issues, in input order.
+
+    Raises:
+    ------
+        RuntimeError: If an issue fails to convert, naming its key.
+
+    """
+    items = iter(raw_data)
+    head = list(islice(items, threshold)) if workers and workers > 1 else []
+    if len(head) < threshold:
+        for data_item in chain(head, items):
+            try:
+                issue = converter.convert_data_to_issue(data_item)
+            except Exception as err:
+                key = data_item.get("key", "<unknown>")
+                logger.exception("Failed to convert issue %s", key)
+                msg = f"Failed to convert issue {key}: {err}"
+                raise RuntimeError(msg) from err
+            yield issue
+        return
+    logger.debug("Converting issues in %d worker processes...", workers)
+    window = workers * 2
+    pending: deque[Future[list[Issue | ConversionFailure]]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(START_METHOD),
+    ) as pool:
+        try:
+            for chunk in _chunks(chain(head, items), chunk_size):
+                pending.append(pool.submit(convert_chunk, converter, chunk))
+                if len(pending) >= window:
+                    yield from _unwrap(pending.popleft().result())
+            while pending:
+                yield from _unwrap(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
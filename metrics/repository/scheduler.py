@@ -0,0 +1,289 @@
+"""Bounded, adaptive scheduling of concurrent Jira page fetches."""
+
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from jira.exceptions import JIRAError
+
+from metrics.consts import (
+    FETCH_BASE_DELAY,
+    FETCH_MAX_DELAY,
+    FETCH_MAX_RETRIES,
+    FETCH_MAX_RETRY_AFTER,
+    FETCH_TARGET_LATENCY,
+    MAX_IN_FLIGHT,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+THROTTLE_STATUSES: frozenset[int] = frozenset(
+    {HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE},
+)
+
+
+def _find_jira_error(err: BaseException | None) -> JIRAError | None:
+    """Return the JIRAError in an exception chain, if there is one."""
+    while err is not None:
+        if isinstance(err, JIRAError):
+            return err
+        err = err.__cause__
+    return None
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+    ----
+        value: The raw header value.
+
+    Returns:
+    -------
+        The number of seconds to wait, at most ``FETCH_MAX_RETRY_AFTER``,
+        or None if the header is missing or malformed.
+
+    """
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        delay = retry_at.timestamp() - time.time()
+    if math.isnan(delay):
+        return None
+    return min(max(0.0, delay), FETCH_MAX_RETRY_AFTER)
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: float | None,
+    *,
+    base_delay: float = FETCH_BASE_DELAY,
+    max_delay: float = FETCH_MAX_DELAY,
+) -> float:
+    """Return a full-jitter exponential backoff delay, at least ``retry_after``."""
+    ceiling = min(max_delay, base_delay * 2**attempt)
+    delay = random.uniform(0, ceiling)  # noqa: S311
+    return max(delay, retry_after or 0.0)
+
+
+def classify_error(err: BaseException) -> tuple[bool, bool, float | None]:
+    """Classify a failed fetch for the retry logic.
+
+    Args:
+    ----
+        err: The exception raised by the fetch function.
+
+    Returns:
+    -------
+        A ``(retryable, throttled, retry_after)`` tuple. Throttling
+        responses (HTTP 429/503) are retryable and may carry a
+        Retry-After delay. Other client errors are not retried.
+
+    """
+    jira_error = _find_jira_error(err)
+    if jira_error is None or jira_error.status_code is None:
+        return True, False, None
+    status = jira_error.status_code
+    if status in THROTTLE_STATUSES:
+        headers = getattr(jira_error.response, "headers", None) or {}
+        return True, True, parse_retry_after(headers.get("Retry-After"))
+    if HTTPStatus.BAD_REQUEST <= status < HTTPStatus.INTERNAL_SERVER_ERROR:
+        return False, False, None
+    return True, False, None
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by response latency and throttling.
+
+    Every fast response grows the limit by roughly one request per full
+    window of completions (additive increase). A throttling response or
+    a response slower than ``target_latency`` shrinks it by
+    ``backoff_ratio`` (multiplicative decrease), at most once per window
+    so a burst of failures from one window is counted only once. A
+    Retry-After delay pauses all new requests until it has elapsed.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        initial_limit: int | None = None,
+        target_latency: float = FETCH_TARGET_LATENCY,
+        backoff_ratio: float = 0.5,
+    ) -> None:
+        """Initialize the limiter with an upper bound on concurrency."""
+        if max_limit < 1:
+            msg = f"max_limit must be at least 1, got {max_limit}"
+            raise ValueError(msg)
+        self.max_limit = max_limit
+        self.limit = float(min(initial_limit or max_limit, max_limit))
+        self.target_latency = target_latency
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._paused_until = 0.0
+        self._started = 0
+        self._decrease_barrier = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> int:
+        """Block until a request may start and return its sequence number."""
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            self._started += 1
+            return self._started
+
+    def release(
+        self,
+        ticket: int,
+        latency: float,
+        *,
+        throttled: bool = False,
+        retry_after: float | None = None,
+    ) -> None:
+        """Record the outcome of a request and adjust the limit."""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled or latency > self.target_latency:
+                self._decrease(ticket)
+            else:
+                self.limit = min(
+                    float(self.max_limit),
+                    self.limit + 1 / self.limit,
+                )
+            if retry_after:
+                self._paused_until = max(
+                    self._paused_until,
+                    time.monotonic() + retry_after,
+                )
+            self._cond.notify_all()
+
+    def _decrease(self, ticket: int) -> None:
+        if ticket <= self._decrease_barrier:
+            return
+        self.limit = max(1.0, self.limit * self.backoff_ratio)
+        self._decrease_barrier = self._started
+        logger.debug("Reduced fetch concurrency to %d", int(self.limit))
+
+
+class FetchScheduler:
+    """Runs fetch calls concurrently under an adaptive in-flight limit.
+
+    Calls are retried with jittered exponential backoff, honoring the
+    server's Retry-After header on HTTP 429/503 responses.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        max_retries: int = FETCH_MAX_RETRIES,
+        base_delay: float = FETCH_BASE_DELAY,
+        max_delay: float = FETCH_MAX_DELAY,
+        target_latency: float = FETCH_TARGET_LATENCY,
+    ) -> None:
+        """Initialize the scheduler with concurrency and retry settings."""
+        self.max_in_flight = max_in_flight or MAX_IN_FLIGHT
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = AdaptiveLimiter(
+            self.max_in_flight,
+            initial_limit=max(1, self.max_in_flight // 2),
+            target_latency=target_latency,
+        )
+
+    def call(self, fn: Callable[..., T], *args: Any) -> T:  # noqa: ANN401
+        """Call ``fn`` under the concurrency limit, retrying on failure.
+
+        Raises
+        ------
+            Exception: The last error once retries are exhausted, or the
+                first error that is not worth retrying.
+
+        """
+        attempt = 0
+        while True:
+            ticket = self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                result = fn(*args)
+            except Exception as err:
+                retryable, throttled, retry_after = classify_error(err)
+                self.limiter.release(
+                    ticket,
+                    time.monotonic() - started,
+                    throttled=throttled,
+                    retry_after=retry_after,
+                )
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(
+                    "Fetch failed (%s), retrying in %.1fs (attempt %d of %d)",
+                    err,
+                    delay,
+                    attempt + 1,
+                    self.max_retries,
+                )
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self.limiter.release(ticket, time.monotonic() - started)
+                return result
+
+    def map(
+        self,
+        fn: Callable[..., T],
+        *iterables: Iterable[Any],
+    ) -> Iterator[T]:
+        """Apply ``fn`` to each set of arguments, yielding results in order.
+
+        Unlike ``Executor.map``, calls are submitted lazily: at most
+        twice ``max_in_flight`` results are pending at any time, so a slow
+        consumer bounds memory instead of buffering the whole result.
+        """
+        window = self.max_in_flight * 2
+        pending: deque[Future[T]] = deque()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            try:
+                for args in zip(*iterables, strict=False):
+                    pending.append(pool.submit(self.call, fn, *args))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _backoff(self, attempt: int, retry_after: float | None) -> float:
+        """Return a full-jitter backoff delay, at least ``retry_after``."""
+        return backoff_delay(
+            attempt,
+            retry_after,
+            base_delay=self.base_delay,
+            max_delay=self.max_delay,
+        )
@@ -0,0 +1,227 @@
+"""Splitting large JQL queries into created-date shards."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta
+from itertools import repeat
+from typing import TYPE_CHECKING
+
+from metrics.consts import SHARD_SIZE
+
+from .jql import and_clause, with_order_by
+from .scheduler import FetchScheduler
+from .timestamps import parse_timestamp
+from .utils import get_issues_slice, get_issues_total
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from jira import JIRA
+
+logger = logging.getLogger(__name__)
+
+# JQL dates have minute resolution, so narrower shards cannot be expressed.
+MIN_SHARD_SPAN = timedelta(minutes=1)
+
+JQL_DATE_FORMAT = "%Y/%m/%d %H:%M"
+
+
+@dataclass(frozen=True)
+class Shard:
+    """A created-date window of a JQL query and its number of issues.
+
+    A bound of None leaves that side of the window open, so the first
+    and last shards also catch issues outside the planned range, such
+    as issues created while the shards are fetched.
+    """
+
+    start: datetime | None
+    end: datetime | None
+    total: int
+
+    def jql(self, jql: str) -> str:
+        """Restrict ``jql`` to the issues created within this shard."""
+        clauses = []
+        if self.start is not None:
+            clauses.append(f'created >= "{self.start:{JQL_DATE_FORMAT}}"')
+        if self.end is not None:
+            clauses.append(f'created < "{self.end:{JQL_DATE_FORMAT}}"')
+        return and_clause(jql, " AND ".join(clauses)) if clauses else jql
+
+
+def _floor_minute(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def _split(start: datetime, end: datetime) -> datetime | None:
+    """Return the minute closest to the middle of a window, if any."""
+    middle = _floor_minute(start + (end - start) / 2)
+    return middle if start < middle < end else None
+
+
+def _earliest_created(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler,
+) -> datetime | None:
+    page = scheduler.call(
+        get_issues_slice,
+        j,
+        with_order_by(jql, "created ASC"),
+        0,
+        1,
+        ["created"],
+    )
+    if not page:
+        return None
+    return parse_timestamp(page[0]["fields"]["created"])
+
+
+def plan_shards(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler | None = None,
+    shard_size: int = SHARD_SIZE,
+    *,
+    total: int | None = None,
+) -> list[Shard]:
+    """Split a JQL query into created-date shards of at most ``shard_size``.
+
+    Windows are bisected until every shard holds at most ``shard_size``
+    issues or spans a single minute, counting the halves of each round
+    concurrently with cheap ``maxResults=0`` queries.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        jql: The user's JQL query.
+        scheduler: Scheduler limiting and retrying the count queries.
+        shard_size: The largest number of issues wanted per shard.
+        total: The number of issues matching ``jql``, if already known.
+
+    Returns:
+    -------
+        Non-empty shards ordered by creation date, together covering
+        every issue matching ``jql``.
+
+    """
+    scheduler = scheduler or FetchScheduler()
+    if total is None:
+        total = scheduler.call(get_issues_total, j, jql)
+    earliest = _earliest_created(j, jql, scheduler) if total > shard_size else None
+    if earliest is None:
+        return [Shard(None, None, total)] if total else []
+    # Concrete bounds for bisection; the outer edges stay open in the JQL.
+    # Jira reads JQL dates in the user's timezone, which shifts every
+    # boundary alike, so the shards still cover the query without gaps.
+    lower = _floor_minute(earliest.astimezone(UTC))
+    upper = _floor_minute(datetime.now(UTC)) + MIN_SHARD_SPAN
+
+    def bounded(start: datetime, end: datetime, count: int = 0) -> Shard:
+        return Shard(
+            None if start <= lower else start,
+            None if end >= upper else end,
+            count,
+        )
+
+    windows = [(lower, upper, total)]
+    while True:
+        splits = {}
+        for start, end, count in windows:
+            middle = _split(start, end) if count > shard_size else None
+            if middle is not None:
+                splits[start, end] = middle
+        if not splits:
+            break
+        halves = [
+            half
+            for (start, end), middle in splits.items()
+            for half in ((start, middle), (middle, end))
+        ]
+        counts = scheduler.map(
+            get_issues_total,
+            repeat(j),
+            [bounded(*half).jql(jql) for half in halves],
+        )
+        counted = dict(zip(halves, counts, strict=True))
+        bisected = []
+        for start, end, count in windows:
+            middle = splits.get((start, end))
+            if middle is None:
+                bisected.append((start, end, count))
+            else:
+                bisected.append((start, middle, counted[start, middle]))
+                bisected.append((middle, end, counted[middle, end]))
+        windows = bisected
+    shards = [bounded(start, end, count) for start, end, count in windows if count]
+    # Dropped windows were empty, so the outer shards can absorb them.
+    shards[0] = replace(shards[0], start=None)
+    shards[-1] = replace(shards[-1], end=None)
+    logger.debug("Split the query into %d shards", len(shards))
+    return shards
+
+
+def iter_sharded_pages(  # noqa: PLR0913
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler | None = None,
+    per_page: int = 50,
+    fields: Sequence[str] | None = None,
+    *,
+    shard_size: int = SHARD_SIZE,
+    total: int | None = None,
+) -> Iterator[list[dict]]:
+    """Yield pages of raw issues, fetching created-date shards in parallel.
+
+    Every shard is paged by offset, and the pages of all shards are
+    fetched as one batch under the scheduler's in-flight limit, so no
+    request needs a deep offset and shards are fetched concurrently.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        jql: The user's JQL query.
+        scheduler: Scheduler limiting and retrying the requests.
+        per_page: The number of issues requested per page.
+        fields: The issue fields to return. All fields when omitted.
+        shard_size: The largest number of issues wanted per shard.
+        total: The number of issues matching ``jql``, if already known.
+
+    Yields:
+    ------
+        Lists of dictionaries representing the retrieved issues, shard
+        by shard in creation order.
+
+    Raises:
+    ------
+        RuntimeError: If the Jira API call fails.
+
+    """
+    scheduler = scheduler or FetchScheduler()
+    try:
+        shards = plan_shards(j, jql, scheduler, shard_size, total=total)
+        # The open-ended last shard gets an extra page for issues created
+        # since it was counted.
+        requests = [
+            (shard.jql(jql), offset)
+            for shard in shards
+            for offset in range(
+                0,
+                shard.total + (per_page if shard.end is None else 0),
+                per_page,
+            )
+        ]
+        yield from scheduler.map(
+            get_issues_slice,
+            repeat(j),
+            [shard_jql for shard_jql, _ in requests],
+            [offset for _, offset in requests],
+            repeat(per_page),
+            repeat(fields),
+        )
+    except Exception as err:
+        logger.exception("Failed to fetch issues from Jira")
+        msg = f"Failed to fetch issues from Jira: {err}"
+        raise RuntimeError(msg) from err
@@ -0,0 +1,553 @@
+"""Memory-mapped columnar snapshot of converted issues."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from metrics.entity import Issue, Periods, TransitionLog
+from metrics.entity.periods import intern_name, whole_seconds
+from metrics.entity.tables import ISSUE_CHUNK_SIZE
+from metrics.entity.transitions import TRANSITION_FIELDS
+
+from .base import LazyIssuesRepository
+from .index import WEEK_FORMAT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Names the current column directory; replaced last when writing.
+SNAPSHOT_META_FILE = "meta.json"
+
+# Code of a missing name and value of a missing timestamp.
+MISSING_NAME = -1
+MISSING_TIME = np.iinfo(np.int64).min
+
+# Bits of the ``parts`` column, set when an issue has that part.
+HAS_HISTORY = 1
+HAS_DOERS = 2
+HAS_STATUSES = 4
+HAS_TRANSITIONS = 8
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_EPOCH_DATE = date(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+_MICROSECONDS_PER_SECOND = 1_000_000
+_MICROSECONDS_PER_DAY = 86_400 * _MICROSECONDS_PER_SECOND
+
+_TIME_FIELDS = ("created_at", "first_status_change_at", "last_finish_status_at")
+
+# Dtype of every column. Variable-length parts of an issue are stored
+# flat, with a ``<part>_offsets`` column of one more entry than issues.
+_COLUMNS: dict[str, Any] = {
+    "keys": np.str_,
+    "status": np.int32,
+    "parts": np.uint8,
+    **{f"{name}_us": np.int64 for name in _TIME_FIELDS},
+    **{f"{name}_offset": np.int32 for name in _TIME_FIELDS},
+    "history_offsets": np.int64,
+    "history_names": np.int32,
+    "doers_offsets": np.int64,
+    "doers_names": np.int32,
+    "doers_seconds": np.int64,
+    "statuses_offsets": np.int64,
+    "statuses_names": np.int32,
+    "statuses_seconds": np.int64,
+    "transitions_offsets": np.int64,
+    "transitions_at_ms": np.int64,
+    "transitions_fields": np.uint8,
+    "transitions_from": np.int32,
+    "transitions_to": np.int32,
+}
+
+# Columns holding codes into the name dictionary.
+_NAME_COLUMNS = frozenset(
+    {"status", "history_names", "doers_names", "statuses_names"}
+    | {"transitions_from", "transitions_to"},
+)
+
+# Columns of the variable-length parts; the first one counts the values.
+_PARTS: dict[str, tuple[str, ...]] = {
+    "history": ("history_names",),
+    "doers": ("doers_names", "doers_seconds"),
+    "statuses": ("statuses_names", "statuses_seconds"),
+    "transitions": (
+        "transitions_at_ms",
+        "transitions_fields",
+        "transitions_from",
+        "transitions_to",
+    ),
+}
+
+
+def _split_time(value: datetime | None) -> tuple[int, int]:
+    """Return an aware datetime as epoch microseconds and UTC offset seconds."""
+    if value is None:
+        return MISSING_TIME, 0
+    offset = value.utcoffset() or timedelta()
+    return (value - _EPOCH) // _ONE_MICROSECOND, int(offset.total_seconds())
+
+
+def _epoch_us(value: datetime) -> int:
+    return _split_time(value)[0]
+
+
+@lru_cache
+def _zone(offset: int) -> timezone:
+    return UTC if offset == 0 else timezone(timedelta(seconds=offset))
+
+
+def _join_time(microseconds: int, offset: int) -> datetime | None:
+    if microseconds == MISSING_TIME:
+        return None
+    value = _EPOCH + timedelta(microseconds=microseconds)
+    return value.astimezone(_zone(offset))
+
+
+class _ColumnBuilder:
+    """Collects the column values of issues and the names they refer to."""
+
+    def __init__(self) -> None:
+        self.names: dict[str, int] = {}
+        self.columns: defaultdict[str, list] = defaultdict(list)
+        for part in _PARTS:
+            self.columns[f"{part}_offsets"].append(0)
+
+    def code(self, name: str | None) -> int:
+        if name is None:
+            return MISSING_NAME
+        return self.names.setdefault(name, len(self.names))
+
+    def add(self, issue: Issue) -> None:
+        columns = self.columns
+        columns["keys"].append(issue.key)
+        columns["status"].append(self.code(issue.status))
+        for name in _TIME_FIELDS:
+            microseconds, offset = _split_time(getattr(issue, name))
+            columns[f"{name}_us"].append(microseconds)
+            columns[f"{name}_offset"].append(offset)
+        parts = 0
+        if issue.status_history is not None:
+            parts |= HAS_HISTORY
+            columns["history_names"].extend(map(self.code, issue.status_history))
+        if issue.doers_x_periods is not None:
+            parts |= HAS_DOERS
+            self._add_periods("doers", issue.doers_x_periods)
+        if issue.statuses_x_periods is not None:
+            parts |= HAS_STATUSES
+            self._add_periods("statuses", issue.statuses_x_periods)
+        if issue.transitions is not None:
+            parts |= HAS_TRANSITIONS
+            self._add_transitions(issue.transitions)
+        columns["parts"].append(parts)
+        for part, (values, *_) in _PARTS.items():
+            columns[f"{part}_offsets"].append(len(columns[values]))
+
+    def _add_periods(
+        self,
+        part: str,
+        periods: Mapping[str | None, timedelta],
+    ) -> None:
+        for name, period in periods.items():
+            self.columns[f"{part}_names"].append(self.code(name))
+            self.columns[f"{part}_seconds"].append(whole_seconds(period))
+
+    def _add_transitions(self, transitions: TransitionLog) -> None:
+        columns = self.columns
+        for at_ms, field, from_value, to_value in transitions.to_rows():
+            columns["transitions_at_ms"].append(at_ms)
+            columns["transitions_fields"].append(TRANSITION_FIELDS.index(field))
+            columns["transitions_from"].append(self.code(from_value))
+            columns["transitions_to"].append(self.code(to_value))
+
+
+def write_snapshot(directory: str | Path, issues: Iterable[Issue]) -> None:
+    """Write ``issues`` to a columnar snapshot in ``directory``.
+
+    Every column is saved as one ``.npy`` file in a new subdirectory,
+    with names replaced by integer codes into a dictionary kept in the
+    metadata file. Replacing the metadata file switches readers to the
+    new columns at once; the previous columns are kept for processes
+    that still have them mapped, and older ones are removed.
+
+    Args:
+    ----
+        directory: The snapshot directory, created if missing.
+        issues: The issues to write, in order.
+
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    previous = _read_meta(directory)
+    builder = _ColumnBuilder()
+    for issue in issues:
+        builder.add(issue)
+    columns = builder.columns
+    column_dir = Path(tempfile.mkdtemp(dir=directory, prefix="columns-"))
+    for column, dtype in _COLUMNS.items():
+        np.save(column_dir / f"{column}.npy", np.array(columns[column], dtype=dtype))
+    meta = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "columns": column_dir.name,
+        "issue_count": len(columns["keys"]),
+        "names": list(builder.names),
+    }
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        Path(tmp_name).replace(directory / SNAPSHOT_META_FILE)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        shutil.rmtree(column_dir, ignore_errors=True)
+        raise
+    keep = {column_dir.name, previous.get("columns") if previous else None}
+    for stale in directory.glob("columns-*"):
+        if stale.name not in keep:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _read_meta(directory: Path) -> dict[str, Any] | None:
+    try:
+        with (directory / SNAPSHOT_META_FILE).open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class IssueSnapshot:
+    """Read-only view of a columnar snapshot, memory-mapped from disk.
+
+    Opening a snapshot maps its columns without reading or parsing them,
+    so it is cheap however many issues there are, and processes that
+    open the same snapshot share its pages through the OS page cache.
+    Issues are only built when asked for; counts per week and the time
+    spent per status are computed from the columns directly.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], names: list[str]) -> None:
+        """Wrap the column arrays and the name dictionary of a snapshot."""
+        self.columns = columns
+        self.names = [intern_name(name) for name in names]
+        # Code -1 (a missing name) indexes the trailing None.
+        self._names = np.array([*self.names, None], dtype=object)
+        self._key_order: np.ndarray | None = None
+        self._sorted_keys: np.ndarray | None = None
+
+    @classmethod
+    def open(cls, directory: str | Path) -> IssueSnapshot:
+        """Map the snapshot in ``directory``.
+
+        Raises
+        ------
+            ValueError: If there is no complete snapshot of this format.
+
+        """
+        directory = Path(directory)
+        meta = _read_meta(directory)
+        if meta is None:
+            msg = f"No issue snapshot in {directory}"
+            raise ValueError(msg)
+        if meta.get("version") != SNAPSHOT_FORMAT_VERSION:
+            msg = f"Issue snapshot {directory} has an unsupported format"
+            raise ValueError(msg)
+        column_dir = directory / meta["columns"]
+        try:
+            columns = {
+                column: np.load(column_dir / f"{column}.npy", mmap_mode="r")
+                for column in _COLUMNS
+            }
+        except (OSError, ValueError) as err:
+            msg = f"Unreadable issue snapshot {directory}: {err}"
+            raise ValueError(msg) from err
+        if len(columns["keys"]) != meta["issue_count"]:
+            msg = f"Issue snapshot {directory} is incomplete"
+            raise ValueError(msg)
+        return cls(columns, meta["names"])
+
+    def __len__(self) -> int:
+        """Return the number of issues."""
+        return len(self.columns["keys"])
+
+    def issues(self) -> list[Issue]:
+        """Build every issue of the snapshot, in order."""
+        return self._build(slice(0, len(self)))
+
+    def iter_issues(self, chunk_size: int = ISSUE_CHUNK_SIZE) -> Iterator[Issue]:
+        """Build the issues one chunk of rows at a time, without keeping them."""
+        for start in range(0, len(self), chunk_size):
+            yield from self._build(slice(start, min(start + chunk_size, len(self))))
+
+    def issue(self, position: int) -> Issue:
+        """Build the issue at ``position``."""
+        return self._build(slice(position, position + 1))[0]
+
+    def issues_at(self, positions: Sequence[int]) -> list[Issue]:
+        """Build the issues at the given positions, in the order given."""
+        return self._build(np.asarray(positions, dtype=np.int64))
+
+    def find(self, key: str) -> int | None:
+        """Return the position of the issue with ``key``, or None.
+
+        Keys are sorted once, on the first lookup, and kept sorted, so
+        every lookup is a binary search.
+        """
+        if self._sorted_keys is None:
+            keys = self.columns["keys"]
+            self._key_order = np.argsort(keys, kind="stable")
+            self._sorted_keys = keys[self._key_order]
+        i = int(np.searchsorted(self._sorted_keys, key))
+        if i < len(self._sorted_keys) and self._sorted_keys[i] == key:
+            return int(self._key_order[i])
+        return None
+
+    def positions_between(
+        self,
+        field: str,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[int]:
+        """Return positions of issues with ``field`` in ``[start, end)``.
+
+        Positions are ordered by the time in ``field``, ties by position.
+        """
+        times = self.columns[f"{field}_us"]
+        mask = times != MISSING_TIME
+        if start is not None:
+            mask &= times >= _epoch_us(start)
+        if end is not None:
+            mask &= times < _epoch_us(end)
+        positions = np.flatnonzero(mask)
+        return positions[np.argsort(times[positions], kind="stable")].tolist()
+
+    def finished_per_week(self) -> dict[str, int]:
+        """Count finished issues per completion week, such as ``"2024W05"``.
+
+        Weeks are taken in the time zone each completion time was
+        recorded in, as they are for loaded issues.
+        """
+        times = self.columns["last_finish_status_at_us"]
+        finished = times != MISSING_TIME
+        offsets = self.columns["last_finish_status_at_offset"][finished]
+        local_days = (
+            times[finished] + offsets.astype(np.int64) * _MICROSECONDS_PER_SECOND
+        ) // _MICROSECONDS_PER_DAY
+        days, counts = np.unique(local_days, return_counts=True)
+        weeks: defaultdict[str, int] = defaultdict(int)
+        for day, count in zip(days.tolist(), counts.tolist(), strict=True):
+            weeks[(_EPOCH_DATE + timedelta(days=day)).strftime(WEEK_FORMAT)] += count
+        return dict(weeks)
+
+    def status_period_counts(self) -> list[tuple[str | None, int, int]]:
+        """Count status periods per status and whole seconds, from the columns.
+
+        Returns ``(status, seconds, count)`` rows, in the order the
+        first period of each appears.
+        """
+        pairs = np.column_stack(
+            (
+                self.columns["statuses_names"].astype(np.int64),
+                self.columns["statuses_seconds"],
+            ),
+        )
+        if not len(pairs):
+            return []
+        groups, first, counts = np.unique(
+            pairs,
+            axis=0,
+            return_index=True,
+            return_counts=True,
+        )
+        order = np.argsort(first, kind="stable")
+        return list(
+            zip(
+                self._names[groups[order, 0]].tolist(),
+                groups[order, 1].tolist(),
+                counts[order].tolist(),
+                strict=True,
+            ),
+        )
+
+    def _build(self, positions: slice | np.ndarray) -> list[Issue]:
+        """Build the issues at a range or an array of positions."""
+        rows = self._rows(positions)
+        issues = []
+        for i, key in enumerate(rows["keys"]):
+            parts = rows["parts"][i]
+            times = {
+                name: _join_time(rows[f"{name}_us"][i], rows[f"{name}_offset"][i])
+                for name in _TIME_FIELDS
+            }
+            history = _slice(rows, "history", i)
+            doers = _slice(rows, "doers", i)
+            statuses = _slice(rows, "statuses", i)
+            transitions = _slice(rows, "transitions", i)
+            issues.append(
+                Issue(
+                    key=key,
+                    status=rows["status"][i],
+                    **times,
+                    status_history=(
+                        rows["history_names"][history] if parts & HAS_HISTORY else None
+                    ),
+                    doers_x_periods=(
+                        Periods.from_seconds(
+                            rows["doers_names"][doers],
+                            rows["doers_seconds"][doers],
+                        )
+                        if parts & HAS_DOERS
+                        else None
+                    ),
+                    statuses_x_periods=(
+                        Periods.from_seconds(
+                            rows["statuses_names"][statuses],
+                            rows["statuses_seconds"][statuses],
+                        )
+                        if parts & HAS_STATUSES
+                        else None
+                    ),
+                    transitions=(
+                        TransitionLog.from_columns(
+                            rows["transitions_at_ms"][transitions],
+                            rows["transitions_fields"][transitions],
+                            rows["transitions_from"][transitions],
+                            rows["transitions_to"][transitions],
+                        )
+                        if parts & HAS_TRANSITIONS
+                        else None
+                    ),
+                ),
+            )
+        return issues
+
+    def _rows(self, positions: slice | np.ndarray) -> dict[str, list]:
+        """Return the columns of a range or an array of issues as Python lists.
+
+        A range is sliced from the mapped columns; the values of an array
+        of positions are gathered in one indexing per column. Name codes
+        are replaced by the names themselves.
+        """
+        columns = self.columns
+        rows: dict[str, list] = {}
+        for part, part_columns in _PARTS.items():
+            bounds, values = _part_values(columns[f"{part}_offsets"], positions)
+            rows[f"{part}_offsets"] = bounds.tolist()
+            for column in part_columns:
+                rows[column] = columns[column][values]
+        for column in _COLUMNS.keys() - rows.keys():
+            rows[column] = columns[column][positions]
+        for column, values in rows.items():
+            if column in _NAME_COLUMNS:
+                rows[column] = self._names[values].tolist()
+            elif not column.endswith("_offsets"):
+                rows[column] = values.tolist()
+        return rows
+
+
+def _part_values(
+    offsets: np.ndarray,
+    positions: slice | np.ndarray,
+) -> tuple[np.ndarray, slice | np.ndarray]:
+    """Return where the part values of some issues are, before and after reading.
+
+    The first array bounds the values of each issue among the values
+    read, and the second selects those values from the part's columns.
+    """
+    if isinstance(positions, slice):
+        bounds = offsets[positions.start : positions.stop + 1]
+        return bounds - bounds[0], slice(bounds[0], bounds[-1])
+    starts = offsets[positions]
+    lengths = offsets[positions + 1] - starts
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    # The values of every issue asked for, issue by issue.
+    values = np.repeat(starts - bounds[:-1], lengths) + np.arange(bounds[-1])
+    return bounds, values
+
+
+def _slice(rows: dict[str, list], part: str, i: int) -> slice:
+    """Return where the values of issue ``i`` are in the columns of ``part``."""
+    offsets = rows[f"{part}_offsets"]
+    return slice(offsets[i], offsets[i + 1])
+
+
+class SnapshotIssuesRepository(LazyIssuesRepository):
+    """Read-only repository over an :class:`IssueSnapshot` on disk.
+
+    Construction only maps the snapshot. Lookups by key, time ranges and
+    the aggregations used by calculators run on the mapped columns, and
+    the issues are built only when asked for, streamed a chunk at a
+    time unless all of them are listed.
+    """
+
+    pushdown = True
+    snapshot: IssueSnapshot
+
+    def __init__(self, directory: str | Path) -> None:
+        """Open the snapshot in ``directory``."""
+        self.directory = Path(directory)
+        super().__init__()
+
+    def refresh(self) -> None:
+        """Re-open the snapshot, picking up one written since."""
+        self.snapshot = IssueSnapshot.open(self.directory)
+        super().refresh()
+
+    def get_issues(self) -> list[Issue]:
+        """Build every issue of the snapshot."""
+        return self.snapshot.issues()
+
+    def stream_issues(self) -> Iterator[Issue]:
+        """Build the issues of the snapshot, a chunk of rows at a time."""
+        return self.snapshot.iter_issues()
+
+    def get(self, key: str) -> Issue | None:
+        """Return an issue by key, or None if not found."""
+        if self._loaded is not None:
+            return super().get(key)
+        position = self.snapshot.find(key)
+        return None if position is None else self.snapshot.issue(position)
+
+    def created_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues created from ``start`` up to, not including, ``end``."""
+        return self._between("created_at", start, end)
+
+    def finished_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues finished from ``start`` up to, not including, ``end``."""
+        return self._between("last_finish_status_at", start, end)
+
+    def finished_per_week(self) -> dict[str, int]:
+        """Count finished issues per completion week, from the columns."""
+        return self.snapshot.finished_per_week()
+
+    def status_period_counts(self) -> list[tuple[str | None, int, int]]:
+        """Count status periods per status and whole seconds, from the columns."""
+        return self.snapshot.status_period_counts()
+
+    def _between(
+        self,
+        field: str,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[Issue]:
+        return self.snapshot.issues_at(
+            self.snapshot.positions_between(field, start, end),
+        )
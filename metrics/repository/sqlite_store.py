@@ -0,0 +1,600 @@
+"""SQLite-backed issue store and repository."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from metrics.entity import Issue, TransitionLog
+from metrics.entity.periods import whole_seconds
+from metrics.entity.transitions import to_epoch_ms
+
+from .base import IssueChanges, LazyIssuesRepository
+from .index import WEEK_FORMAT
+from .parallel import convert_issues
+from .store import StoredSnapshot
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+    from .converter import JiraDataConverter
+    from .jira import JiraAPIRepository
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SCHEMA_VERSION = 3
+
+# File name of the database inside the sync store directory.
+SQLITE_STORE_FILE = "issues.sqlite"
+
+# Issues written per batch of inserts.
+SQLITE_WRITE_CHUNK_SIZE = 500
+
+# Positions read per query when streaming a snapshot's issues.
+SQLITE_READ_CHUNK_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    id INTEGER PRIMARY KEY,
+    server TEXT NOT NULL,
+    jql TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    UNIQUE (server, jql)
+);
+CREATE TABLE IF NOT EXISTS issues (
+    sync_id INTEGER NOT NULL REFERENCES sync_state (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    created_at_ms INTEGER NOT NULL,
+    first_status_change_at TEXT,
+    last_finish_status_at TEXT,
+    finished_at_ms INTEGER,
+    finished_week TEXT,
+    status_history TEXT,
+    has_doers INTEGER NOT NULL,
+    has_statuses INTEGER NOT NULL,
+    has_transitions INTEGER NOT NULL,
+    PRIMARY KEY (sync_id, key)
+);
+CREATE INDEX IF NOT EXISTS issues_position ON issues (sync_id, position);
+CREATE INDEX IF NOT EXISTS issues_created ON issues (sync_id, created_at_ms);
+CREATE INDEX IF NOT EXISTS issues_finished ON issues (sync_id, finished_at_ms);
+CREATE TABLE IF NOT EXISTS periods (
+    sync_id INTEGER NOT NULL REFERENCES sync_state (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    name TEXT,
+    seconds INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS periods_field ON periods (sync_id, field);
+CREATE INDEX IF NOT EXISTS periods_key ON periods (sync_id, key);
+CREATE TABLE IF NOT EXISTS transitions (
+    sync_id INTEGER NOT NULL REFERENCES sync_state (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    at_ms INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    from_value TEXT,
+    to_value TEXT
+);
+CREATE INDEX IF NOT EXISTS transitions_key ON transitions (sync_id, key);
+"""
+
+_ISSUE_COLUMNS = (
+    "key, status, created_at, first_status_change_at, last_finish_status_at,"
+    " status_history, has_doers, has_statuses, has_transitions"
+)
+
+# Periods are keyed by the changelog field they were measured for.
+_PERIOD_FIELDS = {"doers_x_periods": "assignee", "statuses_x_periods": "status"}
+
+
+def _dt_to_str(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _str_to_dt(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _issue_row(sync_id: int, position: int, issue: Issue) -> tuple:
+    finished_at = issue.last_finish_status_at
+    return (
+        sync_id,
+        position,
+        issue.key,
+        issue.status,
+        issue.created_at.isoformat(),
+        to_epoch_ms(issue.created_at),
+        _dt_to_str(issue.first_status_change_at),
+        _dt_to_str(finished_at),
+        to_epoch_ms(finished_at) if finished_at else None,
+        finished_at.strftime(WEEK_FORMAT) if finished_at else None,
+        None if issue.status_history is None else json.dumps(issue.status_history),
+        issue.doers_x_periods is not None,
+        issue.statuses_x_periods is not None,
+        issue.transitions is not None,
+    )
+
+
+def _period_rows(sync_id: int, issues: Iterable[Issue]) -> Iterator[tuple]:
+    for issue in issues:
+        for attr, field in _PERIOD_FIELDS.items():
+            for name, period in (getattr(issue, attr) or {}).items():
+                yield sync_id, issue.key, field, name, whole_seconds(period)
+
+
+def _transition_rows(sync_id: int, issues: Iterable[Issue]) -> Iterator[tuple]:
+    for issue in issues:
+        for time, field, from_value, to_value in (
+            issue.transitions.to_rows() if issue.transitions is not None else ()
+        ):
+            yield sync_id, issue.key, time, field, from_value, to_value
+
+
+class SQLiteIssueStore:
+    """Stores converted issues in a local SQLite database.
+
+    Snapshots of several (server, JQL) pairs share one file, with one
+    row per issue, per status or assignee period and per transition, so
+    aggregations such as completions per week run as SQL queries instead
+    of loading every issue. The database uses WAL mode, so readers are
+    not blocked while a sync writes a new snapshot. It is a drop-in
+    replacement for :class:`~metrics.repository.store.IssueStore`.
+    """
+
+    def __init__(self, path: str | Path, server: str) -> None:
+        """Initialize the store in the database file ``path``."""
+        self.path = Path(path)
+        self.server = server
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection with an up-to-date schema, committing on success."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SQLITE_SCHEMA_VERSION:
+                if version:
+                    logger.warning(
+                        "Rebuilding issue store %s with old format",
+                        self.path,
+                    )
+                    conn.executescript(
+                        "DROP TABLE IF EXISTS transitions;"
+                        " DROP TABLE IF EXISTS periods;"
+                        " DROP TABLE IF EXISTS issues;"
+                        " DROP TABLE IF EXISTS sync_state;",
+                    )
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version={SQLITE_SCHEMA_VERSION}")
+            with conn:
+                yield conn
+
+    def load(self, jql: str) -> StoredSnapshot | None:
+        """Load the stored snapshot for a JQL query, if there is one."""
+        try:
+            with self.connect() as conn:
+                state = self._sync_state(conn, jql)
+                if state is None:
+                    return None
+                sync_id, synced_at = state
+                issues = self._load_issues(conn, sync_id)
+        except sqlite3.DatabaseError:
+            logger.warning("Ignoring unreadable issue store %s", self.path)
+            return None
+        return StoredSnapshot(
+            issues={issue.key: issue for issue in issues},
+            synced_at=datetime.fromisoformat(synced_at),
+        )
+
+    def save(
+        self,
+        jql: str,
+        issues: Mapping[str, Issue],
+        synced_at: datetime,
+    ) -> None:
+        """Atomically replace the stored snapshot for a JQL query."""
+        self.update(jql, issues.values(), synced_at, replace=True)
+
+    def update(
+        self,
+        jql: str,
+        issues: Iterable[Issue],
+        synced_at: datetime,
+        *,
+        replace: bool = False,
+    ) -> None:
+        """Atomically write issues into the stored snapshot for a JQL query.
+
+        An issue already stored under its key is replaced in place, and
+        new issues are appended. Issues are written in chunks as they
+        come, so only the rows of the given issues are touched and a
+        lazy ``issues`` is never held in memory.
+
+        Args:
+        ----
+            jql: The JQL query of the snapshot.
+            issues: The new or changed issues.
+            synced_at: When the sync that fetched them started.
+            replace: Start a new, empty snapshot first, as a full sync does.
+
+        """
+        with self.connect() as conn:
+            state = None if replace else self._sync_state(conn, jql)
+            if state is None:
+                conn.execute(
+                    "DELETE FROM sync_state WHERE server = ? AND jql = ?",
+                    (self.server, jql),
+                )
+                sync_id = conn.execute(
+                    "INSERT INTO sync_state (server, jql, synced_at) VALUES (?, ?, ?)",
+                    (self.server, jql, synced_at.isoformat()),
+                ).lastrowid
+            else:
+                sync_id = state[0]
+                conn.execute(
+                    "UPDATE sync_state SET synced_at = ? WHERE id = ?",
+                    (synced_at.isoformat(), sync_id),
+                )
+            next_position = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM issues WHERE sync_id = ?",
+                (sync_id,),
+            ).fetchone()[0]
+            items = iter(issues)
+            while chunk := {
+                issue.key: issue for issue in islice(items, SQLITE_WRITE_CHUNK_SIZE)
+            }:
+                positions = self._delete_issues(conn, sync_id, list(chunk))
+                rows = []
+                for key, issue in chunk.items():
+                    position = positions.get(key)
+                    if position is None:
+                        position, next_position = next_position, next_position + 1
+                    rows.append(_issue_row(sync_id, position, issue))
+                conn.executemany(
+                    "INSERT INTO issues VALUES"
+                    " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT INTO periods VALUES (?, ?, ?, ?, ?)",
+                    _period_rows(sync_id, chunk.values()),
+                )
+                conn.executemany(
+                    "INSERT INTO transitions VALUES (?, ?, ?, ?, ?, ?)",
+                    _transition_rows(sync_id, chunk.values()),
+                )
+
+    def synced_at(self, jql: str) -> datetime | None:
+        """Return when the stored snapshot for a JQL query was synced, if any."""
+        try:
+            with self.connect() as conn:
+                state = self._sync_state(conn, jql)
+        except sqlite3.DatabaseError:
+            logger.warning("Ignoring unreadable issue store %s", self.path)
+            return None
+        return None if state is None else datetime.fromisoformat(state[1])
+
+    def issues_where(
+        self,
+        jql: str,
+        where: str | None = None,
+        params: tuple = (),
+        order_by: str = "position",
+    ) -> list[Issue]:
+        """Load the issues of a snapshot matching an SQL condition.
+
+        Args:
+        ----
+            jql: The JQL query of the snapshot.
+            where: A condition on the ``issues`` table; all issues if None.
+            params: The parameters of ``where``.
+            order_by: The ``issues`` columns to order the result by.
+
+        Returns:
+        -------
+            The matching issues, or an empty list without a snapshot.
+
+        """
+        with self.connect() as conn:
+            state = self._sync_state(conn, jql)
+            if state is None:
+                return []
+            return self._load_issues(conn, state[0], where, params, order_by)
+
+    def iter_issues(
+        self,
+        jql: str,
+        chunk_size: int = SQLITE_READ_CHUNK_SIZE,
+    ) -> Iterator[Issue]:
+        """Load the issues of a snapshot in order, one range of positions at a time.
+
+        Only one chunk of issues is held in memory at a time; nothing is
+        yielded without a snapshot.
+        """
+        with self.connect() as conn:
+            state = self._sync_state(conn, jql)
+            if state is None:
+                return
+            sync_id = state[0]
+            (last,) = conn.execute(
+                "SELECT MAX(position) FROM issues WHERE sync_id = ?",
+                (sync_id,),
+            ).fetchone()
+            if last is None:
+                return
+            for start in range(0, last + 1, chunk_size):
+                yield from self._load_issues(
+                    conn,
+                    sync_id,
+                    "position >= ? AND position < ?",
+                    (start, start + chunk_size),
+                )
+
+    def finished_per_week(self, jql: str) -> dict[str, int]:
+        """Count the finished issues of a snapshot per completion week."""
+        return dict(
+            self._query(
+                jql,
+                "SELECT finished_week, COUNT(*) FROM issues"
+                " WHERE sync_id = ? AND finished_week IS NOT NULL"
+                " GROUP BY finished_week",
+            ),
+        )
+
+    def status_period_counts(self, jql: str) -> list[tuple[str | None, int, int]]:
+        """Count a snapshot's status periods per status and whole seconds, in SQL.
+
+        Returns ``(status, seconds, count)`` rows, in the order the
+        first period of each appears.
+        """
+        return self._query(
+            jql,
+            "SELECT name, seconds, COUNT(*) FROM ("
+            " SELECT p.name, p.seconds,"
+            " ROW_NUMBER() OVER (ORDER BY i.position, p.rowid) AS n"
+            " FROM periods p JOIN issues i ON i.sync_id = p.sync_id AND i.key = p.key"
+            " WHERE p.sync_id = ? AND p.field = 'status'"
+            ") GROUP BY name, seconds ORDER BY MIN(n)",
+        )
+
+    def _query(self, jql: str, sql: str) -> list[Any]:
+        with self.connect() as conn:
+            state = self._sync_state(conn, jql)
+            if state is None:
+                return []
+            return conn.execute(sql, (state[0],)).fetchall()
+
+    @staticmethod
+    def _delete_issues(
+        conn: sqlite3.Connection,
+        sync_id: int,
+        keys: list[str],
+    ) -> dict[str, int]:
+        """Delete the rows of issues by key, returning their positions."""
+        marks = ", ".join("?" * len(keys))
+        params = (sync_id, *keys)
+        positions = dict(
+            conn.execute(
+                "SELECT key, position FROM issues"  # noqa: S608
+                f" WHERE sync_id = ? AND key IN ({marks})",
+                params,
+            ),
+        )
+        for table in ("issues", "periods", "transitions"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE sync_id = ? AND key IN ({marks})",  # noqa: S608
+                params,
+            )
+        return positions
+
+    def _sync_state(self, conn: sqlite3.Connection, jql: str) -> tuple | None:
+        return conn.execute(
+            "SELECT id, synced_at FROM sync_state WHERE server = ? AND jql = ?",
+            (self.server, jql),
+        ).fetchone()
+
+    def _load_issues(
+        self,
+        conn: sqlite3.Connection,
+        sync_id: int,
+        where: str | None = None,
+        params: tuple = (),
+        order_by: str = "position",
+    ) -> list[Issue]:
+        condition = "sync_id = ?"
+        # Child rows of the matching issues only, when filtering.
+        child_condition = "sync_id = ?"
+        child_params: tuple = (sync_id,)
+        if where:
+            condition += f" AND ({where})"
+            child_condition += f" AND key IN (SELECT key FROM issues WHERE {condition})"  # noqa: S608
+            child_params += (sync_id, *params)
+        rows = conn.execute(
+            f"SELECT {_ISSUE_COLUMNS} FROM issues"  # noqa: S608
+            f" WHERE {condition} ORDER BY {order_by}",
+            (sync_id, *params),
+        ).fetchall()
+        periods: defaultdict[tuple[str, str], dict] = defaultdict(dict)
+        for key, field, name, seconds in conn.execute(
+            "SELECT key, field, name, seconds FROM periods"  # noqa: S608
+            f" WHERE {child_condition} ORDER BY rowid",
+            child_params,
+        ):
+            periods[key, field][name] = timedelta(seconds=seconds)
+        transitions: defaultdict[str, list] = defaultdict(list)
+        for key, *row in conn.execute(
+            "SELECT key, at_ms, field, from_value, to_value FROM transitions"  # noqa: S608
+            f" WHERE {child_condition} ORDER BY rowid",
+            child_params,
+        ):
+            transitions[key].append(row)
+        return [
+            Issue(
+                key=key,
+                status=status,
+                created_at=datetime.fromisoformat(created_at),
+                first_status_change_at=_str_to_dt(first_change),
+                last_finish_status_at=_str_to_dt(finished_at),
+                status_history=None if history is None else json.loads(history),
+                doers_x_periods=periods[key, "assignee"] if has_doers else None,
+                statuses_x_periods=periods[key, "status"] if has_statuses else None,
+                transitions=(
+                    TransitionLog.from_rows(transitions[key])
+                    if has_transitions
+                    else None
+                ),
+            )
+            for (
+                key,
+                status,
+                created_at,
+                first_change,
+                finished_at,
+                history,
+                has_doers,
+                has_statuses,
+                has_transitions,
+            ) in rows
+        ]
+
+
+class SQLiteIssuesRepository(LazyIssuesRepository):
+    """Repository over a snapshot in a :class:`SQLiteIssueStore`.
+
+    Nothing is loaded up front: the full snapshot is only read when
+    issues are listed, and otherwise streamed a chunk at a time, while
+    range queries and the aggregations used by
+    calculators run as SQL queries on the store. With an API repository
+    and converter, each refresh first syncs the store from Jira: only
+    issues updated since the last sync are fetched, and they are written
+    into the database a chunk at a time rather than merged in memory.
+    After an incremental sync, :attr:`changes` lists the issues it
+    fetched; a full sync replaces the snapshot wholesale. Issues deleted
+    in Jira or no longer matching the JQL stay in the store until a full
+    sync rebuilds it.
+    """
+
+    pushdown = True
+
+    def __init__(  # noqa: PLR0913
+        self,
+        store: SQLiteIssueStore,
+        jql: str,
+        api_repo: JiraAPIRepository | None = None,
+        converter: JiraDataConverter | None = None,
+        *,
+        full_sync: bool = False,
+        workers: int | None = None,
+    ) -> None:
+        """Initialize with a store, the JQL query and an optional Jira source."""
+        self.store = store
+        self.jql = jql
+        self.api_repo = api_repo
+        self.converter = converter
+        self.full_sync = full_sync
+        self.workers = workers
+        super().__init__()
+
+    def refresh(self) -> None:
+        """Sync the store, given a Jira source, and drop the loaded snapshot."""
+        if self.api_repo is not None and self.converter is not None:
+            self.sync(self.api_repo, self.converter)
+        super().refresh()
+
+    def sync(self, api_repo: JiraAPIRepository, converter: JiraDataConverter) -> None:
+        """Write the issues updated in Jira since the last sync into the store."""
+        sync_started_at = datetime.now(UTC)
+        synced_at = None if self.full_sync else self.store.synced_at(self.jql)
+        self.changes = None
+        raw_data = api_repo.get_raw_data(updated_since=synced_at)
+        issues = convert_issues(converter, raw_data, self.workers)
+        if synced_at is None:
+            logger.debug("No usable issue store, running a full sync...")
+            self.store.update(self.jql, issues, sync_started_at, replace=True)
+        else:
+            logger.debug("Syncing issues updated since %s...", synced_at.isoformat())
+            updated = tuple(issues)
+            self.store.update(self.jql, updated, sync_started_at)
+            self.changes = IssueChanges(updated=updated, since=synced_at)
+        self.synced_at = sync_started_at
+        # Later refreshes only need the delta since this sync.
+        self.full_sync = False
+
+    def get_issues(self) -> list[Issue]:
+        """Load every issue of the snapshot."""
+        return self.store.issues_where(self.jql)
+
+    def stream_issues(self) -> Iterator[Issue]:
+        """Load the issues of the snapshot, a chunk of positions at a time."""
+        return self.store.iter_issues(self.jql)
+
+    def get(self, key: str) -> Issue | None:
+        """Return an issue by key, or None if not found."""
+        if self._loaded is not None:
+            return super().get(key)
+        issues = self.store.issues_where(self.jql, "key = ?", (key,))
+        return issues[0] if issues else None
+
+    def created_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues created from ``start`` up to, not including, ``end``."""
+        return self._between("created_at_ms", start, end)
+
+    def finished_between(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Issue]:
+        """Return issues finished from ``start`` up to, not including, ``end``."""
+        return self._between("finished_at_ms", start, end)
+
+    def finished_per_week(self) -> dict[str, int]:
+        """Count finished issues per completion week, in SQL."""
+        return self.store.finished_per_week(self.jql)
+
+    def status_period_counts(self) -> list[tuple[str | None, int, int]]:
+        """Count status periods per status and whole seconds, in SQL."""
+        return self.store.status_period_counts(self.jql)
+
+    def _between(
+        self,
+        column: str,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> list[Issue]:
+        conditions = [f"{column} IS NOT NULL"]
+        params = []
+        if start is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(to_epoch_ms(start))
+        if end is not None:
+            conditions.append(f"{column} < ?")
+            params.append(to_epoch_ms(end))
+        return self.store.issues_where(
+            self.jql,
+            " AND ".join(conditions),
+            tuple(params),
+            order_by=f"{column}, position",
+        )
+
+
+def open_sqlite_store(directory: str | None, server: str) -> SQLiteIssueStore | None:
+    """Return a SQLiteIssueStore in ``directory``, or None if sync is disabled."""
+    if not directory:
+        return None
+    return SQLiteIssueStore(Path(directory) / SQLITE_STORE_FILE, server)
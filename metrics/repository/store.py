@@ -0,0 +1,155 @@
+"""Persistent local store of converted issues for incremental sync."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from metrics.entity import Issue, TransitionLog
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 2
+
+# Formats of the local issue store: JSON files or one SQLite database.
+STORE_FORMATS: tuple[str, ...] = ("json", "sqlite")
+
+
+@dataclass
+class StoredSnapshot:
+    """Issues synced for one JQL query and the time the sync started."""
+
+    issues: dict[str, Issue]
+    synced_at: datetime
+
+
+def _dt_to_str(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def _str_to_dt(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _periods_to_dict(periods: dict[str, timedelta] | None) -> dict | None:
+    if periods is None:
+        return None
+    return {name: td.total_seconds() for name, td in periods.items()}
+
+
+def _dict_to_periods(data: dict | None) -> dict[str, timedelta] | None:
+    if data is None:
+        return None
+    return {name: timedelta(seconds=seconds) for name, seconds in data.items()}
+
+
+def issue_to_dict(issue: Issue) -> dict[str, Any]:
+    """Serialize an Issue into a JSON-compatible dict."""
+    return {
+        "key": issue.key,
+        "status": issue.status,
+        "created_at": _dt_to_str(issue.created_at),
+        "first_status_change_at": _dt_to_str(issue.first_status_change_at),
+        "last_finish_status_at": _dt_to_str(issue.last_finish_status_at),
+        "status_history": issue.status_history,
+        "doers_x_periods": _periods_to_dict(issue.doers_x_periods),
+        "statuses_x_periods": _periods_to_dict(issue.statuses_x_periods),
+        "transitions": (
+            issue.transitions.to_rows() if issue.transitions is not None else None
+        ),
+    }
+
+
+def issue_from_dict(data: dict[str, Any]) -> Issue:
+    """Deserialize an Issue from a dict produced by :func:`issue_to_dict`."""
+    return Issue(
+        key=data["key"],
+        status=data["status"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+        first_status_change_at=_str_to_dt(data["first_status_change_at"]),
+        last_finish_status_at=_str_to_dt(data["last_finish_status_at"]),
+        status_history=data["status_history"],
+        doers_x_periods=_dict_to_periods(data["doers_x_periods"]),
+        statuses_x_periods=_dict_to_periods(data["statuses_x_periods"]),
+        transitions=(
+            TransitionLog.from_rows(data["transitions"])
+            if data["transitions"] is not None
+            else None
+        ),
+    )
+
+
+class IssueStore:
+    """Stores converted issues and their sync watermark as JSON files.
+
+    Each (server, JQL) pair gets its own file in the store directory, so
+    changing the query never mixes issue sets.
+    """
+
+    def __init__(self, directory: str | Path, server: str) -> None:
+        """Initialize the store in ``directory`` for a Jira server."""
+        self.directory = Path(directory)
+        self.server = server
+
+    def path_for(self, jql: str) -> Path:
+        """Return the file backing the snapshot of a JQL query."""
+        digest = hashlib.sha256(f"{self.server}\n{jql}".encode()).hexdigest()
+        return self.directory / f"{digest[:32]}.json"
+
+    def load(self, jql: str) -> StoredSnapshot | None:
+        """Load the stored snapshot for a JQL query, if there is one."""
+        path = self.path_for(jql)
+        if not path.exists():
+            return None
+        try:
+            with path.open() as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable issue store %s", path)
+            return None
+        if data.get("version") != STORE_FORMAT_VERSION:
+            logger.warning("Ignoring issue store %s with old format", path)
+            return None
+        return StoredSnapshot(
+            issues={item["key"]: issue_from_dict(item) for item in data["issues"]},
+            synced_at=datetime.fromisoformat(data["synced_at"]),
+        )
+
+    def save(
+        self,
+        jql: str,
+        issues: dict[str, Issue],
+        synced_at: datetime,
+    ) -> None:
+        """Atomically replace the stored snapshot for a JQL query."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(jql)
+        data = {
+            "version": STORE_FORMAT_VERSION,
+            "server": self.server,
+            "jql": jql,
+            "synced_at": synced_at.isoformat(),
+            "issues": [issue_to_dict(issue) for issue in issues.values()],
+        }
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            Path(tmp_name).replace(path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+def open_issue_store(directory: str | None, server: str) -> IssueStore | None:
+    """Return an IssueStore for ``directory``, or None if sync is disabled."""
+    if not directory:
+        return None
+    return IssueStore(directory, server)
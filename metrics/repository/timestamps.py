@@ -0,0 +1,35 @@
+"""Parsing of Jira timestamps."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+
+from dateutil.parser import parse
+
+# Bulk transitions and re-fetched pages repeat the same timestamps.
+TIMESTAMP_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Jira timestamp such as ``2024-01-01T00:00:00.000+0000``.
+
+    Jira's fixed ISO-8601 layout, including the ``+0000`` offset form,
+    is handled by :meth:`datetime.fromisoformat`, which is a couple of
+    orders of magnitude faster than dateutil. Other layouts fall back
+    to :func:`dateutil.parser.parse`.
+
+    Args:
+    ----
+        value: The timestamp string.
+
+    Returns:
+    -------
+        The parsed datetime, timezone-aware when the string has an offset.
+
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return parse(value)
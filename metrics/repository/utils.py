@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from itertools import repeat
+from itertools import chain, repeat
 from typing import TYPE_CHECKING
 
 from jira.exceptions import JIRAError
 
+from .scheduler import FetchScheduler
+
 if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
     from jira import JIRA
 
 logger = logging.getLogger(__name__)
@@ -57,6 +60,7 @@ def get_issues_slice(
     jql: str,
     offset: int = 0,
     limit: int = 50,
+    fields: Sequence[str] | None = None,
 ) -> list[dict]:
     """Get a slice of issues from JIRA based on the provided JQL query.
 
@@ -66,6 +70,7 @@ def get_issues_slice(
         jql: The JQL query to filter the issues.
         offset: The starting index of the slice. Defaults to 0.
         limit: The maximum number of issues to retrieve.
+        fields: The issue fields to return. All fields when omitted.
 
     Returns:
     -------
@@ -86,7 +91,9 @@ def get_issues_slice(
             jql,
             startAt=offset,
             maxResults=limit,
+            fields=list(fields) if fields else None,
             expand="changelog",
+            json_result=True,
         )
     except JIRAError as err:
         logger.exception("Failed to fetch issues slice from Jira")
@@ -98,43 +105,77 @@ def get_issues_slice(
     else:
         if isinstance(issues_response, dict):
             return issues_response["issues"]
-        return list(issues_response)
+        return [issue.raw for issue in issues_response]
 
 
-def get_issues(j: JIRA, jql: str) -> list[dict]:
-    """Retrieve issues from JIRA in parallel using a thread pool.
+def iter_issue_pages(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler | None = None,
+    per_page: int = 50,
+    fields: Sequence[str] | None = None,
+) -> Iterator[list[dict]]:
+    """Yield pages of raw issues from JIRA, fetched under a fetch scheduler.
 
     Args:
     ----
         j: An instance of the JIRA client.
         jql: The JQL query to filter the issues.
+        scheduler: Scheduler limiting and retrying page fetches. A
+            default one is created when omitted.
+        per_page: The number of issues requested per page.
+        fields: The issue fields to return. All fields when omitted.
 
-    Returns:
-    -------
-        A list of dictionaries representing the retrieved issues.
+    Yields:
+    ------
+        Lists of dictionaries representing the retrieved issues, in
+        result order.
 
     Raises:
     ------
         RuntimeError: If the Jira API call fails.
 
     """
-    result: list[dict] = []
-    per_page = 50
+    scheduler = scheduler or FetchScheduler()
     try:
-        issues_total = get_issues_total(j, jql)
+        issues_total = scheduler.call(get_issues_total, j, jql)
         offsets = [p * per_page for p in range(issues_total // per_page + 1)]
 
-        with ThreadPoolExecutor(max_workers=len(offsets)) as pool:
-            for result_chunk in pool.map(
-                get_issues_slice,
-                repeat(j),
-                repeat(jql),
-                offsets,
-                repeat(per_page),
-            ):
-                result.extend(result_chunk)
+        yield from scheduler.map(
+            get_issues_slice,
+            repeat(j),
+            repeat(jql),
+            offsets,
+            repeat(per_page),
+            repeat(fields),
+        )
     except Exception as err:
         logger.exception("Failed to fetch issues from Jira")
         msg = f"Failed to fetch issues from Jira: {err}"
         raise RuntimeError(msg) from err
-    return result
+
+
+def get_issues(
+    j: JIRA,
+    jql: str,
+    scheduler: FetchScheduler | None = None,
+) -> list[dict]:
+    """Retrieve issues from JIRA in parallel under a bounded fetch scheduler.
+
+    Args:
+    ----
+        j: An instance of the JIRA client.
+        jql: The JQL query to filter the issues.
+        scheduler: Scheduler limiting and retrying page fetches. A
+            default one is created when omitted.
+
+    Returns:
+    -------
+        A list of dictionaries representing the retrieved issues.
+
+    Raises:
+    ------
+        RuntimeError: If the Jira API call fails.
+
+    """
+    return list(chain.from_iterable(iter_issue_pages(j, jql, scheduler)))
@@ -1,6 +1,7 @@
 """Service layer for metrics calculation and visualization."""
 
+from .forecast import ForecastService
 from .metrics import MetricsService
 from .vis import VisService
 
-__all__ = ["MetricsService", "VisService"]
+__all__ = ["ForecastService", "MetricsService", "VisService"]
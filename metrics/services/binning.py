@@ -0,0 +1,92 @@
+"""Vectorized binning of durations into timeslots."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+ONE_SECOND = timedelta(seconds=1)
+
+
+def seconds_of(durations: Iterable[timedelta | None]) -> np.ndarray:
+    """Return the non-empty ``durations`` as int64 whole seconds.
+
+    None and zero durations are skipped. Seconds are rounded down, which
+    leaves ``seconds // timeslot`` unchanged for whole-second timeslots.
+    """
+    return np.fromiter(
+        (duration // ONE_SECOND for duration in durations if duration),
+        dtype=np.int64,
+    )
+
+
+def to_seconds(values: Iterable[float]) -> np.ndarray:
+    """Return durations given in (possibly fractional) seconds as int64."""
+    return np.floor(np.fromiter(values, dtype=np.float64)).astype(np.int64)
+
+
+def slots_of(seconds: np.ndarray, timeslot: int) -> np.ndarray:
+    """Return the whole timeslots in each duration, at least 1, as float64.
+
+    Element-wise this is ``max(1, seconds // timeslot)``.
+    """
+    return np.maximum(seconds // timeslot, 1).astype(np.float64)
+
+
+def bin_durations(seconds: np.ndarray, timeslot: int, limit: int) -> np.ndarray:
+    """Return the whole timeslots in each duration, between 1 and ``limit``.
+
+    Element-wise this is ``min(max(1, seconds // timeslot), limit)``.
+
+    Args:
+    ----
+        seconds: Durations in whole seconds.
+        timeslot: The length of a timeslot in whole seconds.
+        limit: The largest number of timeslots reported.
+
+    Returns:
+    -------
+        The timeslot counts as float64, in the order of ``seconds``.
+
+    """
+    return np.minimum(slots_of(seconds, timeslot), limit)
+
+
+def weighted_median(values: np.ndarray, counts: np.ndarray) -> float:
+    """Return the median of sorted ``values`` repeated ``counts`` times.
+
+    As with ``np.median``, the two middle values are averaged when the
+    total count is even.
+    """
+    cumulative = np.cumsum(counts)
+    total = int(cumulative[-1])
+    lower, upper = np.searchsorted(cumulative, [(total - 1) // 2, total // 2], "right")
+    return float((values[lower] + values[upper]) / 2)
+
+
+def group_by_label(
+    labels: Sequence[str | None] | np.ndarray,
+    values: np.ndarray,
+) -> dict[str | None, np.ndarray]:
+    """Group ``values`` by the label at the same position.
+
+    Labels appear in the order they are first seen and each group keeps
+    the order of its values.
+    """
+    codes, uniques = pd.factorize(
+        np.asarray(labels, dtype=object),
+        use_na_sentinel=False,
+    )
+    if not len(uniques):
+        return {}
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]
+    # factorize turns a None label into NaN; give it back as None.
+    names = [None if pd.isna(label) else label for label in uniques.tolist()]
+    return dict(zip(names, np.split(values[order], bounds), strict=True))
@@ -3,24 +3,59 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 
-import numpy as np
-import pandas as pd
+from metrics.consts import (
+    CALC_LIMIT,
+    ONE_DAY,
+    ONE_HOUR,
+    QUEUE_TIME_PERCENTILES,
+    TREND_PERCENTILES,
+    TREND_WINDOWS,
+)
 
-from metrics.consts import CALC_LIMIT, ONE_DAY, ONE_HOUR
+from .engine import MetricsEngine
+from .sketch import DEFAULT_K
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    import pandas as pd
+
     from metrics.repository import BaseIssuesRepository
 
 
+def required_fields(*consumers: object) -> list[str]:
+    """Return the union of the Jira fields needed by converters and calculators.
+
+    Each consumer declares the raw issue fields it reads in a
+    ``required_fields`` class attribute. The result is passed to the
+    repository as the search field projection.
+    """
+    fields: set[str] = set()
+    for consumer in consumers:
+        fields.update(getattr(consumer, "required_fields", ()))
+    return sorted(fields)
+
+
 class MetricCalculator(ABC):
-    """Base class for all metric calculators."""
+    """Base class for all metric calculators.
+
+    Calculators are thin facades over a :class:`MetricsEngine`. Those
+    sharing one engine share its single pass over the issues.
+    """
 
-    def __init__(self, repo: BaseIssuesRepository) -> None:
-        """Initialize with an issues repository."""
+    # Raw Jira issue fields this calculator needs beyond the converter's.
+    required_fields: ClassVar[Iterable[str]] = ()
+
+    def __init__(
+        self,
+        repo: BaseIssuesRepository,
+        engine: MetricsEngine | None = None,
+    ) -> None:
+        """Initialize with an issues repository and, optionally, a shared engine."""
         self.repo = repo
+        self.engine = engine if engine is not None else MetricsEngine(repo)
 
     @abstractmethod
     def calculate(self) -> object:
@@ -36,17 +71,7 @@ class TimeMetricCalculator(MetricCalculator):
         timeslot: int,
         limit: int,
     ) -> list[float]:
-        res = []
-        for issue in self.repo.all():
-            metric_value = getattr(issue, metric_name)
-            if metric_value:
-                time_in_days = max(
-                    1,
-                    metric_value.total_seconds() // timeslot,
-                )
-                time_in_days = min(time_in_days, limit)
-                res.append(time_in_days)
-        return res
+        return self.engine.time_metric(metric_name, timeslot, limit)
 
 
 class CycleTimeCalculator(TimeMetricCalculator):
@@ -81,6 +106,59 @@ class LeadTimeCalculator(TimeMetricCalculator):
         )
 
 
+class RollingTimeMetricCalculator(MetricCalculator):
+    """Base calculator for rolling percentiles of cycle or lead time."""
+
+    def _calculate_rolling(
+        self,
+        metric_name: str,
+        windows: Sequence[int],
+        percentiles: Sequence[float],
+        timeslot: int,
+    ) -> pd.DataFrame:
+        return self.engine.rolling_time_metric(
+            metric_name,
+            windows,
+            percentiles,
+            timeslot,
+        )
+
+
+class RollingCycleTimeCalculator(RollingTimeMetricCalculator):
+    """Calculate rolling cycle time percentiles by completion week."""
+
+    def calculate(
+        self,
+        windows: Sequence[int] = TREND_WINDOWS,
+        percentiles: Sequence[float] = TREND_PERCENTILES,
+        timeslot: int = ONE_DAY,
+    ) -> pd.DataFrame:
+        """Calculate cycle time percentiles over trailing windows of weeks.
+
+        Returns a frame indexed by week (its Monday) with a
+        ``p<q>_<n>w`` column, in timeslot units, per percentile and
+        window.
+        """
+        return self._calculate_rolling("cycle_time", windows, percentiles, timeslot)
+
+
+class RollingLeadTimeCalculator(RollingTimeMetricCalculator):
+    """Calculate rolling lead time percentiles by completion week."""
+
+    def calculate(
+        self,
+        windows: Sequence[int] = TREND_WINDOWS,
+        percentiles: Sequence[float] = TREND_PERCENTILES,
+        timeslot: int = ONE_DAY,
+    ) -> pd.DataFrame:
+        """Calculate lead time percentiles over trailing windows of weeks.
+
+        Returns a frame shaped as
+        :meth:`RollingCycleTimeCalculator.calculate` does.
+        """
+        return self._calculate_rolling("lead_time", windows, percentiles, timeslot)
+
+
 class QueueTimeCalculator(MetricCalculator):
     """Calculate time spent in each status."""
 
@@ -90,16 +168,7 @@ class QueueTimeCalculator(MetricCalculator):
         limit: int = CALC_LIMIT,
     ) -> dict[str, list[float]]:
         """Calculate queue time per status in the given timeslot units."""
-        tmp: dict[str, list[float]] = defaultdict(list)
-        for issue in self.repo.all():
-            for status, td in issue.statuses_x_periods.items():
-                period_in_status = max(
-                    1,
-                    td.total_seconds() // timeslot,
-                )
-                period_in_status = min(period_in_status, limit)
-                tmp[status].append(period_in_status)
-        return dict(tmp)
+        return self.engine.queue_time(timeslot, limit)
 
 
 class ThroughputCalculator(MetricCalculator):
@@ -107,12 +176,19 @@ class ThroughputCalculator(MetricCalculator):
 
     def calculate(self) -> dict[str, int]:
         """Calculate number of issues completed per week."""
-        tmp: dict[str, int] = defaultdict(int)
-        for issue in self.repo.all():
-            if issue.last_finish_status_at:
-                key = issue.last_finish_status_at.strftime("%YW%V")
-                tmp[key] += 1
-        return dict(tmp)
+        return self.engine.throughput()
+
+
+class RollingThroughputCalculator(MetricCalculator):
+    """Calculate rolling throughput by completion week."""
+
+    def calculate(self, windows: Sequence[int] = TREND_WINDOWS) -> pd.DataFrame:
+        """Calculate the mean issues completed per week over trailing windows.
+
+        Returns a frame indexed by week (its Monday) with a
+        ``throughput_<n>w`` column per window.
+        """
+        return self.engine.rolling_throughput(windows)
 
 
 class CumulativeQueueTimeCalculator(MetricCalculator):
@@ -124,21 +200,26 @@ class CumulativeQueueTimeCalculator(MetricCalculator):
         limit: int = 1000,
     ) -> pd.DataFrame:
         """Calculate median time spent in each status."""
-        tmp: dict[str, list[float]] = defaultdict(list)
-        for issue in self.repo.all():
-            for status, td in issue.statuses_x_periods.items():
-                period_in_status = max(
-                    1,
-                    td.total_seconds() // timeslot,
-                )
-                if period_in_status == 1 or period_in_status > limit:
-                    continue
-                tmp[status].append(period_in_status)
-        res = pd.DataFrame(columns=["status", "median_hours", "count"])
-        res["status"] = list(tmp.keys())
-        res["median_hours"] = [np.median(periods) for periods in tmp.values()]
-        res["count"] = [len(periods) for periods in tmp.values()]
-        return res
+        return self.engine.cumulative_queue_time(timeslot, limit)
+
+
+class QueueTimePercentilesCalculator(MetricCalculator):
+    """Calculate percentiles of the time spent in each status."""
+
+    def calculate(
+        self,
+        percentiles: Sequence[float] = QUEUE_TIME_PERCENTILES,
+        timeslot: int = ONE_HOUR,
+        k: int = DEFAULT_K,
+    ) -> pd.DataFrame:
+        """Calculate the count and percentiles (0-100) of time per status.
+
+        Times are in timeslot units and come from one quantile sketch
+        per status, so memory stays bounded however many issues there
+        are; see :class:`~metrics.services.sketch.KLLSketch` for the
+        error bound.
+        """
+        return self.engine.queue_time_percentiles(percentiles, timeslot, k)
 
 
 class ReturnToTestingCalculator(MetricCalculator):
@@ -152,15 +233,4 @@ class ReturnToTestingCalculator(MetricCalculator):
         """Calculate count of testing transitions per issue."""
         if testing_statuses is None:
             testing_statuses = ["testing"]
-        testing_statuses = [s.lower() for s in testing_statuses]
-        res = []
-        for issue in self.repo.all():
-            if issue.status_history:
-                testing_count = sum(
-                    1
-                    for status in issue.status_history
-                    if status.lower() in testing_statuses
-                )
-                if testing_count > min_testing_count:
-                    res.append(testing_count)
-        return res
+        return self.engine.return_to_testing(testing_statuses, min_testing_count)
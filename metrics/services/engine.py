@@ -0,0 +1,443 @@
+"""Single-pass engine behind the metric calculators."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from metrics.repository.index import WEEK_FORMAT
+
+from .binning import (
+    ONE_SECOND,
+    bin_durations,
+    group_by_label,
+    seconds_of,
+    slots_of,
+    to_seconds,
+    weighted_median,
+)
+from .rolling import rolling_counts, rolling_percentiles
+from .sketch import DEFAULT_K, StatusSketches
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+    from datetime import datetime, timedelta
+
+    from metrics.entity import Issue
+    from metrics.repository import BaseIssuesRepository
+
+
+class DurationAccumulator:
+    """Collects one duration of every issue, such as its cycle time."""
+
+    def __init__(self, metric_name: str) -> None:
+        """Collect the ``metric_name`` attribute of each issue."""
+        self.metric_name = metric_name
+        self.durations: list = []
+
+    def add(self, issue: Issue) -> None:
+        """Record the issue's duration."""
+        self.durations.append(getattr(issue, self.metric_name))
+
+    def result(self) -> np.ndarray:
+        """Return the non-empty durations in whole seconds."""
+        return seconds_of(self.durations)
+
+
+# Periods of one status buffered before they are added to its sketch.
+SKETCH_BATCH_SIZE = 1024
+
+
+class StatusPeriodAccumulator:
+    """Collects the time every issue spent in each status, and sketches it.
+
+    Besides the periods themselves, each status's periods are fed to a
+    KLL sketch of whole seconds, a batch at a time, so percentiles need
+    no sorting of the collected periods.
+    """
+
+    def __init__(self, k: int = DEFAULT_K) -> None:
+        """Start with no periods and sketches of accuracy ``k``."""
+        self.statuses: list[str | None] = []
+        self.seconds: list[float] = []
+        self.sketches = StatusSketches(k)
+        self._batches: defaultdict[str | None, list[float]] = defaultdict(list)
+
+    def add(self, issue: Issue) -> None:
+        """Record the issue's periods per status."""
+        for status, period in (issue.statuses_x_periods or {}).items():
+            seconds = period.total_seconds()
+            self.statuses.append(status)
+            self.seconds.append(seconds)
+            if status not in self.sketches.sketches:
+                # Sketches are listed in the order statuses first appear.
+                self.sketches.update(status, ())
+            batch = self._batches[status]
+            batch.append(seconds)
+            if len(batch) >= SKETCH_BATCH_SIZE:
+                self._flush(status)
+
+    def result(self) -> tuple[np.ndarray, np.ndarray, StatusSketches]:
+        """Return the statuses, the periods in whole seconds and the sketches."""
+        for status in list(self._batches):
+            self._flush(status)
+        return (
+            np.array(self.statuses, dtype=object),
+            to_seconds(self.seconds),
+            self.sketches,
+        )
+
+    def _flush(self, status: str | None) -> None:
+        self.sketches.update(status, to_seconds(self._batches.pop(status)))
+
+
+class ThroughputAccumulator:
+    """Counts finished issues per completion week."""
+
+    def __init__(self) -> None:
+        """Start with no weeks."""
+        self.weeks: defaultdict[str, int] = defaultdict(int)
+
+    def add(self, issue: Issue) -> None:
+        """Count the issue in its completion week, if it was finished."""
+        if issue.last_finish_status_at:
+            self.weeks[issue.last_finish_status_at.strftime(WEEK_FORMAT)] += 1
+
+    def result(self) -> dict[str, int]:
+        """Return the number of finished issues per week."""
+        return dict(self.weeks)
+
+
+class CompletionAccumulator:
+    """Collects when every finished issue was finished, with its durations."""
+
+    def __init__(self) -> None:
+        """Start with no completions."""
+        self.times: list[datetime] = []
+        self.cycle_times: list[timedelta | None] = []
+        self.lead_times: list[timedelta | None] = []
+
+    def add(self, issue: Issue) -> None:
+        """Record the issue's completion, if it was finished."""
+        finished_at = issue.last_finish_status_at
+        if finished_at:
+            # Wall-clock time, so weeks match the throughput metric's.
+            self.times.append(finished_at.replace(tzinfo=None))
+            self.cycle_times.append(issue.cycle_time)
+            self.lead_times.append(issue.lead_time)
+
+    def result(self) -> Completions:
+        """Return the completions, with durations in whole seconds or NaN."""
+        return Completions(
+            times=np.array(self.times, dtype="datetime64[us]"),
+            cycle_seconds=_seconds_or_nan(self.cycle_times),
+            lead_seconds=_seconds_or_nan(self.lead_times),
+        )
+
+
+def _seconds_or_nan(durations: list[timedelta | None]) -> np.ndarray:
+    return np.fromiter(
+        (duration // ONE_SECOND if duration else np.nan for duration in durations),
+        dtype=np.float64,
+        count=len(durations),
+    )
+
+
+class StatusHistoryAccumulator:
+    """Collects every issue's status history as codes of distinct names."""
+
+    def __init__(self) -> None:
+        """Start with no histories."""
+        self.codes: dict[str, int] = {}
+        self.history: list[int] = []
+        self.lengths: list[int] = []
+
+    def add(self, issue: Issue) -> None:
+        """Record the issue's status history."""
+        history = issue.status_history or ()
+        codes = self.codes
+        self.history.extend(codes.setdefault(status, len(codes)) for status in history)
+        self.lengths.append(len(history))
+
+    def result(self) -> StatusHistories:
+        """Return the collected histories."""
+        return StatusHistories(
+            names=tuple(self.codes),
+            codes=np.array(self.history, dtype=np.int32),
+            lengths=np.array(self.lengths, dtype=np.int64),
+        )
+
+
+@dataclass(frozen=True)
+class StatusHistories:
+    """Status histories of all issues, flattened into name codes."""
+
+    names: tuple[str, ...]
+    codes: np.ndarray
+    lengths: np.ndarray
+
+    def count_in(self, statuses: Iterable[str]) -> np.ndarray:
+        """Count, per issue, the history entries in ``statuses``.
+
+        Statuses are compared case-insensitively.
+        """
+        wanted = {status.lower() for status in statuses}
+        matches = np.array(
+            [name.lower() in wanted for name in self.names],
+            dtype=bool,
+        )
+        issue_of_entry = np.repeat(np.arange(len(self.lengths)), self.lengths)
+        return np.bincount(
+            issue_of_entry,
+            weights=matches[self.codes] if len(self.names) else None,
+            minlength=len(self.lengths),
+        ).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class Completions:
+    """Finished issues' completion times and durations, in the same order."""
+
+    times: np.ndarray
+    cycle_seconds: np.ndarray
+    lead_seconds: np.ndarray
+
+
+@dataclass(frozen=True)
+class IssueAggregates:
+    """Everything the metrics need, collected in one pass over the issues."""
+
+    cycle_seconds: np.ndarray
+    lead_seconds: np.ndarray
+    period_statuses: np.ndarray
+    period_seconds: np.ndarray
+    status_sketches: StatusSketches
+    finished_per_week: dict[str, int]
+    histories: StatusHistories
+    completions: Completions
+
+
+class MetricsEngine:
+    """Computes all metrics from a single traversal of the issue set.
+
+    The first metric requested walks the repository's issues once,
+    feeding each issue to one accumulator per metric, and keeps the
+    collected arrays. Every metric is then computed from those arrays
+    with NumPy, whatever timeslot or limit it is asked for. Call
+    :meth:`refresh` to refresh the repository, or :meth:`reset` after
+    refreshing it directly.
+
+    The time spent in each status is also fed to one KLL sketch of
+    accuracy ``k`` per status during the walk; the percentiles of queue
+    time are read from those sketches, while its median stays exact.
+
+    For a repository whose storage aggregates by itself (see
+    :attr:`~metrics.repository.BaseIssuesRepository.pushdown`), status
+    periods and weekly throughput are always taken from the repository's
+    own aggregations, and the walk, when another metric needs one,
+    skips them.
+    """
+
+    def __init__(self, repo: BaseIssuesRepository, k: int = DEFAULT_K) -> None:
+        """Initialize with the repository of the issues to measure."""
+        self.repo = repo
+        self.k = k
+        self._aggregates: IssueAggregates | None = None
+        self._period_counts: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._sketches: StatusSketches | None = None
+
+    def reset(self) -> None:
+        """Forget the collected aggregates, so the next metric walks again."""
+        self._aggregates = None
+        self._period_counts = None
+        self._sketches = None
+
+    def refresh(self) -> None:
+        """Refresh the repository and forget the collected aggregates."""
+        self.repo.refresh()
+        self.reset()
+
+    def aggregates(self) -> IssueAggregates:
+        """Return the aggregates, walking the issues on first use."""
+        if self._aggregates is None:
+            cycle = DurationAccumulator("cycle_time")
+            lead = DurationAccumulator("lead_time")
+            periods = StatusPeriodAccumulator(self.k)
+            throughput = ThroughputAccumulator()
+            histories = StatusHistoryAccumulator()
+            completions = CompletionAccumulator()
+            accumulators: tuple = (cycle, lead, histories, completions)
+            if not self.repo.pushdown:
+                accumulators += (periods, throughput)
+            for issue in self.repo.iter_issues():
+                for accumulator in accumulators:
+                    accumulator.add(issue)
+            if self.repo.pushdown:
+                period_statuses, period_seconds = self.status_periods()
+                sketches = self.status_sketches()
+                finished_per_week = self.repo.finished_per_week()
+            else:
+                period_statuses, period_seconds, sketches = periods.result()
+                finished_per_week = throughput.result()
+            self._aggregates = IssueAggregates(
+                cycle_seconds=cycle.result(),
+                lead_seconds=lead.result(),
+                period_statuses=period_statuses,
+                period_seconds=period_seconds,
+                status_sketches=sketches,
+                finished_per_week=finished_per_week,
+                histories=histories.result(),
+                completions=completions.result(),
+            )
+        return self._aggregates
+
+    def status_periods(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return statuses and int64 seconds of each issue's time per status."""
+        if not self.repo.pushdown:
+            aggregates = self.aggregates()
+            return aggregates.period_statuses, aggregates.period_seconds
+        statuses, seconds, counts = self._pushed_down_period_counts()
+        return np.repeat(statuses, counts), np.repeat(seconds, counts)
+
+    def status_sketches(self, k: int | None = None) -> StatusSketches:
+        """Return one sketch of the whole seconds spent in each status.
+
+        Sketches of the engine's ``k`` are the ones fed during the walk,
+        or, when the repository pushes down, fed its period counts as
+        weights. Sketches of another ``k`` are built from the periods.
+        """
+        if k is not None and k != self.k:
+            statuses, seconds = self.status_periods()
+            sketches = StatusSketches(k)
+            for status, periods in group_by_label(statuses, seconds).items():
+                sketches.update(status, periods)
+            return sketches
+        if not self.repo.pushdown:
+            return self.aggregates().status_sketches
+        if self._sketches is None:
+            statuses, seconds, counts = self._pushed_down_period_counts()
+            rows = np.arange(len(statuses))
+            self._sketches = StatusSketches(self.k)
+            for status, group in group_by_label(statuses, rows).items():
+                self._sketches.update_weighted(status, seconds[group], counts[group])
+        return self._sketches
+
+    def time_metric(self, metric_name: str, timeslot: int, limit: int) -> list[float]:
+        """Bin the ``cycle_time`` or ``lead_time`` of every issue."""
+        aggregates = self.aggregates()
+        seconds = (
+            aggregates.cycle_seconds
+            if metric_name == "cycle_time"
+            else aggregates.lead_seconds
+        )
+        return bin_durations(seconds, timeslot, limit).tolist()
+
+    def queue_time(self, timeslot: int, limit: int) -> dict[str, list[float]]:
+        """Bin the time in each status, grouped by status."""
+        statuses, seconds = self.status_periods()
+        groups = group_by_label(statuses, bin_durations(seconds, timeslot, limit))
+        return {status: periods.tolist() for status, periods in groups.items()}
+
+    def cumulative_queue_time(self, timeslot: int, limit: int) -> pd.DataFrame:
+        """Return the median and count of time slots spent in each status.
+
+        Both are exact: they come from every status period, or from the
+        repository's exact period counts when it pushes down, never from
+        the sketches.
+        """
+        statuses, seconds, counts = self._status_period_counts()
+        slots = slots_of(seconds, timeslot)
+        # Periods of one timeslot or less, or over the limit, are left out.
+        kept = (slots != 1) & (slots <= limit)
+        slots, counts = slots[kept], counts[kept]
+        rows = np.arange(len(slots))
+        medians, totals = [], []
+        tmp = group_by_label(statuses[kept], rows)
+        for group in tmp.values():
+            order = group[np.argsort(slots[group], kind="stable")]
+            medians.append(weighted_median(slots[order], counts[order]))
+            totals.append(int(counts[group].sum()))
+        res = pd.DataFrame(columns=["status", "median_hours", "count"])
+        res["status"] = list(tmp.keys())
+        res["median_hours"] = medians
+        res["count"] = totals
+        return res
+
+    def queue_time_percentiles(
+        self,
+        percentiles: Sequence[float],
+        timeslot: int,
+        k: int = DEFAULT_K,
+    ) -> pd.DataFrame:
+        """Return the count and percentiles (0-100) of time per status."""
+        return self.status_sketches(k).to_frame(percentiles, timeslot)
+
+    def throughput(self) -> dict[str, int]:
+        """Count finished issues per completion week."""
+        if self.repo.pushdown:
+            return self.repo.finished_per_week()
+        return self.aggregates().finished_per_week
+
+    def completions(self) -> Completions:
+        """Return when each finished issue was finished, with its durations."""
+        return self.aggregates().completions
+
+    def rolling_time_metric(
+        self,
+        metric_name: str,
+        windows: Sequence[int],
+        percentiles: Sequence[float],
+        timeslot: int,
+    ) -> pd.DataFrame:
+        """Return rolling percentiles of ``cycle_time`` or ``lead_time`` by week."""
+        completions = self.completions()
+        seconds = (
+            completions.cycle_seconds
+            if metric_name == "cycle_time"
+            else completions.lead_seconds
+        )
+        return rolling_percentiles(
+            completions.times,
+            seconds / timeslot,
+            windows,
+            percentiles,
+        )
+
+    def rolling_throughput(self, windows: Sequence[int]) -> pd.DataFrame:
+        """Return the rolling mean of finished issues per week."""
+        return rolling_counts(self.completions().times, windows)
+
+    def return_to_testing(
+        self,
+        testing_statuses: Iterable[str],
+        min_testing_count: int,
+    ) -> list[int]:
+        """Count testing statuses per issue, keeping counts over the minimum."""
+        histories = self.aggregates().histories
+        counts = histories.count_in(testing_statuses)
+        counts = counts[(histories.lengths > 0) & (counts > min_testing_count)]
+        return counts.tolist()
+
+    def _status_period_counts(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return status periods and how many issues spent each of them."""
+        if self.repo.pushdown:
+            return self._pushed_down_period_counts()
+        statuses, seconds = self.status_periods()
+        return statuses, seconds, np.ones(len(seconds), dtype=np.int64)
+
+    def _pushed_down_period_counts(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the repository's distinct status periods and their counts."""
+        if self._period_counts is None:
+            counts = self.repo.status_period_counts()
+            self._period_counts = (
+                np.array([status for status, _, _ in counts], dtype=object),
+                np.array([seconds for _, seconds, _ in counts], dtype=np.int64),
+                np.array([count for _, _, count in counts], dtype=np.int64),
+            )
+        return self._period_counts
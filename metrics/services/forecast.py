@@ -0,0 +1,232 @@
+"""Monte Carlo delivery forecasts from weekly throughput history."""
+
+from __future__ import annotations
+
+import math
+from datetime import UTC, date, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from metrics.consts import (
+    FORECAST_HISTORY_WEEKS,
+    FORECAST_PERCENTILES,
+    FORECAST_SEED,
+    FORECAST_SIMULATIONS,
+)
+
+from .base import BaseService
+from .rolling import DAYS_PER_WEEK
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .calculator import RollingThroughputCalculator
+
+# Most weeks drawn per simulation at once, which bounds the memory of a
+# batch to simulations * this many counts.
+MAX_BATCH_WEEKS = 52
+
+
+def simulate_weeks_to_finish(
+    history: np.ndarray,
+    items: int,
+    simulations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Return how many weeks each simulation takes to finish ``items``.
+
+    Every simulated week finishes as many items as a week drawn at
+    random from ``history``. Weeks are drawn for all unfinished
+    simulations at once, in batches sized to finish most of them, and
+    the first week whose running total reaches ``items`` is found with
+    one cumulative sum per batch.
+
+    Raises
+    ------
+        ValueError: If ``items`` is not positive, or no week of
+            ``history`` finished anything.
+
+    """
+    if items < 1:
+        msg = f"Items to forecast must be positive, got {items}"
+        raise ValueError(msg)
+    if not history.sum():
+        msg = "Cannot forecast from a throughput history without finished items"
+        raise ValueError(msg)
+    batch = min(math.ceil(2 * items / history.mean()), MAX_BATCH_WEEKS)
+    remaining = np.full(simulations, items, dtype=np.int64)
+    weeks = np.zeros(simulations, dtype=np.int64)
+    active = np.arange(simulations)
+    while len(active):
+        draws = history[rng.integers(len(history), size=(len(active), batch))]
+        reached = np.cumsum(draws, axis=1) >= remaining[active, None]
+        finished = reached[:, -1]
+        weeks[active[finished]] += reached[finished].argmax(axis=1) + 1
+        unfinished = active[~finished]
+        weeks[unfinished] += batch
+        remaining[unfinished] -= draws[~finished].sum(axis=1)
+        active = unfinished
+    return weeks
+
+
+def simulate_items_finished(
+    history: np.ndarray,
+    weeks: int,
+    simulations: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Return how many items each simulation finishes in ``weeks`` weeks."""
+    totals = np.zeros(simulations, dtype=np.int64)
+    for start in range(0, weeks, MAX_BATCH_WEEKS):
+        size = (simulations, min(MAX_BATCH_WEEKS, weeks - start))
+        totals += history[rng.integers(len(history), size=size)].sum(axis=1)
+    return totals
+
+
+class ForecastService(BaseService):
+    """Forecasts delivery by resampling recent weekly throughput.
+
+    Answers "when will these items be done" and "how many will be done
+    by then" with Monte Carlo simulation: each run replays weeks drawn
+    at random from the last complete weeks of throughput, including
+    weeks that finished nothing. Runs are seeded, so the same history
+    and seed give the same forecast.
+    """
+
+    def __init__(
+        self,
+        rolling_throughput_calculator: RollingThroughputCalculator,
+        simulations: int = FORECAST_SIMULATIONS,
+        history_weeks: int = FORECAST_HISTORY_WEEKS,
+        seed: int | None = FORECAST_SEED,
+    ) -> None:
+        """Initialize with the throughput calculator and simulation settings."""
+        self.rolling_throughput_calculator = rolling_throughput_calculator
+        self.simulations = simulations
+        self.history_weeks = history_weeks
+        self.seed = seed
+        super().__init__()
+
+    def weekly_throughput(self, start: date | None = None) -> pd.Series:
+        """Return the items finished in each complete week before ``start``.
+
+        The history covers the last :attr:`history_weeks` weeks before
+        the week of ``start`` (today by default), from the first week
+        anything was finished.
+
+        Raises
+        ------
+            ValueError: If nothing was finished before that week.
+
+        """
+        throughput = self.rolling_throughput_calculator.calculate(windows=(1,))
+        weekly = throughput["throughput_1w"]
+        first_week = _monday(start or _today())
+        weekly = weekly[weekly.index < pd.Timestamp(first_week)]
+        if weekly.empty:
+            msg = f"No throughput history before the week of {first_week}"
+            raise ValueError(msg)
+        weeks = pd.date_range(
+            end=pd.Timestamp(first_week - timedelta(days=DAYS_PER_WEEK)),
+            periods=self.history_weeks,
+            freq=f"{DAYS_PER_WEEK}D",
+            name="week",
+        )
+        weeks = weeks[weeks >= weekly.index[0]]
+        return weekly.reindex(weeks, fill_value=0).astype(np.int64)
+
+    def when(
+        self,
+        items: int,
+        percentiles: Sequence[float] = FORECAST_PERCENTILES,
+        start: date | None = None,
+    ) -> pd.DataFrame:
+        """Forecast when ``items`` more issues will be finished.
+
+        Args:
+        ----
+            items: The number of issues left to finish.
+            percentiles: Confidence levels, between 0 and 100.
+            start: The day work starts; today by default.
+
+        Returns:
+        -------
+            A frame with, per confidence level, the ``weeks`` needed and
+            the ``date`` by which that share of the runs finished.
+
+        """
+        start = start or _today()
+        self.logger.debug("Forecasting when %d items will be done...", items)
+        history = self.weekly_throughput(start).to_numpy()
+        weeks = simulate_weeks_to_finish(
+            history,
+            items,
+            self.simulations,
+            np.random.default_rng(self.seed),
+        )
+        needed = np.percentile(weeks, percentiles, method="inverted_cdf")
+        return pd.DataFrame(
+            {
+                "percentile": list(percentiles),
+                "weeks": needed.astype(np.int64),
+                "date": [
+                    start + timedelta(weeks=int(count)) for count in needed.tolist()
+                ],
+            },
+        )
+
+    def how_many(
+        self,
+        by: date,
+        percentiles: Sequence[float] = FORECAST_PERCENTILES,
+        start: date | None = None,
+    ) -> pd.DataFrame:
+        """Forecast how many issues will be finished by ``by``.
+
+        Only whole weeks between ``start`` and ``by`` are simulated.
+
+        Args:
+        ----
+            by: The day to forecast for.
+            percentiles: Confidence levels, between 0 and 100.
+            start: The day work starts; today by default.
+
+        Returns:
+        -------
+            A frame with, per confidence level, the ``items`` finished
+            in at least that share of the runs.
+
+        Raises:
+        ------
+            ValueError: If ``by`` is less than a week after ``start``.
+
+        """
+        start = start or _today()
+        weeks = (by - start).days // DAYS_PER_WEEK
+        if weeks < 1:
+            msg = f"Forecast date {by} must be at least a week after {start}"
+            raise ValueError(msg)
+        self.logger.debug("Forecasting items done by %s...", by)
+        history = self.weekly_throughput(start).to_numpy()
+        totals = simulate_items_finished(
+            history,
+            weeks,
+            self.simulations,
+            np.random.default_rng(self.seed),
+        )
+        # At least this many items are finished in ``percentile`` of the runs.
+        lower = 100 - np.asarray(percentiles, dtype=np.float64)
+        finished = np.percentile(totals, lower, method="inverted_cdf")
+        return pd.DataFrame(
+            {"percentile": list(percentiles), "items": finished.astype(np.int64)},
+        )
+
+
+def _today() -> date:
+    return datetime.now(UTC).date()
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
@@ -0,0 +1,476 @@
+"""Metric aggregates kept up to date issue by issue across refreshes."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import tempfile
+from collections import Counter
+from dataclasses import astuple, dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from metrics.consts import ONE_HOUR
+from metrics.repository.index import WEEK_FORMAT
+from metrics.repository.store import IssueStore
+
+from .binning import (
+    ONE_SECOND,
+    bin_durations,
+    group_by_label,
+    slots_of,
+    weighted_median,
+)
+from .engine import Completions, MetricsEngine
+from .sketch import DEFAULT_K, StatusSketches
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from metrics.entity import Issue
+    from metrics.repository import BaseIssuesRepository
+    from metrics.repository.base import IssueChanges
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES_FORMAT_VERSION = 1
+
+# Seconds per histogram bin. Metrics are exact for timeslots that are a
+# multiple of it, which the default hour and day timeslots are.
+DEFAULT_RESOLUTION = ONE_HOUR
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True, slots=True)
+class IssueContribution:
+    """What one issue adds to the metric histograms."""
+
+    cycle_seconds: int | None
+    lead_seconds: int | None
+    periods: tuple[tuple[str | None, int], ...]
+    week: str | None
+    history: tuple[str, ...]
+    # Wall-clock completion time in epoch microseconds, as for the trends.
+    finished_us: int | None = None
+
+    @classmethod
+    def of(cls, issue: Issue) -> IssueContribution:
+        """Return the contribution of ``issue``, in whole seconds."""
+        cycle_time, lead_time = issue.cycle_time, issue.lead_time
+        finished_at = issue.last_finish_status_at
+        return cls(
+            cycle_seconds=cycle_time // ONE_SECOND if cycle_time else None,
+            lead_seconds=lead_time // ONE_SECOND if lead_time else None,
+            periods=tuple(
+                (status, math.floor(period.total_seconds()))
+                for status, period in (issue.statuses_x_periods or {}).items()
+            ),
+            week=finished_at.strftime(WEEK_FORMAT) if finished_at else None,
+            history=tuple(issue.status_history or ()),
+            finished_us=(
+                (finished_at.replace(tzinfo=None) - _EPOCH) // _ONE_MICROSECOND
+                if finished_at
+                else None
+            ),
+        )
+
+    @classmethod
+    def from_row(cls, row: list) -> IssueContribution:
+        """Rebuild a contribution from a row of :meth:`to_row`."""
+        cycle, lead, periods, week, history, finished_us = row
+        return cls(
+            cycle_seconds=cycle,
+            lead_seconds=lead,
+            periods=tuple((status, seconds) for status, seconds in periods),
+            week=week,
+            history=tuple(history),
+            finished_us=finished_us,
+        )
+
+    def to_row(self) -> list:
+        """Return the contribution as a JSON-compatible row."""
+        return list(astuple(self))
+
+
+class IncrementalAggregates:
+    """Histograms of the aggregated metrics' inputs, with apply and retract.
+
+    Time in status is counted per status and bin of ``resolution``
+    seconds, and finished issues per week. The contribution of every
+    issue is kept by key, in the order issues were first counted, so an
+    issue that changes or disappears is retracted in O(1) and refreshing
+    the histograms after a sync costs O(changed issues). An issue that
+    changes keeps its place. :attr:`synced_at` records the repository
+    sync the aggregates describe, and :meth:`save` and :meth:`load` keep
+    them across runs.
+    """
+
+    def __init__(
+        self,
+        issues: Iterable[Issue] = (),
+        resolution: int = DEFAULT_RESOLUTION,
+        synced_at: datetime | None = None,
+    ) -> None:
+        """Start with the contributions of ``issues``."""
+        self.resolution = resolution
+        self.synced_at = synced_at
+        self.contributions: dict[str, IssueContribution] = {}
+        self.periods: dict[str | None, Counter[int]] = {}
+        self.weeks: Counter[str] = Counter()
+        for issue in issues:
+            self.apply(issue)
+
+    def __len__(self) -> int:
+        """Return the number of issues counted."""
+        return len(self.contributions)
+
+    def apply(self, issue: Issue) -> None:
+        """Count ``issue``, replacing its previous version if there is one."""
+        previous = self.contributions.get(issue.key)
+        if previous is not None:
+            self._count(previous, -1)
+        contribution = IssueContribution.of(issue)
+        self.contributions[issue.key] = contribution
+        self._count(contribution, 1)
+
+    def retract(self, key: str) -> None:
+        """Stop counting the issue ``key``, if it is counted."""
+        contribution = self.contributions.pop(key, None)
+        if contribution is not None:
+            self._count(contribution, -1)
+
+    def apply_changes(self, changes: IssueChanges) -> None:
+        """Apply the issues a repository refresh added, changed or removed."""
+        for key in changes.removed:
+            self.retract(key)
+        for issue in changes.updated:
+            self.apply(issue)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the aggregates as JSON-compatible data."""
+        return {
+            "version": AGGREGATES_FORMAT_VERSION,
+            "resolution": self.resolution,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            "contributions": [
+                [key, *contribution.to_row()]
+                for key, contribution in self.contributions.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> IncrementalAggregates:
+        """Rebuild the aggregates from :meth:`to_dict` data.
+
+        The histograms are counted again from the contributions.
+        """
+        synced_at = data["synced_at"]
+        aggregates = cls(
+            resolution=data["resolution"],
+            synced_at=datetime.fromisoformat(synced_at) if synced_at else None,
+        )
+        for key, *row in data["contributions"]:
+            contribution = IssueContribution.from_row(row)
+            aggregates.contributions[key] = contribution
+            aggregates._count(contribution, 1)
+        return aggregates
+
+    def save(self, path: str | Path) -> None:
+        """Atomically write the aggregates to a JSON file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.to_dict(), f)
+            Path(tmp_name).replace(path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def load(cls, path: str | Path) -> IncrementalAggregates | None:
+        """Read aggregates saved by :meth:`save`, or None if there are none."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with path.open() as f:
+                data = json.load(f)
+            if data.get("version") == AGGREGATES_FORMAT_VERSION:
+                return cls.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable metric aggregates %s", path)
+            return None
+        logger.warning("Ignoring metric aggregates %s with old format", path)
+        return None
+
+    def _count(self, contribution: IssueContribution, step: int) -> None:
+        for status, seconds in contribution.periods:
+            counter = self.periods.setdefault(status, Counter())
+            _step(counter, seconds // self.resolution, step)
+            if not counter:
+                del self.periods[status]
+        _step(self.weeks, contribution.week, step)
+
+
+def _step(counter: Counter, key: object, step: int) -> None:
+    """Add ``step`` to the count of ``key``, dropping counts that reach zero."""
+    if key is None:
+        return
+    count = counter[key] + step
+    if count:
+        counter[key] = count
+    else:
+        del counter[key]
+
+
+def _histogram(
+    counter: Counter[int],
+    resolution: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the seconds starting each bin of a histogram in order, and counts."""
+    bins = np.fromiter(counter.keys(), dtype=np.int64, count=len(counter))
+    counts = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+    order = np.argsort(bins)
+    return bins[order] * resolution, counts[order]
+
+
+class IncrementalMetricsEngine(MetricsEngine):
+    """A :class:`MetricsEngine` that catches up with syncs incrementally.
+
+    Instead of walking the issues, the engine keeps
+    :class:`IncrementalAggregates`. :meth:`refresh` refreshes the
+    repository and, when the repository reports what changed since the
+    sync the aggregates describe, applies just those issues, so metrics
+    after a small sync cost O(changed issues) to bring up to date.
+    Otherwise it counts every issue again. With a ``path``, the
+    aggregates are saved after every change and picked up by the next
+    run, which then only applies what its own sync fetched.
+
+    Per-issue results, such as the binned cycle times, come from the
+    issues' contributions in the order they were counted, as
+    :class:`MetricsEngine` lists them. The cumulative queue time and its
+    percentiles come from the histograms for timeslots that are a
+    multiple of the aggregates' resolution, and from the exact status
+    periods for other timeslots.
+    """
+
+    def __init__(
+        self,
+        repo: BaseIssuesRepository,
+        path: str | Path | None = None,
+        resolution: int = DEFAULT_RESOLUTION,
+    ) -> None:
+        """Initialize with the repository and where to keep the aggregates."""
+        super().__init__(repo)
+        self.path = None if path is None else Path(path)
+        self.resolution = resolution
+        self._state: IncrementalAggregates | None = None
+
+    def reset(self) -> None:
+        """Forget the histograms, so the next metric counts every issue."""
+        super().reset()
+        self._state = None
+
+    def refresh(self) -> None:
+        """Refresh the repository and apply what changed to the histograms."""
+        self.repo.refresh()
+        # Anything the base engine cached describes the previous issues.
+        super().reset()
+        if self._state is not None and self._catch_up(self._state):
+            self._save()
+        else:
+            self._state = None
+
+    def state(self) -> IncrementalAggregates:
+        """Return the histograms, counting every issue on first use.
+
+        Aggregates saved by an earlier run are used instead when the
+        repository's last sync continued from theirs.
+        """
+        if self._state is None:
+            state = None if self.path is None else IncrementalAggregates.load(self.path)
+            if state is None or not self._catch_up(state):
+                state = IncrementalAggregates(
+                    self.repo.iter_issues(),
+                    self.resolution,
+                    self.repo.synced_at,
+                )
+            self._state = state
+            self._save()
+        return self._state
+
+    def status_periods(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return statuses and int64 seconds of each issue's time per status."""
+        contributions = self.state().contributions.values()
+        periods = [period for c in contributions for period in c.periods]
+        return (
+            np.array([status for status, _ in periods], dtype=object),
+            np.array([seconds for _, seconds in periods], dtype=np.int64),
+        )
+
+    def status_sketches(self, k: int | None = None) -> StatusSketches:
+        """Return one sketch of the whole seconds spent in each status.
+
+        The sketches are built from the status periods, without walking
+        the issues.
+        """
+        statuses, seconds = self.status_periods()
+        sketches = StatusSketches(self.k if k is None else k)
+        for status, periods in group_by_label(statuses, seconds).items():
+            sketches.update(status, periods)
+        return sketches
+
+    def time_metric(self, metric_name: str, timeslot: int, limit: int) -> list[float]:
+        """Bin the ``cycle_time`` or ``lead_time`` of every issue."""
+        contributions = self.state().contributions.values()
+        seconds = [
+            c.cycle_seconds if metric_name == "cycle_time" else c.lead_seconds
+            for c in contributions
+        ]
+        seconds = np.array([s for s in seconds if s is not None], dtype=np.int64)
+        return bin_durations(seconds, timeslot, limit).tolist()
+
+    def cumulative_queue_time(self, timeslot: int, limit: int) -> pd.DataFrame:
+        """Return the median and count of time slots spent in each status."""
+        if not self._exact(timeslot):
+            return super().cumulative_queue_time(timeslot, limit)
+        state = self.state()
+        statuses, medians, totals = [], [], []
+        for status, counter in state.periods.items():
+            seconds, counts = _histogram(counter, state.resolution)
+            slots = slots_of(seconds, timeslot)
+            # Periods of one timeslot or less, or over the limit, are left out.
+            kept = (slots != 1) & (slots <= limit)
+            if not kept.any():
+                continue
+            statuses.append(status)
+            medians.append(weighted_median(slots[kept], counts[kept]))
+            totals.append(int(counts[kept].sum()))
+        res = pd.DataFrame(columns=["status", "median_hours", "count"])
+        res["status"] = statuses
+        res["median_hours"] = medians
+        res["count"] = totals
+        return res
+
+    def queue_time_percentiles(
+        self,
+        percentiles: Sequence[float],
+        timeslot: int,
+        k: int = DEFAULT_K,
+    ) -> pd.DataFrame:
+        """Return the count and exact percentiles (0-100) of time per status.
+
+        A percentile is the smallest period whose rank reaches it, as
+        for the sketches, rounded down to the aggregates' resolution;
+        ``k`` is only used for a timeslot off the resolution.
+        """
+        if not self._exact(timeslot):
+            return super().queue_time_percentiles(percentiles, timeslot, k)
+        state = self.state()
+        qs = np.asarray(percentiles, dtype=np.float64) / 100
+        rows = []
+        for status, counter in state.periods.items():
+            seconds, counts = _histogram(counter, state.resolution)
+            cumulative = np.cumsum(counts)
+            positions = np.searchsorted(cumulative, qs * cumulative[-1])
+            values = seconds[np.minimum(positions, len(seconds) - 1)] / timeslot
+            rows.append([status, int(cumulative[-1]), *values.tolist()])
+        columns = [f"p{percentile:g}" for percentile in percentiles]
+        return pd.DataFrame(rows, columns=["status", "count", *columns])
+
+    def throughput(self) -> dict[str, int]:
+        """Count finished issues per completion week."""
+        return dict(self.state().weeks)
+
+    def return_to_testing(
+        self,
+        testing_statuses: Iterable[str],
+        min_testing_count: int,
+    ) -> list[int]:
+        """Count testing statuses per issue, keeping counts over the minimum."""
+        wanted = {status.lower() for status in testing_statuses}
+        res = []
+        for contribution in self.state().contributions.values():
+            if not contribution.history:
+                continue
+            count = sum(status.lower() in wanted for status in contribution.history)
+            if count > min_testing_count:
+                res.append(count)
+        return res
+
+    def completions(self) -> Completions:
+        """Return the finished issues' completions, from their contributions."""
+        finished = [
+            contribution
+            for contribution in self.state().contributions.values()
+            if contribution.finished_us is not None
+        ]
+        return Completions(
+            times=np.array(
+                [contribution.finished_us for contribution in finished],
+                dtype=np.int64,
+            ).astype("datetime64[us]"),
+            cycle_seconds=_seconds_or_nan(c.cycle_seconds for c in finished),
+            lead_seconds=_seconds_or_nan(c.lead_seconds for c in finished),
+        )
+
+    def _status_period_counts(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the exact status periods, each spent by one issue."""
+        statuses, seconds = self.status_periods()
+        return statuses, seconds, np.ones(len(seconds), dtype=np.int64)
+
+    def _exact(self, timeslot: int) -> bool:
+        """Check whether the histograms bin ``timeslot`` exactly."""
+        return timeslot % self.state().resolution == 0
+
+    def _catch_up(self, state: IncrementalAggregates) -> bool:
+        """Bring ``state`` up to the repository's last sync, if it can be.
+
+        Returns whether ``state`` now describes the repository's issues.
+        """
+        changes = self.repo.changes
+        if changes is not None and changes.since == state.synced_at:
+            state.apply_changes(changes)
+            state.synced_at = self.repo.synced_at
+            return True
+        return state.synced_at is not None and state.synced_at == self.repo.synced_at
+
+    def _save(self) -> None:
+        if self.path is not None and self._state is not None:
+            self._state.save(self.path)
+
+
+def _seconds_or_nan(seconds: Iterable[int | None]) -> np.ndarray:
+    return np.array(
+        [np.nan if value is None else value for value in seconds],
+        dtype=np.float64,
+    )
+
+
+def open_metrics_engine(
+    repo: BaseIssuesRepository,
+    directory: str | None,
+    server: str | None,
+    jql: str | None,
+) -> MetricsEngine:
+    """Return the metrics engine for a run.
+
+    With a sync store in ``directory``, an
+    :class:`IncrementalMetricsEngine` keeps its aggregates next to the
+    stored issues of the query; otherwise a :class:`MetricsEngine`
+    walks the issues.
+    """
+    if not directory:
+        return MetricsEngine(repo)
+    issues_path = IssueStore(directory, server or "").path_for(jql or "")
+    return IncrementalMetricsEngine(repo, issues_path.with_suffix(".metrics.json"))
@@ -14,7 +14,11 @@ if TYPE_CHECKING:
         CycleTimeCalculator,
         LeadTimeCalculator,
         QueueTimeCalculator,
+        QueueTimePercentilesCalculator,
         ReturnToTestingCalculator,
+        RollingCycleTimeCalculator,
+        RollingLeadTimeCalculator,
+        RollingThroughputCalculator,
         ThroughputCalculator,
     )
 
@@ -22,7 +26,7 @@ if TYPE_CHECKING:
 class MetricsService(BaseService):
     """Orchestrates metric calculators to produce analytics results."""
 
-    def __init__(  # noqa: PLR0913
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         cycle_time_calculator: CycleTimeCalculator,
         lead_time_calculator: LeadTimeCalculator,
@@ -30,6 +34,11 @@ class MetricsService(BaseService):
         throughput_calculator: ThroughputCalculator,
         cumulative_queue_time_calculator: CumulativeQueueTimeCalculator,
         return_to_testing_calculator: ReturnToTestingCalculator,
+        *,
+        queue_time_percentiles_calculator: QueueTimePercentilesCalculator,
+        rolling_cycle_time_calculator: RollingCycleTimeCalculator,
+        rolling_lead_time_calculator: RollingLeadTimeCalculator,
+        rolling_throughput_calculator: RollingThroughputCalculator,
     ) -> None:
         """Initialize with all metric calculators."""
         self.cycle_time_calculator = cycle_time_calculator
@@ -38,6 +47,10 @@ class MetricsService(BaseService):
         self.throughput_calculator = throughput_calculator
         self.cumulative_queue_time_calculator = cumulative_queue_time_calculator
         self.return_to_testing_calculator = return_to_testing_calculator
+        self.queue_time_percentiles_calculator = queue_time_percentiles_calculator
+        self.rolling_cycle_time_calculator = rolling_cycle_time_calculator
+        self.rolling_lead_time_calculator = rolling_lead_time_calculator
+        self.rolling_throughput_calculator = rolling_throughput_calculator
         super().__init__()
 
     def get_cycle_time(self) -> list[float]:
@@ -69,3 +82,23 @@ class MetricsService(BaseService):
         """Calculate how often issues return to testing."""
         self.logger.debug("Calculating return to testing...")
         return self.return_to_testing_calculator.calculate()
+
+    def get_queue_time_percentiles(self) -> pd.DataFrame:
+        """Calculate queue time percentiles per status."""
+        self.logger.debug("Calculating queue time percentiles...")
+        return self.queue_time_percentiles_calculator.calculate()
+
+    def get_cycle_time_trend(self) -> pd.DataFrame:
+        """Calculate rolling cycle time percentiles by week."""
+        self.logger.debug("Calculating cycle time trend...")
+        return self.rolling_cycle_time_calculator.calculate()
+
+    def get_lead_time_trend(self) -> pd.DataFrame:
+        """Calculate rolling lead time percentiles by week."""
+        self.logger.debug("Calculating lead time trend...")
+        return self.rolling_lead_time_calculator.calculate()
+
+    def get_throughput_trend(self) -> pd.DataFrame:
+        """Calculate rolling throughput by week."""
+        self.logger.debug("Calculating throughput trend...")
+        return self.rolling_throughput_calculator.calculate()
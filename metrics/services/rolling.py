@@ -0,0 +1,132 @@
+"""Rolling-window aggregation of completions by week."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+DAYS_PER_WEEK = 7
+# Day 0 of datetime64, 1970-01-01, is a Thursday: three days after a Monday.
+_EPOCH_WEEKDAY = 3
+
+
+def week_starts(times: np.ndarray) -> np.ndarray:
+    """Return the Monday starting the week of each time, as datetime64[D]."""
+    days = times.astype("datetime64[D]")
+    return days - (days.astype(np.int64) + _EPOCH_WEEKDAY) % DAYS_PER_WEEK
+
+
+def trend_weeks(times: np.ndarray) -> pd.DatetimeIndex:
+    """Return every week from the first to the last of ``times``, by Monday."""
+    if not len(times):
+        return pd.DatetimeIndex([], name="week")
+    starts = week_starts(times)
+    return pd.DatetimeIndex(
+        np.arange(starts.min(), starts.max() + 1, DAYS_PER_WEEK),
+        name="week",
+    )
+
+
+def rolling_counts(times: np.ndarray, windows: Sequence[int]) -> pd.DataFrame:
+    """Return the mean number of ``times`` per week over trailing windows.
+
+    Times are counted per week once, and each window's total is the
+    difference of two cumulative sums, so every window of every week
+    costs O(1).
+
+    Args:
+    ----
+        times: Completion times as datetime64, in any order.
+        windows: Window lengths in weeks.
+
+    Returns:
+    -------
+        A frame indexed by week with a ``throughput_<n>w`` column per
+        window, NaN until a week has ``n`` weeks of history.
+
+    """
+    weeks = trend_weeks(times)
+    res = pd.DataFrame(index=weeks)
+    if not len(weeks):
+        return res.assign(**{f"throughput_{window}w": [] for window in windows})
+    starts = week_starts(times)
+    offsets = (starts - starts.min()).astype(np.int64) // DAYS_PER_WEEK
+    cumulative = np.concatenate(
+        ([0], np.cumsum(np.bincount(offsets, minlength=len(weeks)))),
+    )
+    for window in windows:
+        totals = np.full(len(weeks), np.nan)
+        totals[window - 1 :] = cumulative[window:] - cumulative[:-window]
+        res[f"throughput_{window}w"] = totals / window
+    return res
+
+
+def rolling_percentiles(
+    times: np.ndarray,
+    values: np.ndarray,
+    windows: Sequence[int],
+    percentiles: Sequence[float],
+) -> pd.DataFrame:
+    """Return percentiles of ``values`` over trailing windows of weeks.
+
+    Each value is repeated into the ``n`` windows it falls in, and the
+    repeats are sorted by window and value in one call, so every
+    percentile of every week is then picked by index without a Python
+    loop over the weeks. This trades memory for speed: a window of
+    ``n`` weeks holds ``n`` copies of the values. Percentiles
+    interpolate linearly, as :func:`numpy.percentile`.
+
+    Args:
+    ----
+        times: Completion times as datetime64, in any order.
+        values: The value of each completion; NaN values are skipped.
+        windows: Window lengths in weeks.
+        percentiles: Percentiles to report, between 0 and 100.
+
+    Returns:
+    -------
+        A frame indexed by week with a ``p<q>_<n>w`` column per
+        percentile and window, NaN until a week has ``n`` weeks of
+        history and where a window holds no values.
+
+    """
+    weeks = trend_weeks(times)
+    res = pd.DataFrame(index=weeks)
+    if not len(weeks):
+        return res.assign(
+            **{
+                f"p{percentile:g}_{window}w": []
+                for window in windows
+                for percentile in percentiles
+            },
+        )
+    starts = week_starts(times)
+    offsets = (starts - starts.min()).astype(np.int64) // DAYS_PER_WEEK
+    kept = ~np.isnan(values)
+    offsets, values = offsets[kept], values[kept]
+    quantiles = np.asarray(percentiles, dtype=float) / 100
+    for window in windows:
+        ends = (offsets[:, None] + np.arange(window)).ravel()
+        repeated = np.repeat(values, window)
+        in_range = ends < len(weeks)
+        ends, repeated = ends[in_range], repeated[in_range]
+        repeated = repeated[np.lexsort((repeated, ends))]
+        counts = np.bincount(ends, minlength=len(weeks))
+        firsts = np.cumsum(counts) - counts
+        positions = (counts[:, None] - 1) * quantiles
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        filled = counts > 0
+        result = np.full((len(weeks), len(percentiles)), np.nan)
+        below = repeated[(firsts[:, None] + lower)[filled]]
+        above = repeated[(firsts[:, None] + upper)[filled]]
+        result[filled] = below + (above - below) * (positions - lower)[filled]
+        result[: window - 1] = np.nan
+        for column, percentile in enumerate(percentiles):
+            res[f"p{percentile:g}_{window}w"] = result[:, column]
+    return res
@@ -0,0 +1,317 @@
+"""Mergeable quantile sketches for percentiles of large streams."""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+# Accuracy parameter of a sketch; memory grows and error shrinks with it.
+DEFAULT_K = 200
+MIN_K = 8
+
+# Shrink factor of compactor capacities from one level to the next lower.
+_CAPACITY_RATIO = 2 / 3
+_MIN_CAPACITY = 8
+
+
+class KLLSketch:
+    """Approximate quantiles of a stream of numbers in bounded memory.
+
+    A KLL sketch (Karnin, Lang and Liberty, 2016) keeps its items in
+    levels, where each item of level ``h`` stands for ``2**h`` inputs.
+    When the sketch is full, the lowest full level is sorted and every
+    other item, starting at a random offset, moves up one level. Level
+    capacities shrink geometrically from ``k`` at the top, so a sketch
+    retains at most about ``3 * k`` items plus eight per level, however
+    many numbers it has seen.
+
+    The rank of a quantile returned by the sketch is within about
+    ``1.65%`` of the count of the true rank with 99% confidence at the
+    default ``k = 200`` (the bound Apache DataSketches publishes for the
+    same algorithm); the error shrinks roughly as ``1 / k``. The
+    smallest and largest values are tracked exactly.
+
+    Sketches with the same ``k`` can be merged, and are serialized with
+    :meth:`to_dict` to plain JSON-compatible data.
+    """
+
+    __slots__ = ("_levels", "_max", "_min", "_rng", "_size", "count", "k")
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0) -> None:
+        """Create an empty sketch with accuracy ``k``.
+
+        Raises
+        ------
+            ValueError: If ``k`` is smaller than :data:`MIN_K`.
+
+        """
+        if k < MIN_K:
+            msg = f"Sketch accuracy k must be at least {MIN_K}, got {k}"
+            raise ValueError(msg)
+        self.k = k
+        self.count = 0
+        self._levels: list[list[float]] = [[]]
+        self._size = 0
+        self._min = math.inf
+        self._max = -math.inf
+        self._rng = random.Random(seed)  # noqa: S311
+
+    def __len__(self) -> int:
+        """Return the number of values seen."""
+        return self.count
+
+    def __repr__(self) -> str:
+        """Return the accuracy and size of the sketch."""
+        return (
+            f"{type(self).__name__}(k={self.k}, count={self.count},"
+            f" retained={self._size})"
+        )
+
+    @property
+    def retained(self) -> int:
+        """The number of items the sketch keeps in memory."""
+        return self._size
+
+    def update(self, value: float) -> None:
+        """Add one value."""
+        self.update_many((value,))
+
+    def update_many(self, values: Iterable[float] | np.ndarray) -> None:
+        """Add many values at once."""
+        array = np.asarray(
+            values if isinstance(values, np.ndarray) else list(values),
+            dtype=np.float64,
+        ).ravel()
+        if not len(array):
+            return
+        self.count += len(array)
+        self._min = min(self._min, float(array.min()))
+        self._max = max(self._max, float(array.max()))
+        # Compacting a level over its capacity is as accurate as compacting
+        # it at capacity, so a batch is added whole and compacted after.
+        self._levels[0].extend(array.tolist())
+        self._size += len(array)
+        while self._size >= self._max_size():
+            self._compress()
+
+    def update_weighted(
+        self,
+        values: Sequence[float] | np.ndarray,
+        weights: Sequence[int] | np.ndarray,
+    ) -> None:
+        """Add each value as many times as its positive integer weight.
+
+        A value of weight ``w`` is kept once at every level ``h`` whose
+        bit is set in ``w``, as compaction would have left it, so a
+        value repeated a million times costs at most twenty items.
+        """
+        array = np.asarray(values, dtype=np.float64).ravel()
+        counts = np.asarray(weights, dtype=np.int64).ravel()
+        if not len(array):
+            return
+        self.count += int(counts.sum())
+        self._min = min(self._min, float(array.min()))
+        self._max = max(self._max, float(array.max()))
+        level = 0
+        while counts.any():
+            items = array[(counts & 1).astype(bool)]
+            if level == len(self._levels):
+                self._levels.append([])
+            self._levels[level].extend(items.tolist())
+            self._size += len(items)
+            counts = counts >> 1
+            level += 1
+        while self._size >= self._max_size():
+            self._compress()
+
+    def merge(self, other: KLLSketch) -> None:
+        """Add everything ``other`` has seen to this sketch.
+
+        Raises
+        ------
+            ValueError: If the sketches have different accuracies.
+
+        """
+        if other.k != self.k:
+            msg = f"Cannot merge sketches with k={self.k} and k={other.k}"
+            raise ValueError(msg)
+        for level, items in enumerate(other._levels):
+            if level == len(self._levels):
+                self._levels.append([])
+            self._levels[level].extend(items)
+        self.count += other.count
+        self._size += other._size
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        while self._size >= self._max_size():
+            self._compress()
+
+    def quantile(self, q: float) -> float:
+        """Return the approximate ``q`` quantile, or NaN if nothing was seen."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> list[float]:
+        """Return the approximate quantiles ``qs``, each between 0 and 1.
+
+        The ``q`` quantile is the smallest retained value whose weighted
+        rank reaches ``q`` of the count; 0 and 1 give the exact minimum
+        and maximum.
+        """
+        if not self.count:
+            return [math.nan] * len(qs)
+        values, cumulative = self._sorted_weights()
+        positions = np.searchsorted(cumulative, np.asarray(qs) * self.count)
+        result = values[np.minimum(positions, len(values) - 1)].tolist()
+        return [
+            self._min if q <= 0 else self._max if q >= 1 else value
+            for q, value in zip(qs, result, strict=True)
+        ]
+
+    def items(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the retained values in order and the inputs each stands for."""
+        values = np.fromiter(
+            (item for items in self._levels for item in items),
+            dtype=np.float64,
+            count=self._size,
+        )
+        weights = np.repeat(
+            [2**level for level in range(len(self._levels))],
+            [len(items) for items in self._levels],
+        )
+        order = np.argsort(values, kind="stable")
+        return values[order], weights[order]
+
+    def rank(self, value: float) -> float:
+        """Return the approximate fraction of values less than or equal to ``value``."""
+        if not self.count:
+            return math.nan
+        values, cumulative = self._sorted_weights()
+        position = np.searchsorted(values, value, side="right")
+        return float(cumulative[position - 1]) / self.count if position else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the sketch as JSON-compatible data."""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self._min if self.count else None,
+            "max": self._max if self.count else None,
+            "levels": [list(items) for items in self._levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], seed: int = 0) -> KLLSketch:
+        """Rebuild a sketch from :meth:`to_dict` data."""
+        sketch = cls(data["k"], seed)
+        sketch.count = data["count"]
+        sketch._levels = [[float(item) for item in items] for items in data["levels"]]
+        sketch._size = sum(map(len, sketch._levels))
+        if sketch.count:
+            sketch._min = data["min"]
+            sketch._max = data["max"]
+        return sketch
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(_MIN_CAPACITY, math.ceil(self.k * _CAPACITY_RATIO**depth))
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def _compress(self) -> None:
+        """Halve the lowest full level into the level above it."""
+        for level, items in enumerate(self._levels):
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            items.sort()
+            # Compact an even number of items, so total weight is kept.
+            kept = [items.pop()] if len(items) % 2 else []
+            offset = self._rng.getrandbits(1)
+            self._levels[level + 1].extend(items[offset::2])
+            self._size -= len(items) // 2
+            items[:] = kept
+            return
+
+    def _sorted_weights(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the retained values in order and their cumulative weights."""
+        values, weights = self.items()
+        return values, np.cumsum(weights)
+
+
+@dataclass
+class StatusSketches:
+    """One :class:`KLLSketch` of time spent per status."""
+
+    k: int = DEFAULT_K
+    sketches: dict[str | None, KLLSketch] = field(default_factory=dict)
+
+    def update(self, status: str | None, values: Iterable[float] | np.ndarray) -> None:
+        """Add periods spent in ``status``."""
+        sketch = self.sketches.get(status)
+        if sketch is None:
+            sketch = self.sketches[status] = KLLSketch(self.k)
+        sketch.update_many(values)
+
+    def update_weighted(
+        self,
+        status: str | None,
+        values: Sequence[float] | np.ndarray,
+        weights: Sequence[int] | np.ndarray,
+    ) -> None:
+        """Add periods spent in ``status``, each repeated by its weight."""
+        sketch = self.sketches.get(status)
+        if sketch is None:
+            sketch = self.sketches[status] = KLLSketch(self.k)
+        sketch.update_weighted(values, weights)
+
+    def merge(self, other: StatusSketches) -> None:
+        """Add the periods of every status in ``other``."""
+        for status, sketch in other.sketches.items():
+            if status in self.sketches:
+                self.sketches[status].merge(sketch)
+            else:
+                self.sketches[status] = KLLSketch.from_dict(sketch.to_dict())
+
+    def to_frame(self, percentiles: Sequence[float], unit: float = 1) -> pd.DataFrame:
+        """Return the count and the given percentiles (0-100) per status.
+
+        Percentiles are divided by ``unit``, such as a timeslot for
+        sketches of seconds; scaling commutes with taking quantiles.
+        """
+        qs = [percentile / 100 for percentile in percentiles]
+        columns = [f"p{percentile:g}" for percentile in percentiles]
+        rows = [
+            [status, sketch.count, *(q / unit for q in sketch.quantiles(qs))]
+            for status, sketch in self.sketches.items()
+        ]
+        return pd.DataFrame(rows, columns=["status", "count", *columns])
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the sketches as JSON-compatible data."""
+        return {
+            "k": self.k,
+            "statuses": [
+                [status, sketch.to_dict()] for status, sketch in self.sketches.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StatusSketches:
+        """Rebuild the sketches from :meth:`to_dict` data."""
+        return cls(
+            data["k"],
+            {
+                status: KLLSketch.from_dict(sketch)
+                for status, sketch in data["statuses"]
+            },
+        )
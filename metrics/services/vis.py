@@ -101,6 +101,40 @@ class VisService(BaseService):
         finally:
             plt.clf()
 
+    def vis_trend(
+        self,
+        filename: str,
+        df: pd.DataFrame,
+        x_label: str = "week",
+        y_label: str = "y_label",
+    ) -> None:
+        """Render one line per column of a time-indexed frame and save to file."""
+        _, ax = plt.subplots()
+
+        for column in df.columns:
+            ax.plot(df.index, df[column], marker=".", label=column)
+
+        ax.legend()
+        plt.grid(visible=True, linestyle="--", alpha=0.7)
+
+        plt.xlabel(x_label)
+        plt.ylabel(y_label)
+        plt.xticks(rotation=45)
+
+        plt.tight_layout()
+
+        try:
+            plt.savefig(filename)
+        except Exception as err:
+            self.logger.exception(
+                "Failed to save figure to %s",
+                filename,
+            )
+            msg = f"Failed to save figure to {filename}: {err}"
+            raise RuntimeError(msg) from err
+        finally:
+            plt.clf()
+
     def vis_array_like(
         self,
         filename: str,
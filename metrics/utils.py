@@ -16,7 +16,10 @@ def get_jira_client(server: str, token: str) -> JIRA:
     """Create and return a cached JIRA client.
 
     Uses @cache to memoize the result so the same client object is
-    returned for identical (server, token) arguments.
+    returned for identical (server, token) arguments. The client's own
+    retries are disabled: page fetches are retried by the
+    :class:`~metrics.repository.scheduler.FetchScheduler`, which also
+    adapts its concurrency to throttling responses.
 
     Args:
     ----
@@ -33,7 +36,7 @@ def get_jira_client(server: str, token: str) -> JIRA:
 
     """
     try:
-        return JIRA(server=server, token_auth=token)
+        return JIRA(server=server, token_auth=token, max_retries=0)
     except JIRAError as err:
         logger.exception(
             "Failed to authenticate or connect to Jira",
@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
+import gzip
+import json
+import re
 import tempfile
-from datetime import datetime, timedelta
+import threading
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 
 import pytest
+from jira import JIRA
 
 from metrics.entity.issues import Issue
 
@@ -26,9 +33,14 @@ def dummy_issue():
 @pytest.fixture
 def dummy_repo(dummy_issue):
     class DummyRepo:
+        pushdown = False
+
         def all(self):
             return [dummy_issue]
 
+        def iter_issues(self):
+            return iter(self.all())
+
     return DummyRepo()
 
 
@@ -39,3 +51,245 @@ def temp_png_file():
     yield str(path)
     if path.exists():
         path.unlink()
+
+
+class FakeJiraHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.jira.connections += 1
+
+    def log_message(self, *_args):
+        pass
+
+    def do_GET(self):
+        jira = self.server.jira
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        jira.requests.append((url.path, params))
+        if url.path.startswith("/rest/api/2/issue/"):
+            self._send_changelog(url.path.split("/")[5:], params)
+            return
+        if jira.error_status:
+            self._send(jira.error_status, {"errorMessages": ["bad request"]})
+            return
+        if jira.throttle > 0:
+            jira.throttle -= 1
+            self._send(429, {"errorMessages": ["slow down"]}, {"Retry-After": "0"})
+            return
+        issues = filter_issues(jira.issues, params.get("jql", ""))
+        max_results = int(params.get("maxResults", 50))
+        if url.path == "/rest/api/3/search/jql":
+            if not jira.token_search:
+                self._send(404, {"errorMessages": ["not found"]})
+                return
+            start_at = int(params.get("nextPageToken", 0))
+            end = start_at + max_results
+            body = {"issues": issues[start_at:end], "isLast": end >= len(issues)}
+            if end < len(issues):
+                body["nextPageToken"] = str(end)
+            self._send(200, body)
+            return
+        start_at = int(params.get("startAt", 0))
+        body = {
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(issues),
+            "issues": issues[start_at : start_at + max_results],
+        }
+        self._send(200, body)
+
+    def do_POST(self):
+        jira = self.server.jira
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        jira.requests.append((self.path, body))
+        if not jira.bulk_changelog:
+            self._send(404, {"errorMessages": ["not found"]})
+            return
+        # One issue per response page, to exercise nextPageToken.
+        index = int(body.get("nextPageToken", 0))
+        key = body["issueIdsOrKeys"][index]
+        histories = [
+            {**history, "created": EPOCH_MS} for history in jira.changelogs[key]
+        ]
+        response = {
+            "issueChangeLogs": [
+                {"issueId": key.split("-")[1], "changeHistories": histories},
+            ],
+        }
+        if index + 1 < len(body["issueIdsOrKeys"]):
+            response["nextPageToken"] = str(index + 1)
+        self._send(200, response)
+
+    def _send_changelog(self, parts, params):
+        jira = self.server.jira
+        key = parts[0]
+        if parts[1:] == ["changelog"]:
+            if not jira.paged_changelog:
+                self._send(404, {"errorMessages": ["not found"]})
+                return
+            start_at = int(params["startAt"])
+            max_results = int(params["maxResults"])
+            values = jira.changelogs[key][start_at : start_at + max_results]
+            self._send(200, {"startAt": start_at, "values": values})
+            return
+        histories = jira.changelogs[key]
+        self._send(200, {"key": key, "changelog": {"histories": histories}})
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            data = gzip.compress(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _jql_date(match):
+    return datetime.strptime(match.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=UTC)
+
+
+def _created(issue):
+    return datetime.strptime(issue["fields"]["created"], "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+def filter_issues(issues, jql):
+    """Apply the JQL restrictions the repository adds to the user's query.
+
+    Issues are kept in creation order unless ordered by id.
+    """
+    # Keyset paging: id > n, over the ids of every project.
+    after = re.search(r"\bid > (\d+)", jql)
+    if after:
+        issues = [i for i in issues if int(i["id"]) > int(after.group(1))]
+    if jql.endswith("ORDER BY id ASC"):
+        issues = sorted(issues, key=lambda i: int(i["id"]))
+    # Created-date shards, in UTC.
+    created_from = re.search(r'created >= "([^"]+)"', jql)
+    if created_from:
+        issues = [i for i in issues if _created(i) >= _jql_date(created_from)]
+    created_to = re.search(r'created < "([^"]+)"', jql)
+    if created_to:
+        issues = [i for i in issues if _created(i) < _jql_date(created_to)]
+    return issues
+
+
+class FakeJira:
+    """A local HTTP server answering Jira search requests."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.requests = []
+        self.connections = 0
+        self.throttle = 0
+        self.error_status = None
+        self.changelogs = {}
+        self.bulk_changelog = True
+        self.paged_changelog = True
+        self.token_search = True
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeJiraHandler)
+        self.httpd.jira = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+
+def make_raw_issue(n, project="ISSUE", issue_id=None):
+    return {
+        "id": str(n if issue_id is None else issue_id),
+        "key": f"{project}-{n}",
+        "fields": {
+            "created": "2024-01-01T00:00:00.000+0000",
+            "status": {"name": "Done"},
+        },
+        "changelog": {
+            "startAt": 0,
+            "maxResults": 1,
+            "total": 1,
+            "histories": [
+                {
+                    "created": "2024-01-02T00:00:00.000+0000",
+                    "items": [
+                        {
+                            "field": "status",
+                            "fromString": "To Do",
+                            "toString": "Done",
+                        },
+                    ],
+                },
+            ],
+        },
+    }
+
+
+# 2024-01-03T00:00:00Z, as the bulk changelog endpoint reports timestamps.
+EPOCH_MS = 1704240000000
+
+
+def make_long_issue(n, total):
+    """Return a raw issue whose changelog is truncated, and its full histories.
+
+    The issue flips between "In Progress" and "Testing" and only reaches
+    "Done" in its last history, beyond the embedded first 100.
+    """
+    histories = [
+        {
+            "created": "2024-01-02T00:00:00.000+0000",
+            "items": [
+                {
+                    "field": "status",
+                    "fromString": "Testing" if i % 2 else "In Progress",
+                    "toString": "In Progress" if i % 2 else "Testing",
+                },
+            ],
+        }
+        for i in range(total - 1)
+    ]
+    histories.append(
+        {
+            "created": "2024-01-03T00:00:00.000+0000",
+            "items": [{"field": "status", "fromString": "Testing", "toString": "Done"}],
+        },
+    )
+    raw = make_raw_issue(n)
+    raw["id"] = str(n)
+    raw["changelog"] = {
+        "startAt": 0,
+        "maxResults": 100,
+        "total": total,
+        "histories": histories[:100],
+    }
+    return raw, histories
+
+
+@pytest.fixture
+def fake_jira():
+    jira = FakeJira([make_raw_issue(n) for n in range(1, 121)])
+    thread = threading.Thread(
+        target=jira.httpd.serve_forever,
+        kwargs={"poll_interval": 0.05},
+        daemon=True,
+    )
+    thread.start()
+    yield jira
+    jira.httpd.shutdown()
+    jira.httpd.server_close()
+
+
+@pytest.fixture
+def make_client():
+    def make(jira):
+        return JIRA(
+            server=jira.url,
+            token_auth="token",  # noqa: S106
+            get_server_info=False,
+            max_retries=0,
+        )
+
+    return make
@@ -0,0 +1,78 @@
+"""Tests for the asyncio Jira search backend."""
+
+from __future__ import annotations
+
+import pytest
+
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.jira import JiraIssuesRepository
+
+from .conftest import make_long_issue, make_raw_issue
+
+pytest.importorskip("aiohttp")
+
+from metrics.repository.aio import AsyncJiraAPIRepository
+
+
+def test_async_repository_fetches_all_pages(fake_jira):
+    pool_size = 2
+    api_repo = AsyncJiraAPIRepository(
+        fake_jira.url,
+        "token",
+        "project=TEST",
+        pool_size=pool_size,
+    )
+    keys = [item["key"] for item in api_repo.get_raw_data()]
+    assert keys == [f"ISSUE-{n}" for n in range(1, 121)]
+    assert fake_jira.connections <= pool_size
+    search_params = [params for _, params in fake_jira.requests]
+    assert all(params["jql"] == "project=TEST" for params in search_params)
+    assert sorted(int(p["startAt"]) for p in search_params[1:]) == [0, 50, 100]
+
+
+def test_async_repository_projects_fields(fake_jira):
+    api_repo = AsyncJiraAPIRepository(
+        fake_jira.url,
+        "token",
+        "project=TEST",
+        fields=["created", "status"],
+    )
+    list(api_repo.get_raw_data())
+    page_params = [params for _, params in fake_jira.requests[1:]]
+    assert all(params["fields"] == "created,status" for params in page_params)
+
+
+def test_async_repository_plugs_into_issues_repository(fake_jira):
+    api_repo = AsyncJiraAPIRepository(fake_jira.url, "token", "project=TEST")
+    repo = JiraIssuesRepository(api_repo, JiraDataConverter())
+    assert len(repo.all()) == len(fake_jira.issues)
+    assert repo.get("ISSUE-1").last_finish_status_at is not None
+
+
+def test_async_repository_retries_throttled_requests(fake_jira, monkeypatch):
+    monkeypatch.setattr("metrics.repository.scheduler.random.uniform", lambda _a, _b: 0)
+    fake_jira.throttle = 2
+    api_repo = AsyncJiraAPIRepository(fake_jira.url, "token", "project=TEST")
+    assert len(list(api_repo.get_raw_data())) == len(fake_jira.issues)
+
+
+def test_async_repository_reports_client_errors(fake_jira):
+    fake_jira.error_status = 400
+    api_repo = AsyncJiraAPIRepository(fake_jira.url, "token", "project=TEST")
+    with pytest.raises(RuntimeError, match="HTTP 400"):
+        list(api_repo.get_raw_data())
+    assert len(fake_jira.requests) == 1
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_async_repository_completes_changelogs(fake_jira, bulk):
+    total = 250
+    raw, histories = make_long_issue(1, total)
+    fake_jira.issues = [raw, make_raw_issue(2)]
+    fake_jira.changelogs = {raw["key"]: histories}
+    fake_jira.bulk_changelog = bulk
+    api_repo = AsyncJiraAPIRepository(fake_jira.url, "token", "project=TEST")
+    repo = JiraIssuesRepository(api_repo, JiraDataConverter())
+    assert repo.get("ISSUE-1").last_finish_status_at is not None
+    paths = {path for path, _ in fake_jira.requests}
+    assert ("/rest/api/2/issue/ISSUE-1/changelog" in paths) is not bulk
@@ -0,0 +1,180 @@
+"""Tests that the vectorized calculators match the per-issue loops."""
+
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.consts import CALC_LIMIT, ONE_DAY, ONE_HOUR
+from metrics.entity import Issue
+from metrics.services.binning import (
+    bin_durations,
+    group_by_label,
+    seconds_of,
+    to_seconds,
+)
+from metrics.services.calculator import (
+    CumulativeQueueTimeCalculator,
+    CycleTimeCalculator,
+    LeadTimeCalculator,
+    QueueTimeCalculator,
+)
+from metrics.services.engine import MetricsEngine
+
+SEED = 20
+ISSUE_COUNT = 500
+STATUSES = ("To Do", "In Progress", "Review", "Done")
+MAX_HOURS = 24 * 60
+# Sketch accuracy far below the periods per status, so sketches compact.
+SMALL_K = 8
+
+
+def _loop_time_metric(issues, metric_name, timeslot, limit):
+    res = []
+    for issue in issues:
+        metric_value = getattr(issue, metric_name)
+        if metric_value:
+            res.append(min(max(1, metric_value.total_seconds() // timeslot), limit))
+    return res
+
+
+def _loop_queue_time(issues, timeslot, limit):
+    tmp = defaultdict(list)
+    for issue in issues:
+        for status, td in issue.statuses_x_periods.items():
+            tmp[status].append(min(max(1, td.total_seconds() // timeslot), limit))
+    return dict(tmp)
+
+
+def _loop_cumulative_queue_time(issues, timeslot, limit):
+    tmp = defaultdict(list)
+    for issue in issues:
+        for status, td in issue.statuses_x_periods.items():
+            period_in_status = max(1, td.total_seconds() // timeslot)
+            if period_in_status == 1 or period_in_status > limit:
+                continue
+            tmp[status].append(period_in_status)
+    res = pd.DataFrame(columns=["status", "median_hours", "count"])
+    res["status"] = list(tmp.keys())
+    res["median_hours"] = [np.median(periods) for periods in tmp.values()]
+    res["count"] = [len(periods) for periods in tmp.values()]
+    return res
+
+
+def _random_issues(rng):
+    issues = []
+    for n in range(ISSUE_COUNT):
+        created_at = datetime(2024, 1, 1) + timedelta(seconds=int(rng.integers(10**6)))
+        # Some issues are unfinished, finished at once or within the second.
+        finishes = [
+            None,
+            timedelta(0),
+            timedelta(microseconds=500),
+            timedelta(seconds=rng.uniform(0, MAX_HOURS * ONE_HOUR)),
+        ]
+        finish = finishes[rng.integers(len(finishes))]
+        statuses = rng.permutation(STATUSES)[: rng.integers(len(STATUSES))]
+        issues.append(
+            Issue(
+                key=f"ISSUE-{n}",
+                status="Done",
+                created_at=created_at,
+                first_status_change_at=created_at + timedelta(hours=1),
+                last_finish_status_at=None if finish is None else created_at + finish,
+                statuses_x_periods={
+                    str(status): timedelta(hours=rng.uniform(0, MAX_HOURS))
+                    for status in statuses
+                },
+            ),
+        )
+    return issues
+
+
+class ListRepo:
+    pushdown = False
+
+    def __init__(self, issues):
+        self.issues = issues
+
+    def all(self):
+        return self.issues
+
+    def iter_issues(self):
+        return iter(self.issues)
+
+
+class PushdownListRepo(ListRepo):
+    pushdown = True
+
+    def status_period_counts(self):
+        counts = Counter(
+            (status, int(period.total_seconds()))
+            for issue in self.issues
+            for status, period in issue.statuses_x_periods.items()
+        )
+        return [(status, seconds, count) for (status, seconds), count in counts.items()]
+
+
+@pytest.fixture
+def issues():
+    return _random_issues(np.random.default_rng(SEED))
+
+
+@pytest.mark.parametrize(("timeslot", "limit"), [(ONE_DAY, CALC_LIMIT), (ONE_HOUR, 0)])
+def test_time_metrics_match_loop(issues, timeslot, limit):
+    repo = ListRepo(issues)
+    for calculator, metric_name in (
+        (CycleTimeCalculator, "cycle_time"),
+        (LeadTimeCalculator, "lead_time"),
+    ):
+        result = calculator(repo).calculate(timeslot, limit)
+        assert result == _loop_time_metric(issues, metric_name, timeslot, limit)
+
+
+def test_queue_time_matches_loop(issues):
+    result = QueueTimeCalculator(ListRepo(issues)).calculate()
+    expected = _loop_queue_time(issues, ONE_DAY, CALC_LIMIT)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_cumulative_queue_time_matches_loop(issues):
+    result = CumulativeQueueTimeCalculator(ListRepo(issues)).calculate()
+    pd.testing.assert_frame_equal(
+        result,
+        _loop_cumulative_queue_time(issues, ONE_HOUR, 1000),
+    )
+
+
+@pytest.mark.parametrize("repo_class", [ListRepo, PushdownListRepo])
+def test_cumulative_queue_time_is_exact_beyond_sketch_size(issues, repo_class):
+    engine = MetricsEngine(repo_class(issues), k=SMALL_K)
+    result = CumulativeQueueTimeCalculator(engine.repo, engine=engine).calculate()
+    expected = _loop_cumulative_queue_time(issues, ONE_HOUR, 1000)
+    assert (expected["count"] > SMALL_K).all()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_cumulative_queue_time_without_periods():
+    result = CumulativeQueueTimeCalculator(ListRepo([])).calculate()
+    pd.testing.assert_frame_equal(
+        result,
+        _loop_cumulative_queue_time([], ONE_HOUR, 1000),
+    )
+
+
+def test_binning_helpers():
+    seconds = seconds_of(
+        [None, timedelta(0), timedelta(seconds=-5), timedelta(seconds=90.5)],
+    )
+    assert seconds.tolist() == [-5, 90]
+    assert bin_durations(seconds, 60, 10).tolist() == [1.0, 1.0]
+    assert to_seconds([1.5, -0.5]).tolist() == [1, -1]
+    groups = group_by_label(["b", "a", "b", None], np.arange(4))
+    assert list(groups) == ["b", "a", None]
+    assert groups["b"].tolist() == [0, 2]
+    assert group_by_label([], np.arange(0)) == {}
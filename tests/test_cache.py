@@ -0,0 +1,138 @@
+"""Tests for the raw Jira response cache."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from metrics.repository.cache import RawResponseCache, open_response_cache
+from metrics.repository.jira import JiraAPIRepository
+
+PAGES = [
+    [{"key": "ISSUE-1"}, {"key": "ISSUE-2"}],
+    [{"key": "ISSUE-3"}],
+]
+
+
+def test_cache_replays_written_pages(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    assert not cache.is_fresh("project=A")
+    assert list(cache.write("project=A", PAGES)) == PAGES
+    assert cache.is_fresh("project=A")
+    assert list(cache.read("project=A")) == [*PAGES[0], *PAGES[1]]
+    assert cache.page_path("project=A", 0).name.endswith(".jsonl.gz")
+
+
+def test_cache_incomplete_write_is_not_replayed(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    pages = cache.write("project=A", PAGES)
+    next(pages)
+    assert not cache.is_fresh("project=A")
+    with pytest.raises(RuntimeError, match="No cached Jira response"):
+        list(cache.read("project=A"))
+
+
+def test_cache_interrupted_refetch_is_not_replayed(tmp_path):
+    list(
+        RawResponseCache(tmp_path, "https://jira.example.com").write("project=A", PAGES)
+    )
+    offline = RawResponseCache(tmp_path, "https://jira.example.com", offline=True)
+    pages = offline.write("project=A", [[{"key": "ISSUE-4"}], *PAGES])
+    next(pages)
+    pages.close()
+    assert not offline.is_fresh("project=A")
+    with pytest.raises(RuntimeError, match="No cached Jira response"):
+        list(offline.read("project=A"))
+
+
+def test_cache_expires_after_ttl(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com", ttl=60)
+    list(cache.write("project=A", PAGES))
+    manifest = cache.manifest_path("project=A")
+    manifest.write_text(
+        manifest.read_text().replace('"fetched_at": ', '"fetched_at": -1'),
+    )
+    assert not cache.is_fresh("project=A")
+    offline = RawResponseCache(tmp_path, "https://jira.example.com", offline=True)
+    assert offline.is_fresh("project=A")
+
+
+def test_cache_key_includes_server(tmp_path):
+    first = RawResponseCache(tmp_path, "https://one.example.com")
+    second = RawResponseCache(tmp_path, "https://two.example.com")
+    list(first.write("project=A", PAGES))
+    assert not second.is_fresh("project=A")
+
+
+def test_open_response_cache_disabled_without_directory(tmp_path):
+    assert open_response_cache(None, "https://jira.example.com") is None
+    ttl = 5
+    cache = open_response_cache(str(tmp_path), "https://jira.example.com", ttl)
+    assert cache.ttl == ttl
+
+
+def test_jiraapirepository_uses_fresh_cache(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    list(cache.write("project=A", PAGES))
+    jira = MagicMock()
+    repo = JiraAPIRepository(jira, "project=A", cache=cache)
+    assert [item["key"] for item in repo.get_raw_data()] == [
+        "ISSUE-1",
+        "ISSUE-2",
+        "ISSUE-3",
+    ]
+    jira.search_issues.assert_not_called()
+
+
+def test_jiraapirepository_offline_without_cache_fails(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com", offline=True)
+    repo = JiraAPIRepository(None, "project=A", cache=cache)
+    with pytest.raises(RuntimeError, match="Offline mode"):
+        list(repo.get_raw_data())
+
+
+def test_jiraapirepository_populates_cache(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    jira = MagicMock()
+    jira.search_issues.return_value = {"total": 2, "issues": PAGES[0]}
+    repo = JiraAPIRepository(jira, "project=A", cache=cache)
+    assert list(repo.get_raw_data()) == PAGES[0]
+    assert list(cache.read("project=A")) == PAGES[0]
+    assert cache.is_fresh("project=A")
+
+
+def test_cache_key_includes_field_projection(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    list(cache.write("project=A", PAGES, ["created", "status"]))
+    assert cache.is_fresh("project=A", ["status", "created"])
+    assert not cache.is_fresh("project=A")
+
+
+def test_jiraapirepository_sync_replays_cached_base_query(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    synced_at = datetime.now(UTC) - timedelta(minutes=1)
+    list(cache.write("project=A", PAGES))
+    jira = MagicMock()
+    repo = JiraAPIRepository(jira, "project=A", cache=cache)
+    assert len(list(repo.get_raw_data(updated_since=synced_at))) == len(
+        [*PAGES[0], *PAGES[1]],
+    )
+    jira.search_issues.assert_not_called()
+
+
+def test_jiraapirepository_sync_newer_than_cache_is_not_cached(tmp_path):
+    cache = RawResponseCache(tmp_path, "https://jira.example.com")
+    list(cache.write("project=A", PAGES))
+    jira = MagicMock()
+    jira.search_issues.return_value = {"total": 1, "issues": [{"key": "ISSUE-4"}]}
+    repo = JiraAPIRepository(jira, "project=A", cache=cache)
+    synced_at = datetime.now(UTC) + timedelta(minutes=1)
+    assert list(repo.get_raw_data(updated_since=synced_at)) == [{"key": "ISSUE-4"}]
+    assert "updated >=" in jira.search_issues.call_args.args[0]
+    # The delta did not replace the cached base query.
+    assert list(cache.read("project=A")) == [*PAGES[0], *PAGES[1]]
+    offline = RawResponseCache(tmp_path, "https://jira.example.com", offline=True)
+    repo = JiraAPIRepository(None, "project=A", cache=offline)
+    assert list(repo.get_raw_data(updated_since=synced_at)) == []
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import pandas as pd
 
+from metrics.repository.converter import JiraDataConverter
 from metrics.services.calculator import (
     CumulativeQueueTimeCalculator,
     CycleTimeCalculator,
@@ -11,6 +12,7 @@ from metrics.services.calculator import (
     QueueTimeCalculator,
     ReturnToTestingCalculator,
     ThroughputCalculator,
+    required_fields,
 )
 
 
@@ -54,3 +56,18 @@ def test_return_to_testing_calculator(dummy_repo):
     calculator = ReturnToTestingCalculator(dummy_repo)
     result = calculator.calculate()
     assert isinstance(result, list)
+
+
+def test_required_fields_is_union_of_consumers():
+    class AssigneeCalculator(CycleTimeCalculator):
+        required_fields = ("assignee",)
+
+    assert required_fields(JiraDataConverter, CycleTimeCalculator) == [
+        "created",
+        "status",
+    ]
+    assert required_fields(JiraDataConverter, AssigneeCalculator) == [
+        "assignee",
+        "created",
+        "status",
+    ]
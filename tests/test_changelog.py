@@ -0,0 +1,92 @@
+"""Tests for completing truncated changelogs."""
+
+from __future__ import annotations
+
+import pytest
+
+from metrics.repository.changelog import (
+    ChangelogCompleter,
+    collect_bulk_response,
+    is_truncated,
+)
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.jira import JiraAPIRepository
+from metrics.repository.scheduler import FetchScheduler
+
+from .conftest import EPOCH_MS, make_long_issue, make_raw_issue
+
+LONG_TOTAL = 250
+
+
+@pytest.fixture
+def long_jira(fake_jira):
+    raw, histories = make_long_issue(1, LONG_TOTAL)
+    fake_jira.issues = [raw, make_raw_issue(2)]
+    fake_jira.changelogs = {raw["key"]: histories}
+    return fake_jira
+
+
+def changelog_requests(fake_jira):
+    return [path for path, _ in fake_jira.requests if "/search" not in path]
+
+
+def test_is_truncated():
+    raw, _ = make_long_issue(1, LONG_TOTAL)
+    assert is_truncated(raw)
+    assert not is_truncated(make_raw_issue(2))
+    assert not is_truncated({"key": "ISSUE-3"})
+
+
+def test_collect_bulk_response_converts_epoch_timestamps():
+    histories = {}
+    next_page = collect_bulk_response(
+        {
+            "issueChangeLogs": [
+                {"issueId": "1", "changeHistories": [{"created": EPOCH_MS}]},
+            ],
+            "nextPageToken": "abc",
+        },
+        histories,
+    )
+    assert next_page == "abc"
+    assert histories == {"1": [{"created": "2024-01-03T00:00:00.000+0000"}]}
+
+
+def test_completer_uses_bulk_endpoint(make_client, long_jira):
+    completer = ChangelogCompleter(make_client(long_jira), FetchScheduler())
+    page = completer.complete([dict(issue) for issue in long_jira.issues])
+    changelog = page[0]["changelog"]
+    assert changelog["total"] == len(changelog["histories"]) == LONG_TOTAL
+    assert changelog_requests(long_jira) == ["/rest/api/3/changelog/bulkfetch"]
+    issue = JiraDataConverter().convert_data_to_issue(page[0])
+    assert issue.last_finish_status_at is not None
+
+
+def test_completer_falls_back_to_paged_endpoint(make_client, long_jira):
+    long_jira.bulk_changelog = False
+    completer = ChangelogCompleter(make_client(long_jira), FetchScheduler())
+    page = completer.complete([dict(issue) for issue in long_jira.issues])
+    assert page[0]["changelog"]["histories"] == long_jira.changelogs["ISSUE-1"]
+    paged = [p for p in changelog_requests(long_jira) if p.endswith("/changelog")]
+    assert len(paged) == len(range(0, LONG_TOTAL, 100))
+    assert not completer.use_bulk
+
+    long_jira.requests.clear()
+    completer.complete([dict(issue) for issue in long_jira.issues])
+    assert "/rest/api/3/changelog/bulkfetch" not in changelog_requests(long_jira)
+
+
+def test_completer_falls_back_to_issue_endpoint(make_client, long_jira):
+    long_jira.bulk_changelog = False
+    long_jira.paged_changelog = False
+    completer = ChangelogCompleter(make_client(long_jira), FetchScheduler())
+    page = completer.complete([dict(issue) for issue in long_jira.issues])
+    assert page[0]["changelog"]["histories"] == long_jira.changelogs["ISSUE-1"]
+    assert changelog_requests(long_jira)[-1] == "/rest/api/2/issue/ISSUE-1"
+
+
+def test_api_repository_completes_changelogs(make_client, long_jira):
+    repo = JiraAPIRepository(make_client(long_jira), "project=TEST")
+    raw = list(repo.get_raw_data())
+    assert len(raw[0]["changelog"]["histories"]) == LONG_TOTAL
+    assert len(raw[1]["changelog"]["histories"]) == 1
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from click.testing import CliRunner
 
-from metrics.__main__ import cli
+from metrics.__main__ import cli, validate_config
 
 
 def test_cli_missing_config():
@@ -12,3 +12,97 @@ def test_cli_missing_config():
     result = runner.invoke(cli, [])
     assert result.exit_code != 0
     assert "Error" in result.output or "error" in result.output
+
+
+def test_cli_rejects_zero_options():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "--jira-server",
+            "https://jira.example.com",
+            "--jira-token",
+            "token",
+            "--jira-jql",
+            "project=TEST",
+            "--max-in-flight",
+            "0",
+            "--workers",
+            "0",
+        ],
+    )
+    assert result.exit_code == 1
+    assert "Max in-flight requests must be a positive integer." in result.output
+    assert "Converter workers must be a positive integer." in result.output
+
+
+def test_validate_config_rejects_bad_max_in_flight():
+    cfg = {
+        "server": "https://jira.example.com",
+        "token": "token",
+        "jql": "project=TEST",
+        "max_in_flight": "0",
+    }
+    assert validate_config(cfg) == [
+        "Max in-flight requests must be a positive integer.",
+    ]
+    cfg["max_in_flight"] = "4"
+    assert validate_config(cfg) == []
+
+
+def test_validate_config_offline_needs_cache_not_token():
+    cfg = {
+        "server": "https://jira.example.com",
+        "jql": "project=TEST",
+    }
+    assert validate_config(cfg, offline=True) == [
+        (
+            "Offline mode needs a response cache."
+            " Set --cache-dir, METRICS_CACHE_DIR, or config file."
+        ),
+    ]
+    cfg["cache_dir"] = "cache"
+    assert validate_config(cfg, offline=True) == []
+
+
+def test_validate_config_rejects_unknown_pagination():
+    cfg = {
+        "server": "https://jira.example.com",
+        "token": "token",
+        "jql": "project=TEST",
+        "pagination": "cursor",
+    }
+    assert validate_config(cfg) == [
+        "Pagination must be one of: auto, token, keyset, offset, sharded.",
+    ]
+    cfg["pagination"] = "keyset"
+    assert validate_config(cfg) == []
+
+
+def test_validate_config_rejects_columnar_with_sync_store():
+    cfg = {
+        "server": "https://jira.example.com",
+        "token": "token",
+        "jql": "project=TEST",
+        "sync_store": "store",
+    }
+    assert validate_config(cfg, columnar=True) == [
+        "Columnar mode cannot be combined with --sync-store.",
+    ]
+    assert validate_config(cfg) == []
+
+
+def test_validate_config_checks_forecast_options():
+    cfg = {
+        "server": "https://jira.example.com",
+        "token": "token",
+        "jql": "project=TEST",
+        "forecast_items": "-3",
+        "forecast_date": "next friday",
+    }
+    assert validate_config(cfg) == [
+        "Forecast items must be a positive integer.",
+        "Forecast date must be a date such as 2025-06-30.",
+    ]
+    cfg.update(forecast_items="30", forecast_date="2025-06-30")
+    assert validate_config(cfg) == []
@@ -57,3 +57,36 @@ def test_jiradataconverter_parse_changelog_item():
     assert "To Do" in result["statuses_x_periods"]
     assert "user1" in result["doers_x_periods"]
     assert result["status_history"] == ["created", "In Progress"]
+
+
+def test_jiradataconverter_orders_histories_by_time():
+    converter = JiraDataConverter()
+    created_at = datetime(2024, 1, 1, 0, 0, 0, tzinfo=UTC)
+    changelog = {
+        "histories": [
+            {
+                # 2024-01-02T00:30Z, sorts first as a raw string.
+                "created": "2024-01-02T00:30:00.000+0000",
+                "items": [
+                    {"field": "status", "fromString": "Testing", "toString": "Done"},
+                ],
+            },
+            {
+                # 2024-01-01T23:00Z.
+                "created": "2024-01-02T01:00:00.000+0200",
+                "items": [
+                    {
+                        "field": "status",
+                        "fromString": "To Do",
+                        "toString": "Testing",
+                    },
+                ],
+            },
+        ],
+    }
+    result = converter._parse_changelog_item(  # noqa: SLF001
+        created_at,
+        changelog,
+    )
+    assert result["status_history"] == ["created", "Testing", "Done"]
+    assert result["last_finish_status_at"] == datetime(2024, 1, 2, 0, 30, tzinfo=UTC)
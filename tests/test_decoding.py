@@ -0,0 +1,83 @@
+"""Tests for typed decoding of search responses."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from metrics.repository import decoding
+from metrics.repository.decoding import can_decode, decode_search_response
+from metrics.repository.pagination import iter_cursor_pages
+
+from .conftest import make_raw_issue
+
+FIELDS = ["created", "status"]
+
+
+def _noisy(raw):
+    """Add fields the converter does not read to a raw issue."""
+    author = {"accountId": "abc", "avatarUrls": {"48x48": "https://a/48.png"}}
+    return {
+        **raw,
+        "id": "10001",
+        "self": "https://jira.example.com/rest/api/2/issue/10001",
+        "fields": {**raw["fields"], "summary": "Summary", "labels": ["a", "b"]},
+        "changelog": {
+            **raw["changelog"],
+            "histories": [
+                {
+                    **history,
+                    "id": "1",
+                    "author": author,
+                    "items": [
+                        {**item, "fieldtype": "jira", "from": "1", "to": "2"}
+                        for item in history["items"]
+                    ],
+                }
+                for history in raw["changelog"]["histories"]
+            ],
+        },
+    }
+
+
+def test_decode_search_response_skips_unused_fields():
+    pytest.importorskip("msgspec")
+    raw = make_raw_issue(1)
+    body = json.dumps({"total": 1, "issues": [_noisy(raw)]}).encode()
+    assert decode_search_response(body) == {
+        "total": 1,
+        "issues": [{**raw, "id": "10001"}],
+    }
+
+
+def test_decode_search_response_rejects_unexpected_shape():
+    pytest.importorskip("msgspec")
+    with pytest.raises(ValueError, match="Unexpected Jira search response"):
+        decode_search_response(b'{"issues": [{"key": 1}]}')
+
+
+def test_can_decode_needs_converter_fields_only(monkeypatch):
+    pytest.importorskip("msgspec")
+    assert can_decode(FIELDS)
+    assert not can_decode([*FIELDS, "summary"])
+    assert not can_decode(None)
+    monkeypatch.setattr(decoding, "_decoder", None)
+    assert not can_decode(FIELDS)
+
+
+def test_token_pagination_decodes_typed(make_client, fake_jira):
+    fake_jira.issues = [_noisy(make_raw_issue(n)) for n in range(1, 4)]
+    pages = list(
+        iter_cursor_pages(
+            make_client(fake_jira),
+            "project=TEST",
+            fields=FIELDS,
+            mode="token",
+        ),
+    )
+    issues = [item for page in pages for item in page]
+    assert [item["key"] for item in issues] == ["ISSUE-1", "ISSUE-2", "ISSUE-3"]
+    assert all(item["fields"]["status"]["name"] == "Done" for item in issues)
+    if can_decode(FIELDS):
+        assert "summary" not in issues[0]["fields"]
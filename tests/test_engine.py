@@ -0,0 +1,136 @@
+"""Tests for the single-pass metrics engine."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from metrics.entity import Issue
+from metrics.services.calculator import (
+    CumulativeQueueTimeCalculator,
+    CycleTimeCalculator,
+    LeadTimeCalculator,
+    QueueTimeCalculator,
+    ReturnToTestingCalculator,
+    ThroughputCalculator,
+)
+from metrics.services.engine import MetricsEngine
+
+CALCULATORS = (
+    CycleTimeCalculator,
+    LeadTimeCalculator,
+    QueueTimeCalculator,
+    ThroughputCalculator,
+    CumulativeQueueTimeCalculator,
+    ReturnToTestingCalculator,
+)
+
+
+def _issue(n, history):
+    created_at = datetime(2024, 1, n, tzinfo=UTC)
+    return Issue(
+        key=f"ISSUE-{n}",
+        status="Done",
+        created_at=created_at,
+        first_status_change_at=created_at + timedelta(hours=n),
+        last_finish_status_at=created_at + timedelta(days=n),
+        status_history=history,
+        statuses_x_periods={"Testing": timedelta(hours=n * 3)},
+    )
+
+
+ISSUES = [
+    _issue(1, ["created", "Testing", "In Progress", "TESTING", "Done"]),
+    _issue(2, ["created", "QA", "Testing", "Done"]),
+    _issue(3, None),
+    _issue(4, ["created", "testing", "Testing", "testing"]),
+]
+
+
+class CountingRepo:
+    def __init__(self, issues, *, pushdown=False):
+        self.issues = issues
+        self.pushdown = pushdown
+        self.walks = 0
+
+    def iter_issues(self):
+        self.walks += 1
+        return list(self.issues)
+
+    def status_period_counts(self):
+        return [("Pushed", 7200, 1)]
+
+    def finished_per_week(self):
+        return {"pushed": 1}
+
+
+def _loop_return_to_testing(issues, testing_statuses, min_testing_count):
+    testing_statuses = [s.lower() for s in testing_statuses]
+    res = []
+    for issue in issues:
+        if issue.status_history:
+            testing_count = sum(
+                1
+                for status in issue.status_history
+                if status.lower() in testing_statuses
+            )
+            if testing_count > min_testing_count:
+                res.append(testing_count)
+    return res
+
+
+def test_calculators_share_one_traversal():
+    repo = CountingRepo(ISSUES)
+    engine = MetricsEngine(repo)
+    for calculator in CALCULATORS:
+        calculator(repo, engine=engine).calculate()
+    assert repo.walks == 1
+    engine.reset()
+    CycleTimeCalculator(repo, engine=engine).calculate()
+    assert repo.walks == len(("first", "after reset"))
+
+
+def test_calculators_without_engine_walk_on_their_own():
+    repo = CountingRepo(ISSUES)
+    CycleTimeCalculator(repo).calculate()
+    LeadTimeCalculator(repo).calculate()
+    assert repo.walks == len(("cycle", "lead"))
+
+
+@pytest.mark.parametrize(
+    ("testing_statuses", "min_testing_count"),
+    [(["testing"], 1), (["Testing", "qa"], 0), (["testing"], -1)],
+)
+def test_return_to_testing_matches_loop(testing_statuses, min_testing_count):
+    result = ReturnToTestingCalculator(CountingRepo(ISSUES)).calculate(
+        testing_statuses,
+        min_testing_count,
+    )
+    assert result == _loop_return_to_testing(
+        ISSUES,
+        testing_statuses,
+        min_testing_count,
+    )
+
+
+def test_engine_pushes_down_before_and_after_walking():
+    repo = CountingRepo(ISSUES, pushdown=True)
+    engine = MetricsEngine(repo)
+    assert ThroughputCalculator(repo, engine=engine).calculate() == {"pushed": 1}
+    assert QueueTimeCalculator(repo, engine=engine).calculate() == {"Pushed": [1.0]}
+    assert repo.walks == 0
+    CycleTimeCalculator(repo, engine=engine).calculate()
+    assert repo.walks == 1
+    # The walk takes status periods and throughput from the repository too.
+    assert QueueTimeCalculator(repo, engine=engine).calculate() == {"Pushed": [1.0]}
+    assert ThroughputCalculator(repo, engine=engine).calculate() == {"pushed": 1}
+    assert engine.aggregates().finished_per_week == {"pushed": 1}
+
+
+def test_engine_on_empty_repo():
+    engine = MetricsEngine(CountingRepo([]))
+    assert engine.time_metric("lead_time", 1, 1) == []
+    assert engine.throughput() == {}
+    assert engine.return_to_testing(["testing"], 0) == []
+    assert engine.cumulative_queue_time(1, 1).empty
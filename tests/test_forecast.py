@@ -0,0 +1,123 @@
+"""Tests for Monte Carlo delivery forecasts."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.consts import FORECAST_PERCENTILES
+from metrics.services.forecast import (
+    MAX_BATCH_WEEKS,
+    ForecastService,
+    simulate_items_finished,
+    simulate_weeks_to_finish,
+)
+
+SEED = 25
+SIMULATIONS = 20_000
+# Weeks finishing nothing or ten items, each half the time.
+COIN = np.array([0, 10])
+ITEMS_PER_WEEK = 10
+START = date(2024, 4, 3)
+TOLERANCE = 0.05
+
+
+def _service(counts, first_week="2024-01-01", **kwargs):
+    calculator = MagicMock()
+    calculator.calculate.return_value = pd.DataFrame(
+        {"throughput_1w": np.asarray(counts, dtype=float)},
+        index=pd.date_range(first_week, periods=len(counts), freq="7D", name="week"),
+    )
+    return ForecastService(calculator, simulations=SIMULATIONS, **kwargs)
+
+
+def test_constant_throughput_is_certain():
+    rng = np.random.default_rng(SEED)
+    history = np.array([ITEMS_PER_WEEK])
+    weeks = simulate_weeks_to_finish(history, 25, SIMULATIONS, rng)
+    assert set(weeks.tolist()) == {3}
+    totals = simulate_items_finished(history, MAX_BATCH_WEEKS + 8, SIMULATIONS, rng)
+    assert set(totals.tolist()) == {(MAX_BATCH_WEEKS + 8) * ITEMS_PER_WEEK}
+
+
+def test_weeks_to_finish_follow_the_history():
+    weeks = simulate_weeks_to_finish(
+        COIN,
+        ITEMS_PER_WEEK,
+        SIMULATIONS,
+        np.random.default_rng(SEED),
+    )
+    # Geometric: half the runs finish in the first week, two weeks on average.
+    assert abs(np.mean(weeks == 1) - 1 / 2) < TOLERANCE
+    assert abs(weeks.mean() - 2) < TOLERANCE * 2
+    # Runs needing more than one batch of weeks are counted too.
+    long_runs = simulate_weeks_to_finish(
+        COIN,
+        ITEMS_PER_WEEK * MAX_BATCH_WEEKS,
+        len(("a", "few", "runs")),
+        np.random.default_rng(SEED),
+    )
+    assert (long_runs > MAX_BATCH_WEEKS).all()
+
+
+def test_items_finished_follow_the_history():
+    weeks = 4
+    totals = simulate_items_finished(
+        COIN,
+        weeks,
+        SIMULATIONS,
+        np.random.default_rng(SEED),
+    )
+    assert set(np.unique(totals % ITEMS_PER_WEEK).tolist()) == {0}
+    assert abs(totals.mean() / (weeks * ITEMS_PER_WEEK / 2) - 1) < TOLERANCE
+
+
+def test_simulation_rejects_impossible_forecasts():
+    rng = np.random.default_rng(SEED)
+    with pytest.raises(ValueError, match="positive"):
+        simulate_weeks_to_finish(COIN, 0, SIMULATIONS, rng)
+    with pytest.raises(ValueError, match="without finished items"):
+        simulate_weeks_to_finish(np.zeros(3, dtype=int), 1, SIMULATIONS, rng)
+
+
+def test_weekly_throughput_uses_recent_complete_weeks():
+    service = _service([1, 2, 3, 4], history_weeks=4)
+    # Wednesday of the sixth week: its own week is incomplete, the fifth
+    # finished nothing and the first falls out of the history.
+    history = service.weekly_throughput(date(2024, 2, 7))
+    assert history.tolist() == [2, 3, 4, 0]
+    assert history.index[0] == pd.Timestamp("2024-01-08")
+    assert service.weekly_throughput(date(2024, 1, 31)).tolist() == [1, 2, 3, 4]
+    with pytest.raises(ValueError, match="No throughput history"):
+        service.weekly_throughput(date(2024, 1, 3))
+
+
+def test_when_and_how_many():
+    service = _service([0, 10] * 6)
+    when = service.when(ITEMS_PER_WEEK * 3, start=START)
+    assert when["percentile"].tolist() == list(FORECAST_PERCENTILES)
+    assert when["weeks"].is_monotonic_increasing
+    assert when["weeks"].min() >= len(("one", "two", "three"))
+    assert when["date"].tolist() == [
+        START + timedelta(weeks=int(weeks)) for weeks in when["weeks"]
+    ]
+    how_many = service.how_many(START + timedelta(days=30), start=START)
+    assert how_many["items"].is_monotonic_decreasing
+    assert how_many["items"].max() <= ITEMS_PER_WEEK * 4
+    with pytest.raises(ValueError, match="at least a week"):
+        service.how_many(START + timedelta(days=6), start=START)
+
+
+def test_forecasts_are_reproducible():
+    counts = np.random.default_rng(SEED).integers(0, 8, 20)
+    first = _service(counts, seed=1).when(40, start=START)
+    pd.testing.assert_frame_equal(first, _service(counts, seed=1).when(40, start=START))
+    weeks = simulate_weeks_to_finish(counts, 40, SIMULATIONS, np.random.default_rng(1))
+    again = simulate_weeks_to_finish(counts, 40, SIMULATIONS, np.random.default_rng(1))
+    other = simulate_weeks_to_finish(counts, 40, SIMULATIONS, np.random.default_rng(2))
+    np.testing.assert_array_equal(weeks, again)
+    assert not np.array_equal(weeks, other)
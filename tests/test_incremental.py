@@ -0,0 +1,245 @@
+"""Tests for metric aggregates updated incrementally on sync."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from dependency_injector import providers
+
+from metrics.consts import CALC_LIMIT, ONE_DAY, ONE_HOUR, QUEUE_TIME_PERCENTILES
+from metrics.containers import Container
+from metrics.entity import Issue
+from metrics.repository.base import IssueChanges
+from metrics.services.engine import MetricsEngine
+from metrics.services.incremental import IncrementalAggregates, IncrementalMetricsEngine
+
+SEED = 23
+ISSUE_COUNT = 300
+STATUSES = ("To Do", "In Progress", "Testing", "Done")
+MAX_HOURS = 24 * 40
+CUMULATIVE_LIMIT = 1000
+# Share of finished issues and the longest status history.
+FINISHED = 0.8
+HISTORY = 5
+FIRST_SYNC = datetime(2024, 3, 1, tzinfo=UTC)
+TREND_WINDOWS = (4, 8)
+
+
+def _random_issue(rng, n):
+    created_at = datetime(2024, 1, 1, tzinfo=UTC) + timedelta(
+        hours=int(rng.integers(MAX_HOURS)),
+    )
+    finish = timedelta(hours=float(rng.uniform(0, MAX_HOURS)))
+    statuses = rng.permutation(STATUSES)[: rng.integers(len(STATUSES) + 1)]
+    return Issue(
+        key=f"ISSUE-{n}",
+        status="Done",
+        created_at=created_at,
+        first_status_change_at=created_at + timedelta(hours=1),
+        last_finish_status_at=created_at + finish if rng.random() < FINISHED else None,
+        status_history=[
+            str(status) for status in rng.choice(STATUSES, rng.integers(HISTORY))
+        ]
+        or None,
+        statuses_x_periods={
+            str(status): timedelta(hours=float(rng.uniform(0, MAX_HOURS)))
+            for status in statuses
+        },
+    )
+
+
+class SyncingRepo:
+    """Repository whose refreshes apply a queued delta, as a sync would."""
+
+    pushdown = False
+
+    def __init__(self, issues):
+        self.issues = {issue.key: issue for issue in issues}
+        self.changes = None
+        self.pending = None
+        self.synced_at = FIRST_SYNC
+        self.walks = 0
+
+    def iter_issues(self):
+        self.walks += 1
+        return iter(list(self.issues.values()))
+
+    def refresh(self):
+        changes, self.pending = self.pending, None
+        self.changes = changes and replace(changes, since=self.synced_at)
+        self.synced_at += timedelta(hours=1)
+        if self.changes is not None:
+            for key in self.changes.removed:
+                del self.issues[key]
+            for issue in self.changes.updated:
+                self.issues[issue.key] = issue
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(SEED)
+
+
+@pytest.fixture
+def issues(rng):
+    return [_random_issue(rng, n) for n in range(ISSUE_COUNT)]
+
+
+def _assert_same_metrics(engine, expected):
+    for metric_name in ("cycle_time", "lead_time"):
+        for timeslot, limit in ((ONE_DAY, CALC_LIMIT), (ONE_HOUR, CUMULATIVE_LIMIT)):
+            assert engine.time_metric(metric_name, timeslot, limit) == (
+                expected.time_metric(metric_name, timeslot, limit)
+            )
+    queue_time = engine.queue_time(ONE_DAY, CALC_LIMIT)
+    assert queue_time == expected.queue_time(ONE_DAY, CALC_LIMIT)
+    assert list(queue_time) == list(expected.queue_time(ONE_DAY, CALC_LIMIT))
+    pd.testing.assert_frame_equal(
+        engine.cumulative_queue_time(ONE_HOUR, CUMULATIVE_LIMIT)
+        .sort_values("status")
+        .reset_index(drop=True),
+        expected.cumulative_queue_time(ONE_HOUR, CUMULATIVE_LIMIT)
+        .sort_values("status")
+        .reset_index(drop=True),
+    )
+    assert engine.throughput() == expected.throughput()
+    pd.testing.assert_frame_equal(
+        engine.rolling_time_metric("cycle_time", TREND_WINDOWS, (50, 85), ONE_DAY),
+        expected.rolling_time_metric("cycle_time", TREND_WINDOWS, (50, 85), ONE_DAY),
+    )
+    pd.testing.assert_frame_equal(
+        engine.rolling_throughput(TREND_WINDOWS),
+        expected.rolling_throughput(TREND_WINDOWS),
+    )
+    for min_testing_count in (0, 1):
+        assert engine.return_to_testing(["testing"], min_testing_count) == (
+            expected.return_to_testing(["testing"], min_testing_count)
+        )
+
+
+def test_engine_matches_the_batch_engine(issues):
+    repo = SyncingRepo(issues)
+    _assert_same_metrics(IncrementalMetricsEngine(repo), MetricsEngine(repo))
+
+
+def test_refresh_applies_only_the_changes(rng, issues):
+    repo = SyncingRepo(issues)
+    engine = IncrementalMetricsEngine(repo)
+    engine.throughput()
+    changed = [
+        replace(issue, statuses_x_periods={"Done": timedelta(hours=n)})
+        for n, issue in enumerate(issues[:10], start=1)
+    ]
+    added = [_random_issue(rng, ISSUE_COUNT + n) for n in range(5)]
+    removed = tuple(issue.key for issue in issues[10:15])
+    repo.pending = IssueChanges(updated=(*changed, *added), removed=removed)
+    engine.refresh()
+    assert repo.walks == 1
+    assert len(engine.state()) == ISSUE_COUNT + len(added) - len(removed)
+    _assert_same_metrics(engine, MetricsEngine(repo))
+
+
+def test_aggregates_persist_across_runs(tmp_path, rng, issues):
+    path = tmp_path / "aggregates.json"
+    repo = SyncingRepo(issues)
+    IncrementalMetricsEngine(repo, path).throughput()
+    assert repo.walks == 1
+    restored = IncrementalAggregates.load(path)
+    assert (
+        restored.contributions == IncrementalMetricsEngine(repo).state().contributions
+    )
+    assert restored.synced_at == FIRST_SYNC
+    # The next run's sync continues from the saved aggregates.
+    repo.pending = IssueChanges(updated=(_random_issue(rng, ISSUE_COUNT),))
+    repo.refresh()
+    engine = IncrementalMetricsEngine(repo, path)
+    _assert_same_metrics(engine, MetricsEngine(repo))
+    assert repo.walks == len(("first run", "state compared above", "batch engine"))
+    assert IncrementalAggregates.load(path).synced_at == repo.synced_at
+    path.write_text("not json")
+    assert IncrementalAggregates.load(path) is None
+
+
+def test_timeslots_off_the_resolution_are_exact(issues):
+    repo = SyncingRepo(issues)
+    engine = IncrementalMetricsEngine(repo)
+    expected = MetricsEngine(repo)
+    half_hour = ONE_HOUR // 2
+    assert engine.time_metric("cycle_time", half_hour, CALC_LIMIT) == (
+        expected.time_metric("cycle_time", half_hour, CALC_LIMIT)
+    )
+    assert engine.queue_time(half_hour, CALC_LIMIT) == (
+        expected.queue_time(half_hour, CALC_LIMIT)
+    )
+    pd.testing.assert_frame_equal(
+        engine.cumulative_queue_time(half_hour, CUMULATIVE_LIMIT),
+        expected.cumulative_queue_time(half_hour, CUMULATIVE_LIMIT),
+    )
+    pd.testing.assert_frame_equal(
+        engine.queue_time_percentiles(QUEUE_TIME_PERCENTILES, half_hour),
+        expected.queue_time_percentiles(QUEUE_TIME_PERCENTILES, half_hour),
+    )
+    assert repo.walks == len(("counting the aggregates", "batch engine"))
+
+
+def test_refresh_without_changes_counts_again(issues):
+    repo = SyncingRepo(issues)
+    engine = IncrementalMetricsEngine(repo)
+    engine.throughput()
+    engine.refresh()
+    engine.throughput()
+    assert repo.walks == len(("first", "after refresh"))
+
+
+def test_retracting_every_issue_empties_the_histograms(issues):
+    aggregates = IncrementalAggregates(issues)
+    aggregates.apply_changes(IssueChanges(removed=tuple(i.key for i in issues)))
+    assert len(aggregates) == 0
+    assert not aggregates.periods
+    assert not aggregates.weeks
+    aggregates.retract("ISSUE-0")
+
+
+def test_percentiles_are_exact(issues):
+    engine = IncrementalMetricsEngine(SyncingRepo(issues))
+    frame = engine.queue_time_percentiles(QUEUE_TIME_PERCENTILES, ONE_HOUR)
+    statuses, seconds = MetricsEngine(SyncingRepo(issues)).status_periods()
+    for row in frame.itertuples(index=False):
+        # Periods are counted per whole hour.
+        hours = np.sort(seconds[statuses == row.status] // ONE_HOUR)
+        assert row.count == len(hours)
+        for percentile in QUEUE_TIME_PERCENTILES:
+            # The smallest period whose rank reaches the percentile.
+            rank = max(math.ceil(percentile / 100 * len(hours)), 1)
+            assert getattr(row, f"p{percentile}") == hours[rank - 1]
+
+
+def test_engine_on_empty_repo():
+    engine = IncrementalMetricsEngine(SyncingRepo([]))
+    assert engine.time_metric("lead_time", 1, 1) == []
+    assert engine.throughput() == {}
+    assert engine.return_to_testing(["testing"], 0) == []
+    assert engine.cumulative_queue_time(1, 1).empty
+    assert engine.queue_time_percentiles(QUEUE_TIME_PERCENTILES, ONE_HOUR).empty
+    assert len(engine.status_periods()[0]) == 0
+
+
+def test_container_keeps_aggregates_next_to_the_sync_store(tmp_path, issues):
+    container = Container()
+    container.repo.override(providers.Object(SyncingRepo(issues)))
+    assert type(container.metrics_engine()) is MetricsEngine
+    container = Container()
+    container.config.from_dict(
+        {"jira": {"server": "https://jira.example.com", "sync_store": str(tmp_path)}},
+    )
+    container.repo.override(providers.Object(SyncingRepo(issues)))
+    engine = container.metrics_engine()
+    assert isinstance(engine, IncrementalMetricsEngine)
+    container.metrics_service().get_throughput()
+    assert engine.path.parent == tmp_path
+    assert IncrementalAggregates.load(engine.path) is not None
@@ -0,0 +1,85 @@
+"""Tests for the secondary issue indexes and the repository query API."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from metrics.entity import Issue, TransitionLog
+from metrics.repository.base import BaseIssuesRepository
+from metrics.repository.index import IssueIndex
+
+
+def _day(day):
+    return datetime(2024, 1, day, tzinfo=UTC)
+
+
+def _issue(n, status="Done", finished_day=None, assignees=()):
+    return Issue(
+        key=f"ISSUE-{n}",
+        status=status,
+        created_at=_day(n),
+        last_finish_status_at=_day(finished_day) if finished_day else None,
+        doers_x_periods={None: timedelta(hours=1)},
+        transitions=TransitionLog(
+            (_day(n), "assignee", None, assignee) for assignee in assignees
+        ),
+    )
+
+
+ISSUES = [
+    _issue(1, finished_day=9, assignees=["alice"]),
+    _issue(2, status="In Progress", assignees=["bob"]),
+    _issue(3, finished_day=4, assignees=["alice", "bob"]),
+    _issue(4, finished_day=9),
+]
+
+
+class ListRepo(BaseIssuesRepository):
+    def get_issues(self):
+        return ISSUES
+
+
+@pytest.fixture
+def repo():
+    return ListRepo()
+
+
+def _keys(issues):
+    return [issue.key for issue in issues]
+
+
+def test_finished_between_is_sorted_and_half_open(repo):
+    assert _keys(repo.finished_between(_day(4), _day(9))) == ["ISSUE-3"]
+    assert _keys(repo.finished_between(_day(5))) == ["ISSUE-1", "ISSUE-4"]
+    assert _keys(repo.finished_between(end=_day(10))) == [
+        "ISSUE-3",
+        "ISSUE-1",
+        "ISSUE-4",
+    ]
+
+
+def test_created_between(repo):
+    assert _keys(repo.created_between(_day(2), _day(4))) == ["ISSUE-2", "ISSUE-3"]
+    assert repo.created_between(_day(5)) == []
+
+
+def test_in_status_and_assigned_to(repo):
+    assert _keys(repo.in_status("In Progress")) == ["ISSUE-2"]
+    assert repo.in_status("Testing") == []
+    assert _keys(repo.assigned_to("alice")) == ["ISSUE-1", "ISSUE-3"]
+    assert _keys(repo.assigned_to("bob")) == ["ISSUE-2", "ISSUE-3"]
+
+
+def test_index_groups_finished_issues_by_week():
+    index = IssueIndex(ISSUES)
+    assert _keys(index.finished_in_week("2024W02")) == ["ISSUE-1", "ISSUE-4"]
+    assert set(index.by_week) == {"2024W01", "2024W02"}
+
+
+def test_refresh_rebuilds_index(repo):
+    first = repo.index
+    repo.refresh()
+    assert repo.index is not first
+    assert len(repo.created_between()) == len(ISSUES)
@@ -6,8 +6,10 @@ from datetime import datetime, timedelta
 
 import pytest
 
-from metrics.entity import Issue
+from metrics.consts import ONE_HOUR
+from metrics.entity import Issue, Periods
 from metrics.repository.base import BaseIssuesRepository
+from metrics.services.calculator import QueueTimeCalculator
 
 
 @pytest.fixture
@@ -102,3 +104,52 @@ def test_issue_lead_time(test_issue: Issue) -> None:
 
 def test_issue_cycle_time(test_issue: Issue) -> None:
     assert test_issue.cycle_time == timedelta(hours=1)
+
+
+def test_issue_is_slotted_and_compact() -> None:
+    issue = Issue(
+        key="TEST-1",
+        status="in progress".capitalize(),
+        created_at=datetime(2021, 1, 1, 0, 0, 0),
+        status_history=["created", "In progress"],
+        doers_x_periods={None: timedelta(hours=1), "user1": timedelta(hours=2)},
+        statuses_x_periods={"New": timedelta(minutes=90)},
+    )
+    assert not hasattr(issue, "__dict__")
+    assert issue.status is issue.status_history[-1]
+    assert issue.status_history == ("created", "In progress")
+    assert isinstance(issue.statuses_x_periods, Periods)
+    assert issue.statuses_x_periods == {"New": timedelta(minutes=90)}
+    assert issue.doers_x_periods[None] == timedelta(hours=1)
+    assert "user2" not in issue.doers_x_periods
+
+
+def test_periods_truncate_to_whole_seconds() -> None:
+    periods = Periods({"New": timedelta(seconds=1, milliseconds=600)})
+    assert periods["New"] == timedelta(seconds=1)
+    assert list(periods.seconds()) == [1]
+    assert Periods.of(periods) is periods
+    assert Periods.of(None) is None
+
+
+class ListRepo(BaseIssuesRepository):
+    def __init__(self, issues: list[Issue]) -> None:
+        self.listed = issues
+        super().__init__()
+
+    def get_issues(self) -> list[Issue]:
+        return self.listed
+
+
+def test_periods_keep_their_timeslot() -> None:
+    # 7199.6 seconds is still within the second hour.
+    period = timedelta(seconds=7199, milliseconds=600)
+    issue = Issue(
+        key="TEST-1",
+        status="Done",
+        created_at=datetime(2021, 1, 1, 0, 0, 0),
+        statuses_x_periods={"New": period},
+    )
+    repo = ListRepo([issue])
+    queue_time = QueueTimeCalculator(repo).calculate(timeslot=ONE_HOUR)
+    assert queue_time == {"New": [period // timedelta(hours=1)]}
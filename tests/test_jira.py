@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
-from unittest.mock import MagicMock
+import re
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
 
 from metrics.repository.converter import JiraDataConverter
 from metrics.repository.jira import JiraAPIRepository, JiraIssuesRepository
+from metrics.repository.store import IssueStore
 
 
 def test_jiraapirepository_get_raw_data():
@@ -38,3 +41,131 @@ def test_jiraissuesrepository_all():
     assert len(issues) == 1
     assert issues[0].key == "ISSUE-1"
     mock_api_repo.get_raw_data.assert_called_once()
+
+
+def _raw_issue(key, status):
+    return {
+        "key": key,
+        "fields": {
+            "created": "2024-01-01T00:00:00.000+0000",
+            "status": {"name": status},
+        },
+        "changelog": {"histories": []},
+    }
+
+
+def test_jiraissuesrepository_incremental_sync(tmp_path):
+    store = IssueStore(tmp_path, "https://jira.example.com")
+    mock_api_repo = MagicMock()
+    mock_api_repo.jql = "project=TEST"
+    mock_api_repo.get_raw_data.return_value = [
+        _raw_issue("ISSUE-1", "To Do"),
+        _raw_issue("ISSUE-2", "To Do"),
+    ]
+    JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    full_call = mock_api_repo.get_raw_data.call_args
+    assert full_call.kwargs["updated_since"] is None
+
+    mock_api_repo.get_raw_data.return_value = [_raw_issue("ISSUE-2", "Done")]
+    repo = JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    delta_call = mock_api_repo.get_raw_data.call_args
+    assert delta_call.kwargs["updated_since"] is not None
+    assert repo.get("ISSUE-1").status == "To Do"
+    assert repo.get("ISSUE-2").status == "Done"
+    assert store.load("project=TEST").issues["ISSUE-2"].status == "Done"
+
+
+def test_jiraissuesrepository_reports_changes_since_the_stored_sync(tmp_path):
+    store = IssueStore(tmp_path, "https://jira.example.com")
+    mock_api_repo = MagicMock()
+    mock_api_repo.jql = "project=TEST"
+    mock_api_repo.get_raw_data.return_value = [_raw_issue("ISSUE-1", "To Do")]
+    repo = JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    assert repo.changes is None
+    first_sync = repo.synced_at
+
+    mock_api_repo.get_raw_data.return_value = [_raw_issue("ISSUE-2", "Done")]
+    repo.refresh()
+    assert [issue.key for issue in repo.changes.updated] == ["ISSUE-2"]
+    assert repo.changes.removed == ()
+    assert repo.changes.since == first_sync
+
+    # Another process synced in between, so the delta continues from its sync.
+    other = JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    repo.refresh()
+    assert repo.changes.since == other.synced_at
+
+
+def test_jiraissuesrepository_full_sync_reports_removed_issues(tmp_path):
+    store = IssueStore(tmp_path, "https://jira.example.com")
+    mock_api_repo = MagicMock()
+    mock_api_repo.jql = "project=TEST"
+    mock_api_repo.get_raw_data.return_value = [
+        _raw_issue("ISSUE-1", "To Do"),
+        _raw_issue("ISSUE-2", "To Do"),
+    ]
+    stored = JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    mock_api_repo.get_raw_data.return_value = [
+        _raw_issue("ISSUE-1", "To Do"),
+        _raw_issue("ISSUE-3", "Done"),
+    ]
+    repo = JiraIssuesRepository(
+        mock_api_repo,
+        JiraDataConverter(),
+        store,
+        full_sync=True,
+    )
+    assert mock_api_repo.get_raw_data.call_args.kwargs["updated_since"] is None
+    assert [issue.key for issue in repo.changes.updated] == ["ISSUE-3"]
+    assert repo.changes.removed == ("ISSUE-2",)
+    assert repo.changes.since == stored.synced_at
+
+
+def test_jiraapirepository_updated_since_restricts_jql():
+    repo = JiraAPIRepository(MagicMock(), "project=TEST ORDER BY created")
+    with patch(
+        "metrics.repository.jira.iter_issue_pages",
+        return_value=[],
+    ) as mock_get_issues:
+        list(
+            repo.get_raw_data(updated_since=datetime.now(UTC) - timedelta(hours=1)),
+        )
+    jql = mock_get_issues.call_args.args[1]
+    assert re.fullmatch(
+        r'\(project=TEST\) AND updated >= "-6[56]m" ORDER BY created',
+        jql,
+    )
+
+
+def test_jiraissuesrepository_converts_pages_while_fetching():
+    events = []
+
+    def raw_data(**_kwargs):
+        for key in ("ISSUE-1", "ISSUE-2"):
+            events.append(f"fetched {key}")
+            yield _raw_issue(key, "To Do")
+
+    class RecordingConverter(JiraDataConverter):
+        def convert_data_to_issue(self, data_item):
+            events.append(f"converted {data_item['key']}")
+            return super().convert_data_to_issue(data_item)
+
+    mock_api_repo = MagicMock()
+    mock_api_repo.get_raw_data.side_effect = raw_data
+    JiraIssuesRepository(mock_api_repo, RecordingConverter())
+    assert events == [
+        "fetched ISSUE-1",
+        "converted ISSUE-1",
+        "fetched ISSUE-2",
+        "converted ISSUE-2",
+    ]
+
+
+def test_jiraapirepository_projects_fields():
+    jira = MagicMock()
+    jira.search_issues.return_value = {"total": 1, "issues": [{"key": "ISSUE-1"}]}
+    repo = JiraAPIRepository(jira, "project=TEST", fields=["created", "status"])
+    assert list(repo.get_raw_data()) == [{"key": "ISSUE-1"}]
+    page_call = jira.search_issues.call_args_list[-1]
+    assert page_call.kwargs["fields"] == ["created", "status"]
+    assert page_call.kwargs["expand"] == "changelog"
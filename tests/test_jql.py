@@ -0,0 +1,24 @@
+"""Tests for JQL composition helpers."""
+
+from __future__ import annotations
+
+from metrics.repository.jql import and_clause, split_order_by
+
+
+def test_split_order_by():
+    assert split_order_by("project=A") == ("project=A", None)
+    assert split_order_by("project=A order by created DESC") == (
+        "project=A",
+        "created DESC",
+    )
+    assert split_order_by("ORDER BY key") == ("", "key")
+
+
+def test_and_clause_keeps_ordering():
+    assert (
+        and_clause("project=A ORDER BY created", 'updated >= "-5m"')
+        == '(project=A) AND updated >= "-5m" ORDER BY created'
+    )
+    assert and_clause("project=A", "key > A-1", order_by="key ASC") == (
+        "(project=A) AND key > A-1 ORDER BY key ASC"
+    )
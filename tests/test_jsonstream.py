@@ -0,0 +1,83 @@
+"""Tests for incremental JSON decoding."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from metrics.repository.jsonstream import JSONArrayStream, decode_array_items
+
+BODY = {
+    "expand": "schema,names",
+    "startAt": 0,
+    "total": 1234,
+    "issues": [
+        {"key": "ISSUE-1", "fields": {"summary": 'brackets ]}[{ and "quotes"'}},
+        {"key": "ISSUE-2", "fields": {"summary": "ünïcode"}},
+    ],
+    "names": {"summary": "Summary"},
+}
+
+
+def test_stream_decodes_byte_by_byte():
+    data = json.dumps(BODY, ensure_ascii=False).encode()
+    stream = JSONArrayStream("issues")
+    items = []
+    for i in range(len(data)):
+        items.extend(stream.feed(data[i : i + 1]))
+    stream.close()
+    assert items == BODY["issues"]
+    assert stream.header == {
+        "expand": "schema,names",
+        "startAt": 0,
+        "total": 1234,
+        "names": {"summary": "Summary"},
+    }
+
+
+def test_stream_yields_items_before_body_ends():
+    data = json.dumps(BODY).encode()
+    cut = data.index(b'{"key": "ISSUE-2"')
+    stream = JSONArrayStream("issues")
+    assert stream.feed(data[:cut]) == [BODY["issues"][0]]
+
+
+def test_stream_rejects_truncated_body():
+    data = json.dumps(BODY).encode()
+    with pytest.raises(ValueError, match="Truncated"):
+        decode_array_items([data[:-5]])
+
+
+def test_stream_decodes_a_chunked_item_once():
+    item = {"key": "ISSUE-1", "fields": {"comments": ["text"] * 100}}
+    data = json.dumps({"issues": [item]}).encode()
+    stream = JSONArrayStream("issues")
+    items = []
+    with patch.object(
+        json.JSONDecoder,
+        "raw_decode",
+        autospec=True,
+        side_effect=json.JSONDecoder.raw_decode,
+    ) as raw_decode:
+        for i in range(len(data)):
+            items.extend(stream.feed(data[i : i + 1]))
+    assert items == [item]
+    # Once for the key and once for the item, however many chunks.
+    assert raw_decode.call_count == len(("issues", item))
+
+
+def test_stream_handles_escapes_split_across_chunks():
+    item = {"key": "ISSUE-1", "fields": {"summary": 'a \\"{ quoted \\'}}
+    data = json.dumps({"issues": [item]}).encode()
+    for cut in range(len(data)):
+        stream = JSONArrayStream("issues")
+        items = [*stream.feed(data[:cut]), *stream.feed(data[cut:])]
+        stream.close()
+        assert items == [item]
+
+
+def test_stream_rejects_malformed_item():
+    with pytest.raises(ValueError, match="Expecting"):
+        decode_array_items([b'{"issues": [{"key": tru}]}'])
@@ -19,6 +19,10 @@ def test_metricsservice_get_cycle_time():
         throughput_calculator=MagicMock(),
         cumulative_queue_time_calculator=MagicMock(),
         return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_cycle_time()
     assert result == [1.0]
@@ -35,6 +39,10 @@ def test_metricsservice_get_lead_time():
         throughput_calculator=MagicMock(),
         cumulative_queue_time_calculator=MagicMock(),
         return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_lead_time()
     assert result == [2.0]
@@ -53,6 +61,10 @@ def test_metricsservice_get_queue_time():
         throughput_calculator=MagicMock(),
         cumulative_queue_time_calculator=MagicMock(),
         return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_queue_time()
     assert result == {"In Progress": [3.0]}
@@ -69,6 +81,10 @@ def test_metricsservice_get_throughput():
         throughput_calculator=throughput_calculator,
         cumulative_queue_time_calculator=MagicMock(),
         return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_throughput()
     assert result == {"2024W01": 5}
@@ -92,6 +108,10 @@ def test_metricsservice_get_cumulative_queue_time():
         throughput_calculator=MagicMock(),
         cumulative_queue_time_calculator=cumulative_queue_time_calculator,
         return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_cumulative_queue_time()
     pd.testing.assert_frame_equal(result, df)
@@ -108,7 +128,59 @@ def test_metricsservice_get_return_to_testing():
         throughput_calculator=MagicMock(),
         cumulative_queue_time_calculator=MagicMock(),
         return_to_testing_calculator=return_to_testing_calculator,
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
     )
     result = service.get_return_to_testing()
     assert result == [2, 3]
     return_to_testing_calculator.calculate.assert_called_once()
+
+
+def test_metricsservice_get_queue_time_percentiles():
+    queue_time_percentiles_calculator = MagicMock()
+    df = pd.DataFrame({"status": ["To Do"], "count": [100], "p85": [12.0]})
+    queue_time_percentiles_calculator.calculate.return_value = df
+    service = MetricsService(
+        cycle_time_calculator=MagicMock(),
+        lead_time_calculator=MagicMock(),
+        queue_time_calculator=MagicMock(),
+        throughput_calculator=MagicMock(),
+        cumulative_queue_time_calculator=MagicMock(),
+        return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=queue_time_percentiles_calculator,
+        rolling_cycle_time_calculator=MagicMock(),
+        rolling_lead_time_calculator=MagicMock(),
+        rolling_throughput_calculator=MagicMock(),
+    )
+    result = service.get_queue_time_percentiles()
+    pd.testing.assert_frame_equal(result, df)
+    queue_time_percentiles_calculator.calculate.assert_called_once()
+
+
+def test_metricsservice_get_trends():
+    rolling_cycle_time_calculator = MagicMock()
+    rolling_lead_time_calculator = MagicMock()
+    rolling_throughput_calculator = MagicMock()
+    cycle_time_trend = pd.DataFrame({"p85_4w": [3.0]})
+    lead_time_trend = pd.DataFrame({"p85_4w": [5.0]})
+    throughput_trend = pd.DataFrame({"throughput_4w": [2.5]})
+    rolling_cycle_time_calculator.calculate.return_value = cycle_time_trend
+    rolling_lead_time_calculator.calculate.return_value = lead_time_trend
+    rolling_throughput_calculator.calculate.return_value = throughput_trend
+    service = MetricsService(
+        cycle_time_calculator=MagicMock(),
+        lead_time_calculator=MagicMock(),
+        queue_time_calculator=MagicMock(),
+        throughput_calculator=MagicMock(),
+        cumulative_queue_time_calculator=MagicMock(),
+        return_to_testing_calculator=MagicMock(),
+        queue_time_percentiles_calculator=MagicMock(),
+        rolling_cycle_time_calculator=rolling_cycle_time_calculator,
+        rolling_lead_time_calculator=rolling_lead_time_calculator,
+        rolling_throughput_calculator=rolling_throughput_calculator,
+    )
+    pd.testing.assert_frame_equal(service.get_cycle_time_trend(), cycle_time_trend)
+    pd.testing.assert_frame_equal(service.get_lead_time_trend(), lead_time_trend)
+    pd.testing.assert_frame_equal(service.get_throughput_trend(), throughput_trend)
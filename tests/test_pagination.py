@@ -0,0 +1,124 @@
+"""Tests for cursor-based pagination of search results."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from metrics.repository.jira import JiraAPIRepository
+from metrics.repository.pagination import (
+    dedupe_pages,
+    iter_cursor_pages,
+    keyset_jql,
+    prefetch,
+)
+
+from .conftest import make_raw_issue
+
+ALL_KEYS = [f"ISSUE-{n}" for n in range(1, 121)]
+
+
+def request_paths(fake_jira):
+    return [path for path, _ in fake_jira.requests]
+
+
+def search_params(fake_jira):
+    return [params for path, params in fake_jira.requests if "search" in path]
+
+
+def test_keyset_jql_replaces_ordering():
+    assert keyset_jql("project=TEST ORDER BY created") == (
+        "(project=TEST) ORDER BY id ASC"
+    )
+    assert keyset_jql("project=TEST", 10005) == (
+        "(project=TEST) AND id > 10005 ORDER BY id ASC"
+    )
+    assert keyset_jql("ORDER BY created", 10005) == "id > 10005 ORDER BY id ASC"
+
+
+def test_dedupe_pages_drops_repeated_keys():
+    pages = [
+        [{"key": "A-1"}, {"key": "A-2"}],
+        [{"key": "A-2"}, {"key": "A-3"}],
+        [{"key": "A-3"}],
+    ]
+    assert list(dedupe_pages(pages)) == [
+        [{"key": "A-1"}, {"key": "A-2"}],
+        [{"key": "A-3"}],
+    ]
+
+
+def test_prefetch_produces_next_item_in_background():
+    produced = threading.Event()
+
+    def items():
+        yield 1
+        produced.set()
+        yield 2
+
+    stream = prefetch(items())
+    assert next(stream) == 1
+    assert produced.wait(timeout=5)
+    assert list(stream) == [2]
+
+
+def test_token_pagination_follows_next_page_token(make_client, fake_jira):
+    pages = list(
+        iter_cursor_pages(make_client(fake_jira), "project=TEST", mode="token")
+    )
+    assert [item["key"] for page in pages for item in page] == ALL_KEYS
+    tokens = [params.get("nextPageToken") for _, params in fake_jira.requests]
+    assert tokens == [None, "50", "100"]
+    assert set(request_paths(fake_jira)) == {"/rest/api/3/search/jql"}
+
+
+def test_keyset_pagination_follows_last_id(make_client, fake_jira):
+    pages = list(
+        iter_cursor_pages(make_client(fake_jira), "project=TEST", mode="keyset"),
+    )
+    assert [item["key"] for page in pages for item in page] == ALL_KEYS
+    jqls = [params["jql"] for params in search_params(fake_jira)]
+    assert jqls[0] == "(project=TEST) ORDER BY id ASC"
+    assert jqls[1] == "(project=TEST) AND id > 50 ORDER BY id ASC"
+    assert all(params["startAt"] == "0" for params in search_params(fake_jira))
+
+
+def test_keyset_pagination_spans_projects(make_client, fake_jira):
+    # Issues of two projects created in turns, listed in key order: key
+    # order and id order disagree at every page boundary.
+    per_project = 60
+    fake_jira.issues = [
+        make_raw_issue(n, project, issue_id=10000 + 2 * n + offset)
+        for offset, project in enumerate(("ALPHA", "BETA"))
+        for n in range(1, per_project + 1)
+    ]
+    pages = list(
+        iter_cursor_pages(
+            make_client(fake_jira),
+            "project in (ALPHA, BETA)",
+            mode="keyset",
+        ),
+    )
+    ids = [int(item["id"]) for page in pages for item in page]
+    assert ids == sorted(int(item["id"]) for item in fake_jira.issues)
+
+
+def test_auto_pagination_falls_back_to_keyset(make_client, fake_jira):
+    fake_jira.token_search = False
+    pages = list(iter_cursor_pages(make_client(fake_jira), "project=TEST"))
+    assert [item["key"] for page in pages for item in page] == ALL_KEYS
+    assert request_paths(fake_jira)[0] == "/rest/api/3/search/jql"
+    assert "/rest/api/2/search" in request_paths(fake_jira)
+
+
+def test_cursor_pagination_reports_errors(make_client, fake_jira):
+    fake_jira.error_status = 400
+    with pytest.raises(RuntimeError, match="Failed to fetch issues from Jira"):
+        list(iter_cursor_pages(make_client(fake_jira), "project=TEST"))
+
+
+@pytest.mark.parametrize("mode", ["auto", "token", "keyset", "offset"])
+def test_api_repository_pagination_modes(make_client, fake_jira, mode):
+    repo = JiraAPIRepository(make_client(fake_jira), "project=TEST", pagination=mode)
+    assert [item["key"] for item in repo.get_raw_data()] == ALL_KEYS
@@ -0,0 +1,98 @@
+"""Tests for parallel conversion of raw issues."""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.jira import JiraIssuesRepository
+from metrics.repository.parallel import convert_issues
+
+from .conftest import make_raw_issue
+
+RAW_ISSUES = [make_raw_issue(n) for n in range(1, 31)]
+
+
+def test_convert_issues_in_pool_matches_in_process():
+    converter = JiraDataConverter()
+    expected = [converter.convert_data_to_issue(item) for item in RAW_ISSUES]
+    converted = convert_issues(
+        converter,
+        iter(RAW_ISSUES),
+        workers=2,
+        chunk_size=4,
+        threshold=10,
+    )
+    assert list(converted) == expected
+
+
+def _names(issues):
+    for issue in issues:
+        yield issue.status
+        yield from issue.status_history or ()
+        yield from issue.statuses_x_periods or ()
+        yield from issue.doers_x_periods or ()
+        for transition in issue.transitions or ():
+            yield transition.from_value
+            yield transition.to_value
+
+
+def test_convert_issues_in_pool_interns_names():
+    converted = list(
+        convert_issues(
+            JiraDataConverter(),
+            iter(RAW_ISSUES),
+            workers=2,
+            chunk_size=4,
+            threshold=10,
+        ),
+    )
+    names = [name for name in _names(converted) if name is not None]
+    assert len({id(name) for name in names}) == len(set(names))
+
+
+def test_convert_issues_does_not_fork(monkeypatch):
+    pool = MagicMock(wraps=ProcessPoolExecutor)
+    monkeypatch.setattr("metrics.repository.parallel.ProcessPoolExecutor", pool)
+    converted = convert_issues(
+        JiraDataConverter(),
+        RAW_ISSUES,
+        workers=2,
+        chunk_size=4,
+        threshold=10,
+    )
+    assert len(list(converted)) == len(RAW_ISSUES)
+    assert pool.call_args.kwargs["mp_context"].get_start_method() != "fork"
+
+
+def test_convert_issues_small_input_stays_in_process(monkeypatch):
+    monkeypatch.setattr(
+        "metrics.repository.parallel.ProcessPoolExecutor",
+        MagicMock(side_effect=AssertionError("pool started")),
+    )
+    issues = list(convert_issues(JiraDataConverter(), RAW_ISSUES, workers=4))
+    assert [issue.key for issue in issues] == [item["key"] for item in RAW_ISSUES]
+
+
+@pytest.mark.parametrize("threshold", [0, 1000])
+def test_convert_issues_reports_failing_key(threshold):
+    broken = [*RAW_ISSUES[:5], {"key": "BROKEN-1"}, *RAW_ISSUES[5:]]
+    converted = convert_issues(
+        JiraDataConverter(),
+        broken,
+        workers=2,
+        chunk_size=4,
+        threshold=threshold,
+    )
+    with pytest.raises(RuntimeError, match="Failed to convert issue BROKEN-1"):
+        list(converted)
+
+
+def test_jiraissuesrepository_converts_with_workers():
+    api_repo = MagicMock()
+    api_repo.get_raw_data.return_value = RAW_ISSUES
+    repo = JiraIssuesRepository(api_repo, JiraDataConverter(), workers=2)
+    assert len(repo.all()) == len(RAW_ISSUES)
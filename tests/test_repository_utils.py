@@ -103,7 +103,10 @@ def test_get_jira_client_generic_exception():
 
 def test_container_provides_services():
     container = Container()
-    container.jira.override(MagicMock(name="JIRA"))
+    jira = MagicMock(name="JIRA")
+    # Search bodies are decoded from bytes when msgspec is installed.
+    jira._session.get.return_value.content = b'{"issues": []}'  # noqa: SLF001
+    container.jira.override(jira)
     container.config.from_dict(
         {
             "jira": {
@@ -125,3 +128,56 @@ def test_container_provides_services():
     assert metrics_service.throughput_calculator is not None
     assert metrics_service.cumulative_queue_time_calculator is not None
     assert metrics_service.return_to_testing_calculator is not None
+
+
+def test_baseissuesrepository_snapshot_is_read_only():
+    repo = DummyBaseRepo()
+    with pytest.raises(TypeError):
+        repo.issues["ISSUE-2"] = repo.get("ISSUE-1")
+
+
+def test_baseissuesrepository_refresh_refetches():
+    class CountingRepo(DummyBaseRepo):
+        calls = 0
+
+        def get_raw_data(self):
+            self.calls += 1
+            return super().get_raw_data()
+
+    repo = CountingRepo()
+    first = repo.get("ISSUE-1")
+    repo.refresh()
+    expected_calls = 2
+    assert repo.calls == expected_calls
+    assert repo.get("ISSUE-1") is not first
+
+
+def test_container_shares_repo_between_calculators():
+    container = Container()
+    container.jira.override(MagicMock(name="JIRA"))
+    container.config.from_dict(
+        {
+            "jira": {
+                "server": "http://example.com",
+                "token": "dummy-token",
+                "jql": "project=TEST",
+            },
+        },
+    )
+    with patch.object(BaseIssuesRepository, "refresh") as mock_refresh:
+        metrics_service = container.metrics_service()
+        repos = {
+            id(metrics_service.cycle_time_calculator.repo),
+            id(metrics_service.lead_time_calculator.repo),
+            id(metrics_service.queue_time_calculator.repo),
+            id(metrics_service.throughput_calculator.repo),
+            id(metrics_service.cumulative_queue_time_calculator.repo),
+            id(metrics_service.return_to_testing_calculator.repo),
+        }
+    assert len(repos) == 1
+    mock_refresh.assert_called_once()
+
+
+def test_container_projects_search_fields():
+    container = Container()
+    assert container.search_fields() == ["created", "status"]
@@ -0,0 +1,140 @@
+"""Tests for rolling-window trend metrics."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.consts import ONE_DAY, TREND_PERCENTILES, TREND_WINDOWS
+from metrics.entity import Issue
+from metrics.services.calculator import (
+    RollingCycleTimeCalculator,
+    RollingLeadTimeCalculator,
+    RollingThroughputCalculator,
+    ThroughputCalculator,
+)
+from metrics.services.engine import MetricsEngine
+from metrics.services.rolling import rolling_counts, rolling_percentiles, week_starts
+
+SEED = 24
+SIZE = 2000
+DAYS = 200
+START = np.datetime64("2024-01-03T12:00", "us")
+WEEK = np.timedelta64(7, "D")
+# Share of completions without a duration.
+MISSING = 0.1
+# Lead times of the calculator issues, in whole days.
+LEAD_DAYS = 9
+
+
+@pytest.fixture
+def completions():
+    rng = np.random.default_rng(SEED)
+    offsets = rng.integers(0, DAYS * ONE_DAY * 10**6, SIZE)
+    times = START + offsets.astype("timedelta64[us]")
+    values = rng.lognormal(size=SIZE)
+    values[rng.random(SIZE) < MISSING] = np.nan
+    return times, values
+
+
+def _window_mask(times, week, window):
+    end = week.to_datetime64() + WEEK
+    return (times >= end - window * WEEK) & (times < end)
+
+
+def test_week_starts_are_mondays():
+    times = np.array(["2024-01-01", "2024-01-07T23:59", "2024-01-08"], "datetime64[us]")
+    starts = week_starts(times)
+    assert starts.tolist() == [
+        datetime(2024, 1, 1).date(),
+        datetime(2024, 1, 1).date(),
+        datetime(2024, 1, 8).date(),
+    ]
+
+
+def test_rolling_counts_match_filtering(completions):
+    times, _ = completions
+    frame = rolling_counts(times, TREND_WINDOWS)
+    assert frame.index.name == "week"
+    assert (frame.index.dayofweek == 0).all()
+    for window in TREND_WINDOWS:
+        column = frame[f"throughput_{window}w"]
+        assert column.iloc[: window - 1].isna().all()
+        for week, value in column.iloc[window - 1 :].items():
+            assert value == _window_mask(times, week, window).sum() / window
+
+
+def test_rolling_percentiles_match_filtering(completions):
+    times, values = completions
+    frame = rolling_percentiles(times, values, TREND_WINDOWS, TREND_PERCENTILES)
+    pd.testing.assert_index_equal(frame.index, rolling_counts(times, ()).index)
+    for window in TREND_WINDOWS:
+        for week in frame.index[window - 1 :]:
+            in_window = values[_window_mask(times, week, window)]
+            expected = np.nanpercentile(in_window, TREND_PERCENTILES)
+            result = frame.loc[week, [f"p{p}_{window}w" for p in TREND_PERCENTILES]]
+            np.testing.assert_allclose(result.to_numpy(float), expected)
+        assert frame.iloc[: window - 1].filter(like=f"_{window}w").isna().all().all()
+
+
+def test_rolling_on_no_completions():
+    times = np.array([], dtype="datetime64[us]")
+    assert rolling_counts(times, (4,)).columns.tolist() == ["throughput_4w"]
+    frame = rolling_percentiles(times, np.array([]), (4,), (50,))
+    assert frame.empty
+    assert frame.columns.tolist() == ["p50_4w"]
+
+
+def _issue(n, finished_at):
+    created_at = finished_at - timedelta(days=n % LEAD_DAYS + 1)
+    return Issue(
+        key=f"ISSUE-{n}",
+        status="Done",
+        created_at=created_at,
+        first_status_change_at=created_at + timedelta(hours=n % 5),
+        last_finish_status_at=finished_at,
+    )
+
+
+class ListRepo:
+    pushdown = False
+
+    def __init__(self, issues):
+        self.issues = issues
+
+    def all(self):
+        return self.issues
+
+    def iter_issues(self):
+        return iter(self.issues)
+
+
+def test_rolling_calculators_share_weeks_with_throughput():
+    tz = timezone(timedelta(hours=-5))
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    issues = [
+        _issue(n, (start + timedelta(hours=37 * n)).astimezone(tz)) for n in range(150)
+    ]
+    issues.append(Issue(key="OPEN", status="To Do", created_at=start))
+    repo = ListRepo(issues)
+    engine = MetricsEngine(repo)
+    throughput = RollingThroughputCalculator(repo, engine=engine).calculate(
+        windows=(1,),
+    )
+    weekly = ThroughputCalculator(repo, engine=engine).calculate()
+    assert throughput["throughput_1w"].tolist() == list(weekly.values())
+    cycle = RollingCycleTimeCalculator(repo, engine=engine).calculate()
+    lead = RollingLeadTimeCalculator(repo, engine=engine).calculate(percentiles=(50,))
+    pd.testing.assert_index_equal(cycle.index, throughput.index)
+    assert cycle.columns.tolist() == [
+        f"p{percentile}_{window}w"
+        for window in TREND_WINDOWS
+        for percentile in TREND_PERCENTILES
+    ]
+    assert lead.columns.tolist() == [f"p50_{window}w" for window in TREND_WINDOWS]
+    medians = lead.to_numpy()[~lead.isna().to_numpy()]
+    assert len(medians)
+    assert ((medians >= 1) & (medians <= LEAD_DAYS)).all()
@@ -0,0 +1,128 @@
+"""Tests for the adaptive fetch scheduler."""
+
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from jira.exceptions import JIRAError
+
+from metrics.consts import FETCH_MAX_RETRY_AFTER
+from metrics.repository.scheduler import (
+    AdaptiveLimiter,
+    FetchScheduler,
+    classify_error,
+    parse_retry_after,
+)
+
+
+def _jira_error(status_code, headers=None):
+    response = MagicMock()
+    response.headers = headers or {}
+    return JIRAError("fail", status_code=status_code, response=response)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == pytest.approx(3.0)
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("nan") is None
+
+
+def test_parse_retry_after_is_capped():
+    assert parse_retry_after("86400") == FETCH_MAX_RETRY_AFTER
+    assert parse_retry_after("inf") == FETCH_MAX_RETRY_AFTER
+    assert parse_retry_after("Fri, 01 Jan 2100 00:00:00 GMT") == FETCH_MAX_RETRY_AFTER
+
+
+def test_classify_error_follows_exception_chain():
+    cause = _jira_error(429, {"Retry-After": "2"})
+    wrapped = RuntimeError("wrapped")
+    wrapped.__cause__ = cause
+    assert classify_error(wrapped) == (True, True, 2.0)
+    assert classify_error(_jira_error(404)) == (False, False, None)
+    assert classify_error(_jira_error(500)) == (True, False, None)
+
+
+def test_limiter_halves_once_per_window():
+    limiter = AdaptiveLimiter(max_limit=8)
+    tickets = [limiter.acquire() for _ in range(4)]
+    for ticket in tickets:
+        limiter.release(ticket, 0.1, throttled=True)
+    assert limiter.limit == pytest.approx(4.0)
+
+
+def test_limiter_grows_on_fast_responses():
+    initial_limit = 2
+    limiter = AdaptiveLimiter(max_limit=8, initial_limit=initial_limit)
+    for _ in range(10):
+        limiter.release(limiter.acquire(), 0.1)
+    assert limiter.limit > initial_limit
+
+
+def test_scheduler_retries_throttled_calls():
+    side_effect = [_jira_error(429), _jira_error(503), "ok"]
+    fn = MagicMock(side_effect=side_effect)
+    scheduler = FetchScheduler(max_in_flight=2, base_delay=0)
+    assert scheduler.call(fn) == "ok"
+    assert fn.call_count == len(side_effect)
+
+
+def test_scheduler_does_not_retry_client_errors():
+    fn = MagicMock(side_effect=_jira_error(400))
+    scheduler = FetchScheduler(max_in_flight=2, base_delay=0)
+    with pytest.raises(JIRAError):
+        scheduler.call(fn)
+    fn.assert_called_once()
+
+
+def test_scheduler_gives_up_after_max_retries():
+    max_retries = 2
+    fn = MagicMock(side_effect=_jira_error(503))
+    scheduler = FetchScheduler(
+        max_in_flight=2,
+        max_retries=max_retries,
+        base_delay=0,
+    )
+    with pytest.raises(JIRAError):
+        scheduler.call(fn)
+    assert fn.call_count == max_retries + 1
+
+
+def test_scheduler_map_is_ordered_and_bounded():
+    max_in_flight = 3
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def fetch(n):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+        return n
+
+    scheduler = FetchScheduler(max_in_flight=max_in_flight)
+    assert list(scheduler.map(fetch, range(20))) == list(range(20))
+    assert peak <= max_in_flight
+
+
+def test_scheduler_map_submits_lazily():
+    consumed = []
+
+    def args():
+        for n in range(100):
+            consumed.append(n)
+            yield n
+
+    scheduler = FetchScheduler(max_in_flight=2)
+    results = scheduler.map(lambda n: n, args())
+    assert next(results) == 0
+    assert len(consumed) <= scheduler.max_in_flight * 2
+    results.close()
@@ -0,0 +1,103 @@
+"""Tests for created-date sharding of large queries."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from itertools import pairwise
+
+import pytest
+
+from metrics.repository.jira import JiraAPIRepository
+from metrics.repository.sharding import Shard, iter_sharded_pages, plan_shards
+
+ISSUE_COUNT = 120
+SHARD_SIZE = 25
+
+
+@pytest.fixture
+def spread_jira(fake_jira):
+    """Issues created one every six hours."""
+    created = datetime(2024, 1, 1, tzinfo=UTC)
+    for issue in fake_jira.issues:
+        issue["fields"]["created"] = created.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        created += timedelta(hours=6)
+    return fake_jira
+
+
+def test_shard_jql_keeps_user_query():
+    start = datetime(2024, 1, 1, 12, 30, tzinfo=UTC)
+    end = datetime(2024, 2, 1, tzinfo=UTC)
+    assert Shard(start, end, 1).jql("project=TEST ORDER BY created DESC") == (
+        '(project=TEST) AND created >= "2024/01/01 12:30"'
+        ' AND created < "2024/02/01 00:00" ORDER BY created DESC'
+    )
+    assert Shard(None, end, 1).jql("project=TEST") == (
+        '(project=TEST) AND created < "2024/02/01 00:00"'
+    )
+    assert Shard(None, None, 1).jql("project=TEST") == "project=TEST"
+
+
+def test_plan_shards_bisects_until_shards_fit(make_client, spread_jira):
+    shards = plan_shards(
+        make_client(spread_jira), "project=TEST", shard_size=SHARD_SIZE
+    )
+    assert len(shards) > 1
+    assert all(shard.total <= SHARD_SIZE for shard in shards)
+    assert sum(shard.total for shard in shards) == ISSUE_COUNT
+    assert shards[0].start is None
+    assert shards[-1].end is None
+    for previous, current in pairwise(shards):
+        assert previous.end <= current.start
+
+
+def test_plan_shards_small_query_is_one_shard(make_client, spread_jira):
+    shards = plan_shards(make_client(spread_jira), "project=TEST")
+    assert shards == [Shard(None, None, ISSUE_COUNT)]
+
+
+def test_iter_sharded_pages_fetches_every_issue_once(make_client, spread_jira):
+    pages = iter_sharded_pages(
+        make_client(spread_jira),
+        "project=TEST",
+        shard_size=SHARD_SIZE,
+    )
+    keys = [item["key"] for page in pages for item in page]
+    assert sorted(keys) == sorted(issue["key"] for issue in spread_jira.issues)
+
+
+def test_api_repository_sharded_mode(make_client, spread_jira):
+    repo = JiraAPIRepository(
+        make_client(spread_jira),
+        "project=TEST",
+        pagination="sharded",
+        shard_size=SHARD_SIZE,
+    )
+    assert len(list(repo.get_raw_data())) == ISSUE_COUNT
+
+
+def test_api_repository_auto_mode_shards_large_queries(make_client, spread_jira):
+    spread_jira.token_search = False
+    repo = JiraAPIRepository(
+        make_client(spread_jira),
+        "project=TEST",
+        pagination="auto",
+        shard_size=SHARD_SIZE,
+    )
+    assert len(list(repo.get_raw_data())) == ISSUE_COUNT
+    jqls = [params.get("jql", "") for _, params in spread_jira.requests]
+    assert any("created >=" in jql for jql in jqls)
+    assert not any("id >" in jql for jql in jqls)
+
+
+def test_api_repository_auto_mode_keysets_small_queries(make_client, spread_jira):
+    spread_jira.token_search = False
+    repo = JiraAPIRepository(make_client(spread_jira), "project=TEST")
+    assert len(list(repo.get_raw_data())) == ISSUE_COUNT
+    jqls = [params.get("jql", "") for _, params in spread_jira.requests]
+    assert not any("created >=" in jql for jql in jqls)
+
+
+def test_iter_sharded_pages_reports_errors(make_client, fake_jira):
+    fake_jira.error_status = 400
+    with pytest.raises(RuntimeError, match="Failed to fetch issues from Jira"):
+        list(iter_sharded_pages(make_client(fake_jira), "project=TEST"))
@@ -0,0 +1,229 @@
+"""Tests for the mergeable quantile sketches."""
+
+from __future__ import annotations
+
+import json
+import math
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.consts import ONE_HOUR, QUEUE_TIME_PERCENTILES
+from metrics.entity import Issue
+from metrics.repository.base import BaseIssuesRepository
+from metrics.services.calculator import (
+    CumulativeQueueTimeCalculator,
+    QueueTimePercentilesCalculator,
+)
+from metrics.services.engine import MetricsEngine
+from metrics.services.sketch import DEFAULT_K, MIN_K, KLLSketch, StatusSketches
+
+SEED = 22
+SIZE = 200_000
+CHUNKS = 100
+# The documented rank error at the default k.
+RANK_ERROR = 0.0165
+QUANTILES = (0.01, 0.25, 0.5, 0.85, 0.95, 0.99)
+# About 3k items plus a few per level, well under 4k for this stream.
+MAX_RETAINED = 4 * DEFAULT_K
+
+
+def _max_rank_error(sketch, values):
+    ordered = np.sort(values)
+    results = sketch.quantiles(QUANTILES)
+    ranks = np.searchsorted(ordered, results, side="right") / len(ordered)
+    return float(np.max(np.abs(ranks - np.array(QUANTILES))))
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(SEED).lognormal(size=SIZE)
+
+
+def test_quantiles_within_error_bound(values):
+    sketch = KLLSketch()
+    for chunk in np.array_split(values, CHUNKS):
+        sketch.update_many(chunk)
+    assert len(sketch) == SIZE
+    assert _max_rank_error(sketch, values) < RANK_ERROR
+    assert sketch.quantile(0) == values.min()
+    assert sketch.quantile(1) == values.max()
+    assert abs(sketch.rank(float(np.median(values))) - 0.5) < RANK_ERROR
+
+
+def test_memory_is_bounded(values):
+    sketch = KLLSketch()
+    sketch.update_many(values)
+    small = KLLSketch()
+    small.update_many(values[: SIZE // CHUNKS])
+    # Retained items grow with the number of levels only.
+    assert sketch.retained < MAX_RETAINED
+    assert sketch.retained - small.retained < sketch.k
+
+
+def test_merged_sketches_match_the_whole_stream(values):
+    halves = np.array_split(values, len(("left", "right")))
+    merged = KLLSketch()
+    for half in halves:
+        sketch = KLLSketch()
+        sketch.update_many(half)
+        merged.merge(sketch)
+    assert len(merged) == SIZE
+    assert _max_rank_error(merged, values) < RANK_ERROR
+
+
+def test_merge_needs_the_same_accuracy():
+    with pytest.raises(ValueError, match="Cannot merge"):
+        KLLSketch(MIN_K).merge(KLLSketch(MIN_K * 2))
+    with pytest.raises(ValueError, match="at least"):
+        KLLSketch(MIN_K - 1)
+
+
+def test_json_round_trip(values):
+    sketch = KLLSketch()
+    sketch.update_many(values)
+    restored = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.quantiles(QUANTILES) == sketch.quantiles(QUANTILES)
+    assert restored.retained == sketch.retained
+    empty = KLLSketch.from_dict(json.loads(json.dumps(KLLSketch().to_dict())))
+    assert math.isnan(empty.quantile(0.5))
+    assert math.isnan(empty.rank(1.0))
+
+
+def test_small_streams_are_exact():
+    sketch = KLLSketch()
+    for value in (3, 1, 2):
+        sketch.update(value)
+    assert sketch.quantiles((0, 0.5, 1)) == [1.0, 2.0, 3.0]
+    assert sketch.rank(2) == pytest.approx(2 / 3)
+    assert sketch.rank(0) == 0.0
+
+
+def test_weighted_values_match_repeated_values(values):
+    distinct, counts = np.unique(np.round(values, 1), return_counts=True)
+    weighted = KLLSketch()
+    weighted.update_weighted(distinct, counts)
+    assert len(weighted) == SIZE
+    # Ties span a range of ranks; a quantile is off by its distance to it.
+    ordered = np.repeat(distinct, counts)
+    results = weighted.quantiles(QUANTILES)
+    below = np.searchsorted(ordered, results, side="left") / SIZE
+    upto = np.searchsorted(ordered, results, side="right") / SIZE
+    qs = np.array(QUANTILES)
+    assert np.max(np.maximum(below - qs, qs - upto)) < RANK_ERROR
+    # A value repeated n times is kept once per set bit of n.
+    heavy = KLLSketch()
+    heavy.update_weighted([1.0, 2.0], [SIZE, 1])
+    assert heavy.retained == SIZE.bit_count() + 1
+    assert heavy.quantiles((0.5, 1)) == [1.0, 2.0]
+    small = KLLSketch()
+    small.update_weighted([2.0, 1.0], [1, 2])
+    retained, weights = small.items()
+    assert retained.tolist() == [1.0, 2.0]
+    assert weights.tolist() == [2, 1]
+
+
+def test_status_sketches_round_trip_and_merge():
+    sketches = StatusSketches()
+    sketches.update("Review", [1, 2, 3])
+    sketches.update(None, [5])
+    other = StatusSketches()
+    other.update("Review", [4])
+    other.update("Done", [7])
+    sketches.merge(other)
+    restored = StatusSketches.from_dict(json.loads(json.dumps(sketches.to_dict())))
+    frame = restored.to_frame((50, 100))
+    assert frame.columns.tolist() == ["status", "count", "p50", "p100"]
+    assert frame["status"].tolist()[::2] == ["Review", "Done"]
+    assert pd.isna(frame["status"][1])
+    assert frame["count"].tolist() == [4, 1, 1]
+    assert frame["p100"].tolist() == [4.0, 5.0, 7.0]
+
+
+def test_queue_time_percentiles_calculator():
+    created_at = datetime(2024, 1, 1, tzinfo=UTC)
+    issues = [
+        Issue(
+            key=f"ISSUE-{n}",
+            status="Done",
+            created_at=created_at,
+            statuses_x_periods={
+                "Review": timedelta(hours=n),
+                "Testing": timedelta(hours=2 * n),
+            },
+        )
+        for n in range(1, 101)
+    ]
+
+    class ListRepo:
+        pushdown = False
+
+        def iter_issues(self):
+            return iter(issues)
+
+    frame = QueueTimePercentilesCalculator(ListRepo()).calculate()
+    assert frame.columns.tolist() == [
+        "status",
+        "count",
+        *(f"p{percentile}" for percentile in QUEUE_TIME_PERCENTILES),
+    ]
+    review = frame.set_index("status").loc["Review"]
+    assert review["count"] == len(issues)
+    assert review["p50"] == len(issues) / 2
+    assert review["p95"] == len(issues) * 0.95
+    minutes = QueueTimePercentilesCalculator(ListRepo()).calculate(
+        percentiles=(50,),
+        timeslot=ONE_HOUR // 60,
+    )
+    assert minutes.set_index("status").loc["Testing", "p50"] == len(issues) * 60
+
+
+def _review_issues(hours):
+    created_at = datetime(2024, 1, 1, tzinfo=UTC)
+    return [
+        Issue(
+            key=f"ISSUE-{n}",
+            status="Done",
+            created_at=created_at,
+            statuses_x_periods={"Review": timedelta(hours=int(hour))},
+        )
+        for n, hour in enumerate(hours)
+    ]
+
+
+def test_engine_takes_queue_time_from_sketches():
+    hours = np.random.default_rng(SEED).integers(1, 500, size=SIZE // CHUNKS * 10)
+    issues = _review_issues(hours)
+
+    class ListRepo(BaseIssuesRepository):
+        def get_issues(self):
+            return issues
+
+    engine = MetricsEngine(ListRepo())
+    sketch = engine.aggregates().status_sketches.sketches["Review"]
+    assert len(sketch) == len(issues)
+    assert sketch.retained < MAX_RETAINED
+    row = CumulativeQueueTimeCalculator(ListRepo(), engine=engine).calculate().iloc[0]
+    kept = np.sort(hours[hours > 1])
+    rank = np.searchsorted(kept, row["median_hours"], side="right") / len(kept)
+    assert abs(rank - 0.5) < RANK_ERROR
+    assert abs(row["count"] - len(kept)) < RANK_ERROR * len(kept)
+
+
+def test_pushed_down_counts_feed_the_sketches():
+    issues = _review_issues([1, 2, 2, 3, 3, 3, 8])
+
+    class ListRepo(BaseIssuesRepository):
+        def get_issues(self):
+            return issues
+
+    class PushedRepo(ListRepo):
+        pushdown = True
+
+    for calculator in (CumulativeQueueTimeCalculator, QueueTimePercentilesCalculator):
+        walked = calculator(ListRepo()).calculate()
+        assert walked.equals(calculator(PushedRepo()).calculate())
+    sketches = MetricsEngine(PushedRepo()).status_sketches()
+    assert sketches.sketches["Review"].retained < len(issues)
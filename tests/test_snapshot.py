@@ -0,0 +1,170 @@
+"""Tests for the memory-mapped columnar issue snapshot."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from metrics.__main__ import validate_config
+from metrics.containers import Container
+from metrics.entity import Issue, TransitionLog
+from metrics.repository.base import BaseIssuesRepository
+from metrics.repository.snapshot import (
+    SNAPSHOT_META_FILE,
+    IssueSnapshot,
+    SnapshotIssuesRepository,
+    write_snapshot,
+)
+from metrics.services.calculator import (
+    CumulativeQueueTimeCalculator,
+    QueueTimeCalculator,
+    ThroughputCalculator,
+)
+
+# Jira reports times in the server's time zone.
+SERVER_ZONE = timezone(timedelta(hours=3))
+
+
+def _day(day, hour=0):
+    return datetime(2024, 1, day, hour, tzinfo=SERVER_ZONE)
+
+
+def _issue(n, finished_at=None):
+    return Issue(
+        key=f"ISSUE-{n}",
+        status="Done" if finished_at else "In Progress",
+        created_at=_day(n),
+        first_status_change_at=_day(n + 1) if finished_at else None,
+        last_finish_status_at=finished_at,
+        status_history=["created", "In Progress", "Done"],
+        doers_x_periods={None: timedelta(hours=1), "user1": timedelta(hours=5)},
+        statuses_x_periods={
+            "To Do": timedelta(hours=n * 10),
+            "In Progress": timedelta(days=n),
+        },
+        transitions=TransitionLog(
+            [
+                (_day(n + 1), "status", "To Do", "In Progress"),
+                (_day(n + 1), "assignee", None, "user1"),
+            ],
+        ),
+    )
+
+
+ISSUES = [
+    # Monday 01:00 in the server's zone, still Sunday in UTC.
+    _issue(1, finished_at=_day(8, 1)),
+    _issue(2),
+    _issue(3, finished_at=_day(4)),
+    Issue(key="ISSUE-9", status="New", created_at=_day(9)),
+]
+
+
+class ListRepo(BaseIssuesRepository):
+    def get_issues(self):
+        return ISSUES
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    write_snapshot(tmp_path, ISSUES)
+    return tmp_path
+
+
+def test_snapshot_round_trip(snapshot_dir):
+    snapshot = IssueSnapshot.open(snapshot_dir)
+    assert len(snapshot) == len(ISSUES)
+    assert isinstance(snapshot.columns["keys"], np.memmap)
+    issues = snapshot.issues()
+    assert issues == ISSUES
+    assert issues[0].created_at.utcoffset() == SERVER_ZONE.utcoffset(None)
+    assert issues[0].transitions.value_at("assignee", _day(5)) == "user1"
+
+
+def test_snapshot_repository_pushes_aggregations_down(snapshot_dir):
+    repo = SnapshotIssuesRepository(snapshot_dir)
+    memory = ListRepo()
+    assert repo.finished_per_week() == memory.finished_per_week()
+    for calculator in (QueueTimeCalculator, ThroughputCalculator):
+        assert calculator(repo).calculate() == calculator(memory).calculate()
+    cumulative = CumulativeQueueTimeCalculator(repo).calculate()
+    assert cumulative.equals(CumulativeQueueTimeCalculator(memory).calculate())
+    assert repo._loaded is None  # noqa: SLF001
+
+
+def test_snapshot_repository_queries(snapshot_dir):
+    repo = SnapshotIssuesRepository(snapshot_dir)
+    memory = ListRepo()
+    assert repo.get("ISSUE-3") == ISSUES[2]
+    assert repo.get("ISSUE-7") is None
+    start, end = _day(4), _day(10)
+    assert repo.finished_between(start, end) == memory.finished_between(start, end)
+    assert repo.created_between(_day(2)) == memory.created_between(_day(2))
+    assert repo._loaded is None  # noqa: SLF001
+    assert repo.all() == ISSUES
+    assert repo.in_status("In Progress") == [ISSUES[1]]
+
+
+def test_snapshot_builds_issues_at_positions(snapshot_dir):
+    snapshot = IssueSnapshot.open(snapshot_dir)
+    positions = [3, 0, 2]
+    assert snapshot.issues_at(positions) == [ISSUES[p] for p in positions]
+    assert snapshot.issues_at([]) == []
+    assert list(snapshot.iter_issues(chunk_size=3)) == ISSUES
+    for position, issue in enumerate(ISSUES):
+        assert snapshot.find(issue.key) == position
+    assert snapshot.find("ISSUE-10") is None
+    assert snapshot.find("ZZZ-1") is None
+
+
+def test_snapshot_repository_streams_issues(snapshot_dir):
+    repo = SnapshotIssuesRepository(snapshot_dir)
+    assert list(repo.iter_issues()) == ISSUES
+    assert not repo.loaded
+
+
+def test_snapshot_refresh_sees_new_snapshot(snapshot_dir):
+    repo = SnapshotIssuesRepository(snapshot_dir)
+    previous = repo.snapshot
+    write_snapshot(snapshot_dir, ISSUES[:1])
+    write_snapshot(snapshot_dir, ISSUES[:2])
+    # The snapshot mapped before is still readable.
+    assert previous.issues() == ISSUES
+    repo.refresh()
+    assert [issue.key for issue in repo.all()] == ["ISSUE-1", "ISSUE-2"]
+    assert len(list(snapshot_dir.glob("columns-*"))) == len(("current", "previous"))
+
+
+def test_snapshot_open_rejects_missing_or_old_snapshot(tmp_path):
+    with pytest.raises(ValueError, match="No issue snapshot"):
+        IssueSnapshot.open(tmp_path)
+    (tmp_path / SNAPSHOT_META_FILE).write_text('{"version": 0}')
+    with pytest.raises(ValueError, match="unsupported format"):
+        IssueSnapshot.open(tmp_path)
+
+
+def test_empty_snapshot(tmp_path):
+    write_snapshot(tmp_path, [])
+    repo = SnapshotIssuesRepository(tmp_path)
+    assert repo.all() == []
+    assert repo.finished_per_week() == {}
+    assert repo.finished_between(datetime(2024, 1, 1, tzinfo=UTC)) == []
+
+
+def test_container_reads_snapshot(snapshot_dir):
+    container = Container()
+    container.config.from_dict({"jira": {"snapshot": str(snapshot_dir)}})
+    container.repo.override(container.snapshot_repo)
+    metrics_service = container.metrics_service()
+    assert metrics_service.get_throughput() == ListRepo().finished_per_week()
+
+
+def test_validate_config_with_snapshot_needs_no_jira():
+    cfg = {"snapshot": "snapshot"}
+    assert validate_config(cfg) == []
+    cfg["sync_store"] = "store"
+    assert validate_config(cfg) == [
+        "A snapshot cannot be combined with --offline, --columnar or --sync-store.",
+    ]
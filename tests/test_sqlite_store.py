@@ -0,0 +1,240 @@
+"""Tests for the SQLite issue store and repository."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from dependency_injector import providers
+
+from metrics.__main__ import select_repository
+from metrics.containers import Container
+from metrics.entity import Issue, TransitionLog
+from metrics.repository.base import BaseIssuesRepository
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.jira import JiraIssuesRepository
+from metrics.repository.sqlite_store import (
+    SQLiteIssuesRepository,
+    SQLiteIssueStore,
+    open_sqlite_store,
+)
+from metrics.services.calculator import (
+    CumulativeQueueTimeCalculator,
+    CycleTimeCalculator,
+    QueueTimeCalculator,
+    ThroughputCalculator,
+)
+
+from .conftest import make_raw_issue
+
+SERVER = "https://jira.example.com"
+JQL = "project=A"
+
+
+def _day(day):
+    return datetime(2024, 1, day, tzinfo=UTC)
+
+
+def _issue(n, finished_day=None):
+    return Issue(
+        key=f"ISSUE-{n}",
+        status="Done" if finished_day else "In Progress",
+        created_at=_day(n),
+        first_status_change_at=_day(n + 1) if finished_day else None,
+        last_finish_status_at=_day(finished_day) if finished_day else None,
+        status_history=["created", "In Progress", "Done"],
+        doers_x_periods={None: timedelta(hours=1), "user1": timedelta(hours=5)},
+        statuses_x_periods={
+            "To Do": timedelta(hours=n * 10),
+            "In Progress": timedelta(days=n),
+        },
+        transitions=TransitionLog(
+            [(_day(n + 1), "status", "To Do", "In Progress")],
+        ),
+    )
+
+
+ISSUES = {issue.key: issue for issue in (_issue(1, 9), _issue(2), _issue(3, 4))}
+
+
+class MemoryRepo(BaseIssuesRepository):
+    def get_issues(self):
+        return list(ISSUES.values())
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteIssueStore(tmp_path / "issues.sqlite", SERVER)
+    store.save(JQL, ISSUES, _day(20))
+    return store
+
+
+def test_sqlite_store_round_trip(store):
+    snapshot = store.load(JQL)
+    assert snapshot is not None
+    assert snapshot.synced_at == _day(20)
+    assert snapshot.issues == ISSUES
+    assert list(snapshot.issues) == list(ISSUES)
+    assert store.load("project=B") is None
+
+
+def test_sqlite_store_keeps_empty_parts(tmp_path):
+    issue = Issue(key="ISSUE-9", status="New", created_at=_day(1))
+    store = SQLiteIssueStore(tmp_path / "issues.sqlite", SERVER)
+    store.save(JQL, {issue.key: issue}, _day(20))
+    assert store.load(JQL).issues == {issue.key: issue}
+
+
+def test_sqlite_store_replaces_snapshot(store):
+    store.save(JQL, {"ISSUE-2": ISSUES["ISSUE-2"]}, _day(21))
+    snapshot = store.load(JQL)
+    assert list(snapshot.issues) == ["ISSUE-2"]
+    assert snapshot.synced_at == _day(21)
+
+
+def test_sqlite_store_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "issues.sqlite"
+    path.write_text("not a database")
+    assert SQLiteIssueStore(path, SERVER).load(JQL) is None
+
+
+def test_sqlite_repository_pushes_aggregations_down(store):
+    repo = SQLiteIssuesRepository(store, JQL)
+    memory = MemoryRepo()
+    assert repo.finished_per_week() == memory.finished_per_week()
+    for calculator in (QueueTimeCalculator, ThroughputCalculator):
+        assert calculator(repo).calculate() == calculator(memory).calculate()
+    cumulative = CumulativeQueueTimeCalculator(repo).calculate()
+    assert cumulative.equals(CumulativeQueueTimeCalculator(memory).calculate())
+    # Metrics that walk the issues stream them from the store.
+    assert CycleTimeCalculator(repo).calculate() == (
+        CycleTimeCalculator(memory).calculate()
+    )
+    assert not repo.loaded
+
+
+def test_sqlite_repository_queries(store):
+    repo = SQLiteIssuesRepository(store, JQL)
+    assert repo.get("ISSUE-3") == ISSUES["ISSUE-3"]
+    assert repo.get("ISSUE-7") is None
+    finished = repo.finished_between(_day(4), _day(10))
+    assert [issue.key for issue in finished] == ["ISSUE-3", "ISSUE-1"]
+    assert [issue.key for issue in repo.created_between(_day(2))] == [
+        "ISSUE-2",
+        "ISSUE-3",
+    ]
+    assert repo._loaded is None  # noqa: SLF001
+    assert repo.all() == list(ISSUES.values())
+    assert [issue.key for issue in repo.in_status("In Progress")] == ["ISSUE-2"]
+
+
+def test_sqlite_store_updates_issues_in_place(store):
+    changed = _issue(2, 6)
+    store.update(JQL, [changed, _issue(4)], _day(21))
+    snapshot = store.load(JQL)
+    assert list(snapshot.issues) == ["ISSUE-1", "ISSUE-2", "ISSUE-3", "ISSUE-4"]
+    assert snapshot.issues["ISSUE-2"] == changed
+    assert snapshot.synced_at == _day(21)
+    assert store.synced_at(JQL) == _day(21)
+    assert store.synced_at("project=B") is None
+
+
+def test_sqlite_store_streams_issues_in_chunks(store):
+    store.update(JQL, [_issue(2, 6), _issue(4)], _day(21))
+    streamed = list(store.iter_issues(JQL, chunk_size=2))
+    assert streamed == store.issues_where(JQL)
+    assert list(store.iter_issues("project=B")) == []
+
+
+def test_sqlite_store_counts_status_periods(store):
+    # ISSUE-1 changes in place to ISSUE-3's periods, which ISSUE-4 repeats.
+    changed = {
+        key: replace(ISSUES["ISSUE-3"], key=key) for key in ("ISSUE-1", "ISSUE-4")
+    }
+    store.update(JQL, changed.values(), _day(21))
+    issues = {**ISSUES, **changed}
+
+    class Repo(BaseIssuesRepository):
+        def get_issues(self):
+            return list(issues.values())
+
+    counts = store.status_period_counts(JQL)
+    assert counts == Repo().status_period_counts()
+    assert ("To Do", 30 * 3600, 3) in counts
+
+
+def test_sqlite_repository_syncs_from_jira(tmp_path):
+    store = open_sqlite_store(str(tmp_path), SERVER)
+    api_repo = MagicMock()
+    api_repo.get_raw_data.return_value = [make_raw_issue(1), make_raw_issue(2)]
+    repo = SQLiteIssuesRepository(store, JQL, api_repo, JiraDataConverter())
+    assert api_repo.get_raw_data.call_args.kwargs["updated_since"] is None
+    assert repo.changes is None
+    updated = {**make_raw_issue(1), "fields": {**make_raw_issue(1)["fields"]}}
+    updated["fields"]["status"] = {"name": "Reopened"}
+    api_repo.get_raw_data.return_value = [updated, make_raw_issue(3)]
+    repo.refresh()
+    assert api_repo.get_raw_data.call_args.kwargs["updated_since"] is not None
+    assert [issue.key for issue in repo.changes.updated] == ["ISSUE-1", "ISSUE-3"]
+    assert not repo.loaded
+    assert [issue.key for issue in repo.all()] == ["ISSUE-1", "ISSUE-2", "ISSUE-3"]
+    assert repo.get("ISSUE-1").status == "Reopened"
+
+
+def test_incremental_sync_with_sqlite_store(tmp_path):
+    store = open_sqlite_store(str(tmp_path), SERVER)
+    raw = {
+        "key": "ISSUE-1",
+        "fields": {
+            "created": "2024-01-01T00:00:00.000+0000",
+            "status": {"name": "Done"},
+        },
+        "changelog": {"histories": []},
+    }
+    mock_api_repo = MagicMock()
+    mock_api_repo.jql = JQL
+    mock_api_repo.get_raw_data.return_value = [raw]
+    JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    mock_api_repo.get_raw_data.return_value = []
+    repo = JiraIssuesRepository(mock_api_repo, JiraDataConverter(), store)
+    assert [issue.key for issue in repo.all()] == ["ISSUE-1"]
+    assert mock_api_repo.get_raw_data.call_args.kwargs["updated_since"] is not None
+
+
+def test_container_selects_sqlite_store(tmp_path):
+    container = Container()
+    container.config.from_dict(
+        {
+            "jira": {
+                "server": SERVER,
+                "sync_store": str(tmp_path),
+                "store_format": "sqlite",
+            },
+        },
+    )
+    assert isinstance(container.issue_store(), SQLiteIssueStore)
+    assert open_sqlite_store(None, SERVER) is None
+
+
+def test_container_reads_sqlite_store(store):
+    container = Container()
+    container.config.from_dict(
+        {
+            "jira": {
+                "server": SERVER,
+                "jql": JQL,
+                "sync_store": str(store.path.parent),
+                "store_format": "sqlite",
+            },
+        },
+    )
+    api_repo = MagicMock()
+    api_repo.get_raw_data.return_value = []
+    container.jira_api_repo.override(providers.Object(api_repo))
+    select_repository(container, {"sync_store": "store", "store_format": "sqlite"})
+    assert container.repo() is container.sqlite_repo()
+    metrics_service = container.metrics_service()
+    assert metrics_service.get_throughput() == MemoryRepo().finished_per_week()
+    assert not container.repo().loaded
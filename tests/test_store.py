@@ -0,0 +1,44 @@
+"""Tests for the local issue store."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from metrics.entity import Issue
+from metrics.repository.store import IssueStore, open_issue_store
+
+
+def _issue(key="ISSUE-1"):
+    return Issue(
+        key=key,
+        status="Done",
+        created_at=datetime(2024, 1, 1, tzinfo=UTC),
+        first_status_change_at=datetime(2024, 1, 2, tzinfo=UTC),
+        last_finish_status_at=datetime(2024, 1, 3, tzinfo=UTC),
+        status_history=["created", "In Progress", "Done"],
+        doers_x_periods={"user1": timedelta(hours=5)},
+        statuses_x_periods={"In Progress": timedelta(days=1)},
+    )
+
+
+def test_issue_store_round_trip(tmp_path):
+    store = IssueStore(tmp_path, "https://jira.example.com")
+    synced_at = datetime(2024, 2, 1, tzinfo=UTC)
+    store.save("project=A", {"ISSUE-1": _issue()}, synced_at)
+
+    snapshot = store.load("project=A")
+    assert snapshot is not None
+    assert snapshot.synced_at == synced_at
+    assert snapshot.issues == {"ISSUE-1": _issue()}
+    assert store.load("project=B") is None
+
+
+def test_issue_store_ignores_corrupt_file(tmp_path):
+    store = IssueStore(tmp_path, "https://jira.example.com")
+    store.path_for("project=A").write_text("{not json")
+    assert store.load("project=A") is None
+
+
+def test_open_issue_store_disabled_without_directory(tmp_path):
+    assert open_issue_store(None, "https://jira.example.com") is None
+    assert isinstance(open_issue_store(str(tmp_path), "s"), IssueStore)
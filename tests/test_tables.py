@@ -0,0 +1,151 @@
+"""Tests for the columnar issue and transition tables."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+from dependency_injector import providers
+
+from metrics.containers import Container
+from metrics.repository.base import BaseIssuesRepository
+from metrics.repository.columnar import ColumnarIssuesRepository
+from metrics.repository.converter import JiraDataConverter
+
+
+def _raw_issue(key, status, histories, created="2024-01-01T00:00:00.000+0000"):
+    return {
+        "key": key,
+        "fields": {
+            "created": created,
+            "status": {"name": status},
+        },
+        "changelog": {"histories": histories},
+    }
+
+
+def _history(created, field, from_string, to_string):
+    return {
+        "created": created,
+        "items": [
+            {"field": field, "fromString": from_string, "toString": to_string},
+        ],
+    }
+
+
+RAW_ISSUES = [
+    _raw_issue(
+        "ISSUE-1",
+        "Done",
+        [
+            _history("2024-01-02T00:00:00.000+0000", "status", "To Do", "In Progress"),
+            _history("2024-01-02T12:00:00.000+0000", "assignee", None, "user1"),
+            # 2024-01-03T00:00Z, with a different offset.
+            _history("2024-01-03T02:00:00.000+0200", "status", "In Progress", "Done"),
+        ],
+    ),
+    _raw_issue("ISSUE-2", "To Do", []),
+]
+
+ZONED_ISSUE = _raw_issue(
+    "ISSUE-3",
+    "Done",
+    [
+        _history("2024-01-05T09:00:00.000-0500", "status", "To Do", "Done"),
+        # Late on Sunday in New York, already Monday in UTC.
+        _history("2024-01-07T23:30:00.000-0500", "status", "Done", "Done"),
+    ],
+    created="2024-01-04T09:00:00.000-0500",
+)
+
+
+class ListRepo(BaseIssuesRepository):
+    def get_issues(self):
+        converter = JiraDataConverter()
+        return [
+            converter.convert_data_to_issue(item) for item in [*RAW_ISSUES, ZONED_ISSUE]
+        ]
+
+
+def test_convert_to_tables_has_one_row_per_issue_and_transition():
+    tables = JiraDataConverter().convert_to_tables(RAW_ISSUES)
+    transition_count = 3
+    assert len(tables) == len(RAW_ISSUES)
+    assert list(tables.issues["key"]) == ["ISSUE-1", "ISSUE-2"]
+    assert len(tables.transitions) == transition_count
+    assert list(tables.status_transitions()["to_value"]) == ["In Progress", "Done"]
+    assert tables.issues["last_finish_status_at"].iloc[0] == datetime(
+        2024,
+        1,
+        3,
+        tzinfo=UTC,
+    )
+    assert tables.transitions["duration"].iloc[-1] == timedelta(days=1)
+
+
+def test_convert_to_tables_shares_categories_for_statuses():
+    tables = JiraDataConverter().convert_to_tables(RAW_ISSUES)
+    status = tables.transitions["to_value"].cat
+    assert list(status.categories) == list(
+        tables.transitions["from_value"].cat.categories,
+    )
+    assert list(status.categories) == list(tables.issues["status"].cat.categories)
+
+
+def test_tables_to_issues_matches_direct_conversion():
+    converter = JiraDataConverter()
+    tables = converter.convert_to_tables(RAW_ISSUES)
+    expected = [converter.convert_data_to_issue(item) for item in RAW_ISSUES]
+    assert tables.to_issues() == expected
+    assert tables.issue("ISSUE-1") == expected[0]
+    assert tables.issue("ISSUE-3") is None
+
+
+def test_tables_keep_utc_offsets():
+    converter = JiraDataConverter()
+    expected = converter.convert_data_to_issue(ZONED_ISSUE)
+    issue = converter.convert_to_tables([*RAW_ISSUES, ZONED_ISSUE]).issue("ISSUE-3")
+    assert issue.created_at.utcoffset() == expected.created_at.utcoffset()
+    assert issue.last_finish_status_at.utcoffset() == timedelta(hours=-5)
+    assert issue.last_finish_status_at.strftime("%YW%V") == "2024W01"
+
+
+def test_tables_keep_last_issue_with_duplicate_key():
+    converter = JiraDataConverter()
+    updated = _raw_issue("ISSUE-1", "To Do", [])
+    tables = converter.convert_to_tables([*RAW_ISSUES, updated])
+    assert list(tables.issues["key"]) == ["ISSUE-1", "ISSUE-2"]
+    assert len(tables.transitions) == 0
+    assert tables.to_issues() == [
+        converter.convert_data_to_issue(item) for item in (updated, RAW_ISSUES[1])
+    ]
+
+
+def test_columnar_repository_answers_from_tables():
+    api_repo = MagicMock()
+    api_repo.get_raw_data.return_value = [*RAW_ISSUES, ZONED_ISSUE]
+    repo = ColumnarIssuesRepository(api_repo, JiraDataConverter())
+    memory = ListRepo()
+    assert len(repo.tables) == len(memory.issues)
+    assert repo.get("ISSUE-1") == memory.get("ISSUE-1")
+    assert repo.get("ISSUE-9") is None
+    assert repo.finished_per_week() == memory.finished_per_week()
+    assert repo.status_period_counts() == memory.status_period_counts()
+    start = datetime(2024, 1, 3, tzinfo=UTC)
+    assert repo.finished_between(start) == memory.finished_between(start)
+    assert repo.created_between(end=start) == memory.created_between(end=start)
+    assert list(repo.iter_issues()) == memory.all()
+    assert not repo.loaded
+    assert repo.all() == memory.all()
+    assert repo.loaded
+
+
+def test_container_keeps_columnar_tables():
+    api_repo = MagicMock()
+    api_repo.get_raw_data.return_value = RAW_ISSUES
+    container = Container()
+    container.jira_api_repo.override(providers.Object(api_repo))
+    container.repo.override(container.columnar_repo)
+    metrics_service = container.metrics_service()
+    assert metrics_service.get_throughput() == {"2024W01": 1}
+    assert not container.repo().loaded
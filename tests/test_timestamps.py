@@ -0,0 +1,38 @@
+"""Tests for Jira timestamp parsing."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from metrics.repository.timestamps import parse_timestamp
+
+
+def test_parse_timestamp_jira_layout():
+    assert parse_timestamp("2024-01-01T10:30:00.000+0000") == datetime(
+        2024,
+        1,
+        1,
+        10,
+        30,
+        tzinfo=UTC,
+    )
+    assert parse_timestamp("2024-01-01T10:30:00.000+0530").utcoffset() == timedelta(
+        hours=5,
+        minutes=30,
+    )
+
+
+def test_parse_timestamp_falls_back_for_unusual_input():
+    assert parse_timestamp("Jan 2 2024 10:30 UTC") == datetime(
+        2024,
+        1,
+        2,
+        10,
+        30,
+        tzinfo=UTC,
+    )
+
+
+def test_parse_timestamp_caches_repeated_strings():
+    value = "2024-03-01T00:00:00.000+0000"
+    assert parse_timestamp(value) is parse_timestamp(value)
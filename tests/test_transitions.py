@@ -0,0 +1,93 @@
+"""Tests for the per-issue transition log."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from metrics.entity import Transition, TransitionLog
+from metrics.repository.base import BaseIssuesRepository
+from metrics.repository.converter import JiraDataConverter
+from metrics.repository.store import issue_from_dict, issue_to_dict
+
+CREATED = "2024-01-01T00:00:00.000+0000"
+
+
+def _history(created, field, from_string, to_string):
+    return {
+        "created": created,
+        "items": [
+            {"field": field, "fromString": from_string, "toString": to_string},
+        ],
+    }
+
+
+RAW_ISSUE = {
+    "key": "ISSUE-1",
+    "fields": {"created": CREATED, "status": {"name": "Done"}},
+    "changelog": {
+        "histories": [
+            _history("2024-01-03T00:00:00.000+0000", "status", "Testing", "Done"),
+            _history("2024-01-02T00:00:00.000+0000", "status", "To Do", "Testing"),
+            _history("2024-01-02T06:00:00.500+0000", "assignee", None, "user1"),
+        ],
+    },
+}
+
+
+def _day(day, hour=0):
+    return datetime(2024, 1, day, hour, tzinfo=UTC)
+
+
+class SingleIssueRepo(BaseIssuesRepository):
+    def get_raw_data(self):
+        return [RAW_ISSUE]
+
+    def convert_data_to_issue(self, data_item):
+        return JiraDataConverter().convert_data_to_issue(data_item)
+
+
+def test_converter_keeps_ordered_transition_log():
+    issue = JiraDataConverter().convert_data_to_issue(RAW_ISSUE)
+    assert list(issue.transitions) == [
+        Transition(_day(2), "status", "To Do", "Testing"),
+        Transition(_day(2, 6) + timedelta(milliseconds=500), "assignee", None, "user1"),
+        Transition(_day(3), "status", "Testing", "Done"),
+    ]
+
+
+def test_transition_log_between_is_half_open():
+    log = JiraDataConverter().convert_data_to_issue(RAW_ISSUE).transitions
+    assert [t.to_value for t in log.between(_day(2), _day(3))] == ["Testing", "user1"]
+    assert [t.to_value for t in log.between(_day(2, 1))] == ["user1", "Done"]
+    assert [t.to_value for t in log.between(field="status")] == ["Testing", "Done"]
+    assert log.between(_day(4)) == []
+
+
+def test_issue_status_at():
+    issue = JiraDataConverter().convert_data_to_issue(RAW_ISSUE)
+    assert issue.status_at(_day(1) - timedelta(seconds=1)) is None
+    assert issue.status_at(_day(1, 12)) == "To Do"
+    assert issue.status_at(_day(2)) == "Testing"
+    assert issue.status_at(_day(5)) == "Done"
+    assert issue.transitions.value_at("assignee", _day(2)) is None
+    assert issue.transitions.value_at("assignee", _day(3)) == "user1"
+
+
+def test_issue_status_at_without_status_changes():
+    raw = {**RAW_ISSUE, "changelog": {"histories": []}}
+    issue = JiraDataConverter().convert_data_to_issue(raw)
+    assert len(issue.transitions) == 0
+    assert issue.status_at(_day(2)) == "Done"
+
+
+def test_transition_log_survives_the_store():
+    issue = JiraDataConverter().convert_data_to_issue(RAW_ISSUE)
+    restored = issue_from_dict(issue_to_dict(issue))
+    assert restored.transitions == issue.transitions
+    assert TransitionLog.from_rows(issue.transitions.to_rows()) == issue.transitions
+
+
+def test_repository_transitions_between():
+    repo = SingleIssueRepo()
+    changes = list(repo.transitions_between(_day(2, 1), _day(4), "status"))
+    assert [(issue.key, t.to_value) for issue, t in changes] == [("ISSUE-1", "Done")]
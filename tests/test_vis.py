@@ -36,3 +36,13 @@ def test_visservice_vis_cumulative_queue_time_creates_file(
     )
     vis.vis_cumulative_queue_time(temp_png_file, df)
     assert Path(temp_png_file).exists()
+
+
+def test_visservice_vis_trend_creates_file(temp_png_file):
+    vis = VisService()
+    df = pd.DataFrame(
+        {"p50_4w": [1.0, 2.0, None], "p85_4w": [2.0, 3.5, 4.0]},
+        index=pd.date_range("2024-01-01", periods=3, freq="W-MON", name="week"),
+    )
+    vis.vis_trend(temp_png_file, df, y_label="days")
+    assert Path(temp_png_file).exists()